@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'analytics'
+    
+    def ready(self):
+        """Connect the statistics cache invalidation signals and register the cache check."""
+        from . import checks, signals  # noqa: F401
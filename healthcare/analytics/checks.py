@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Statistics and doctor list invalidations only reach the workers sharing
+    the default cache, so deployments need a shared backend.
+    """
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [
+        Warning(
+            'The default cache is local to each process.',
+            hint=(
+                'Cache invalidation (dashboard statistics, doctor list) and login throttle buckets '
+                'stay within one worker; set CACHE_BACKEND to a shared backend such '
+                'as Redis, memcached or a file-based cache.'
+            ),
+            id='analytics.W001',
+        )
+    ]
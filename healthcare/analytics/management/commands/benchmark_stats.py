@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from analytics.stats import (
+    compute_user_stats,
+    patient_breakdown,
+    doctor_breakdown,
+    mapping_breakdown,
+    compute_user_breakdown,
+    get_user_breakdown,
+    invalidate_user_stats,
+)
+from healthcare.benchmarking import measure, percentile, latency_summary, format_latency
+from patients.models import Patient
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Measure dashboard statistics latency for a single user.
+    Populate data first, e.g. with benchmark_patient_search --populate.
+
+    The dashboard and /api/stats/ read the cached breakdown, but every write
+    of the user drops it, so the next read pays for the uncached breakdown.
+    Both paths have a p95 budget: --budget for the uncached breakdown, read
+    from the trigger-maintained rollups (see analytics.models), and
+    --served-budget for the cached one. The budgets are meant for a user with
+    at least --min-patients patients; the command refuses smaller datasets.
+
+    Example:
+        python manage.py benchmark_stats --email bench@example.com --min-patients 1000000
+    """
+    help = 'Benchmark dashboard totals and breakdowns and report latency percentiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Email of the user whose statistics are computed')
+        parser.add_argument('--iterations', type=int, default=50, help='Runs per measurement')
+        parser.add_argument('--min-patients', type=int, default=1_000_000,
+                            help='Fail unless the user has at least this many patients')
+        parser.add_argument('--budget', type=float, default=50.0,
+                            help='Fail when the p95 of the uncached breakdown exceeds this many ms')
+        parser.add_argument('--served-budget', type=float, default=5.0,
+                            help='Fail when the p95 of the served (cached) breakdown exceeds this many ms')
+        parser.add_argument('--explain', action='store_true', help='Print the query plan of each pass')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist")
+
+        totals = compute_user_stats(user.pk)
+        self.stdout.write(
+            f"Statistics of {user.email}: {totals['total_patients']} patients, "
+            f"{totals['total_doctors']} doctors, {totals['total_mappings']} mappings"
+        )
+        patients = Patient.objects.filter(created_by=user).count()
+        if patients < options['min_patients']:
+            raise CommandError(
+                f"{user.email} has {patients} patients, fewer than --min-patients "
+                f"{options['min_patients']}; populate more data or lower --min-patients"
+            )
+
+        with CaptureQueriesContext(connection) as context:
+            compute_user_breakdown(user.pk)
+        self.stdout.write(f'Uncached breakdown runs {len(context.captured_queries)} queries')
+
+        if options['explain']:
+            for query in context.captured_queries:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query['sql']}")
+                    plan = '\n'.join(row[0] for row in cursor.fetchall())
+                self.stdout.write(f'\n{plan}\n')
+
+        measurements = {
+            'totals': lambda: compute_user_stats(user.pk),
+            'patients': lambda: patient_breakdown(user.pk),
+            'doctors': lambda: doctor_breakdown(user.pk),
+            'mappings': lambda: mapping_breakdown(user.pk),
+            'breakdown': lambda: compute_user_breakdown(user.pk),
+        }
+        timings = {}
+        for label, run in measurements.items():
+            timings[label] = measure(run, options['iterations'])
+            self.stdout.write(format_latency(label, latency_summary(timings[label])))
+
+        invalidate_user_stats(user.pk)
+        get_user_breakdown(user)
+        timings['served'] = measure(lambda: get_user_breakdown(user), options['iterations'])
+        self.stdout.write(format_latency('served', latency_summary(timings['served'])))
+
+        failures = []
+        budgets = (
+            ('Uncached breakdown', timings['breakdown'], options['budget']),
+            ('Served breakdown', timings['served'], options['served_budget']),
+        )
+        for label, measured, budget in budgets:
+            p95 = percentile(measured, 95)
+            if p95 > budget:
+                failures.append(f'{label} p95 {p95:.2f}ms exceeds the {budget:.0f}ms budget')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{label} p95 {p95:.2f}ms is within the {budget:.0f}ms budget'))
+        if failures:
+            raise CommandError('; '.join(failures))
@@ -0,0 +1,169 @@
+# Generated by Django 5.2.7 on 2026-10-17 08:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# (source table, rollup table, [(rollup column, expression over a source row)]).
+# Every rollup is keyed by its columns and holds the number of source rows per key.
+ROLLUPS = [
+    ('patients', 'patient_stats_rollups', [
+        ('user_id', 'created_by_id'),
+        ('city', 'city'),
+        ('gender', 'gender'),
+        ('blood_group', "COALESCE(blood_group, '')"),
+        ('is_active', 'is_active'),
+    ]),
+    ('doctors', 'doctor_stats_rollups', [
+        ('user_id', 'created_by_id'),
+        ('specialization', 'specialization'),
+        ('is_active', 'is_active'),
+        ('is_available', 'is_available'),
+    ]),
+    ('patient_doctor_mappings', 'mapping_stats_rollups', [
+        ('user_id', 'created_by_id'),
+        ('week', "date_trunc('week', assigned_date::timestamp)::date"),
+        ('status', 'status'),
+    ]),
+]
+
+
+def rollup_sql(source, rollup, columns):
+    """
+    SQL creating the statement-level triggers that keep `rollup` in step with
+    `source`, then filling it from the rows already there. Changed rows are
+    read from transition tables, so a bulk insert costs one grouped upsert.
+    Decrements only update existing buckets: a cascade deleting the user may
+    already have removed them, and re-creating one would violate its foreign key.
+    """
+    keys = ', '.join(name for name, _ in columns)
+    positions = ', '.join(str(index) for index in range(1, len(columns) + 1))
+    match = ' AND '.join(f'r.{name} = d.{name}' for name, _ in columns)
+
+    def selected(table, delta):
+        expressions = ', '.join(f'{expression} AS {name}' for name, expression in columns)
+        return f'SELECT {expressions}, {delta} AS delta FROM {table}'
+
+    def apply(rows):
+        return f"""
+            UPDATE {rollup} AS r SET records = r.records + d.records
+            FROM (
+                SELECT {keys}, sum(delta) AS records FROM ({rows}) AS s
+                GROUP BY {positions} HAVING sum(delta) < 0
+            ) AS d
+            WHERE {match};
+            INSERT INTO {rollup} AS r ({keys}, records)
+            SELECT {keys}, sum(delta) FROM ({rows}) AS s
+            GROUP BY {positions} HAVING sum(delta) > 0
+            ORDER BY {positions}
+            ON CONFLICT ({keys}) DO UPDATE SET records = r.records + EXCLUDED.records;"""
+
+    triggers = ''.join(
+        f"""
+        CREATE TRIGGER {rollup}_{event.lower()} AFTER {event} ON {source}
+        REFERENCING {transitions} FOR EACH STATEMENT EXECUTE FUNCTION {rollup}_apply();"""
+        for event, transitions in (
+            ('INSERT', 'NEW TABLE AS new_rows'),
+            ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+            ('DELETE', 'OLD TABLE AS old_rows'),
+        )
+    )
+    return f"""
+        CREATE FUNCTION {rollup}_apply() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN{apply(selected('new_rows', 1))}
+            ELSIF TG_OP = 'UPDATE' THEN{apply(selected('new_rows', 1) + ' UNION ALL ' + selected('old_rows', -1))}
+            ELSE{apply(selected('old_rows', -1))}
+            END IF;
+            RETURN NULL;
+        END
+        $$;
+        CREATE FUNCTION {rollup}_truncate() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM {rollup};
+            RETURN NULL;
+        END
+        $$;{triggers}
+        CREATE TRIGGER {rollup}_truncate AFTER TRUNCATE ON {source}
+        FOR EACH STATEMENT EXECUTE FUNCTION {rollup}_truncate();
+        INSERT INTO {rollup} ({keys}, records)
+        SELECT {keys}, sum(delta) FROM ({selected(source, 1)}) AS s GROUP BY {positions};
+    """
+
+
+def drop_rollup_sql(source, rollup, columns):
+    """SQL removing the triggers and functions created by rollup_sql."""
+    return f"""
+        DROP TRIGGER {rollup}_insert ON {source};
+        DROP TRIGGER {rollup}_update ON {source};
+        DROP TRIGGER {rollup}_delete ON {source};
+        DROP TRIGGER {rollup}_truncate ON {source};
+        DROP FUNCTION {rollup}_apply();
+        DROP FUNCTION {rollup}_truncate();
+    """
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('patients', '0003_patient_trigram_search'),
+        ('doctors', '0003_doctor_search_vector'),
+        ('mappings', '0002_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('specialization', models.CharField(max_length=50)),
+                ('is_active', models.BooleanField()),
+                ('is_available', models.BooleanField()),
+                ('records', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'doctor_stats_rollups',
+                'constraints': [models.UniqueConstraint(fields=('user', 'specialization', 'is_active', 'is_available'), name='doctor_stats_rollups_bucket_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MappingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('records', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'mapping_stats_rollups',
+                'constraints': [models.UniqueConstraint(fields=('user', 'week', 'status'), name='mapping_stats_rollups_bucket_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PatientRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=100)),
+                ('gender', models.CharField(max_length=1)),
+                ('blood_group', models.CharField(blank=True, max_length=3)),
+                ('is_active', models.BooleanField()),
+                ('records', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'patient_stats_rollups',
+                'constraints': [models.UniqueConstraint(fields=('user', 'city', 'gender', 'blood_group', 'is_active'), name='patient_stats_rollups_bucket_uniq')],
+            },
+        ),
+    ] + [
+        # Creating a trigger locks out writes to its table until the migration
+        # commits, so the backfill cannot miss or double count a concurrent row
+        migrations.RunSQL(rollup_sql(*rollup), drop_rollup_sql(*rollup))
+        for rollup in ROLLUPS
+    ]
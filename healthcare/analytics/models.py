@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.db import models
+
+
+class PatientRollup(models.Model):
+    """
+    Number of a user's patients per city, gender, blood group and active flag.
+    Maintained by database triggers on the patients table (see migration
+    0001_initial), so bulk_create, queryset updates and cascades are counted too.
+    Buckets that drop to zero are kept with 0 records.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    city = models.CharField(max_length=100)
+    gender = models.CharField(max_length=1)
+    # '' for patients without a blood group (NULL or blank)
+    blood_group = models.CharField(max_length=3, blank=True)
+    is_active = models.BooleanField()
+    records = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'patient_stats_rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'city', 'gender', 'blood_group', 'is_active'],
+                name='patient_stats_rollups_bucket_uniq'
+            ),
+        ]
+
+
+class DoctorRollup(models.Model):
+    """
+    Number of a user's doctors per specialization, active and available flag.
+    Maintained by database triggers on the doctors table.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    specialization = models.CharField(max_length=50)
+    is_active = models.BooleanField()
+    is_available = models.BooleanField()
+    records = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'doctor_stats_rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'specialization', 'is_active', 'is_available'],
+                name='doctor_stats_rollups_bucket_uniq'
+            ),
+        ]
+
+
+class MappingRollup(models.Model):
+    """
+    Number of a user's mappings per assignment week (Monday) and status.
+    Maintained by database triggers on the patient_doctor_mappings table.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    week = models.DateField()
+    status = models.CharField(max_length=20)
+    records = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'mapping_stats_rollups'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'week', 'status'],
+                name='mapping_stats_rollups_bucket_uniq'
+            ),
+        ]
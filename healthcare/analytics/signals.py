@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from patients.models import Patient
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+from .stats import invalidate_user_stats
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+@receiver(post_save, sender=PatientDoctorMapping)
+@receiver(post_delete, sender=PatientDoctorMapping)
+def invalidate_creator_stats(sender, instance, **kwargs):
+    """
+    Drop the cached statistics of the user who owns the changed row, once
+    the change is committed: a read racing the transaction may have cached
+    the old rows, and a rolled-back change needs no invalidation.
+    """
+    user_id = instance.created_by_id
+    transaction.on_commit(lambda: invalidate_user_stats(user_id))
@@ -0,0 +1,200 @@
+"""
+Per-user dashboard statistics.
+
+Statistics are read from the rollup tables (see analytics.models), which
+database triggers keep at one row per user and bucket, so their cost
+depends on the number of distinct buckets and not on the number of
+patients. Totals are summed in a single query; breakdowns with one
+grouped pass per rollup, with every fixed-choice bucket computed as a
+filtered Sum in that same pass. Both are cached per user and dropped
+whenever a patient, doctor or mapping of the user changes (see
+analytics.signals).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from patients.models import Patient
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+from monitoring.metrics import record_cache_lookup
+from .models import PatientRollup, DoctorRollup, MappingRollup
+
+User = get_user_model()
+
+
+def stats_cache_key(user_id):
+    """Return the cache key holding a user's statistics."""
+    return f'analytics:user-stats:{user_id}'
+
+
+def breakdown_cache_key(user_id):
+    """Return the cache key holding a user's dashboard breakdowns."""
+    return f'analytics:user-breakdown:{user_id}'
+
+
+def rollup_total(condition=None):
+    """Sum of the rollup buckets matching `condition` (all of them by default)."""
+    return Coalesce(Sum('records', filter=condition), 0)
+
+
+def total_for_user(rollup):
+    """Scalar subquery summing the rollup buckets of the outer user."""
+    return Coalesce(
+        Subquery(
+            rollup.objects.filter(user=OuterRef('pk'))
+            .order_by()
+            .values('user')
+            .annotate(total=Sum('records'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def compute_user_stats(user_id):
+    """Compute a user's statistics in a single query."""
+    return User.objects.filter(pk=user_id).values(
+        total_patients=total_for_user(PatientRollup),
+        total_doctors=total_for_user(DoctorRollup),
+        # Mappings are listed by patient owner; created_by always matches it
+        total_mappings=total_for_user(MappingRollup),
+    ).get()
+
+
+def get_user_stats(user):
+    """Return a user's statistics, from the cache when available."""
+    key = stats_cache_key(user.pk)
+    stats = cache.get(key)
+    record_cache_lookup('user_stats', stats is not None)
+
+    if stats is None:
+        stats = compute_user_stats(user.pk)
+        cache.set(key, stats, settings.USER_STATS_CACHE_TIMEOUT)
+
+    return stats
+
+
+def choice_totals(field, choices, prefix):
+    """
+    Filtered rollup sums for every choice of a field.
+    Aliases are positional because choice values ('AB-') are not valid SQL aliases.
+    """
+    return {
+        f'{prefix}_{index}': rollup_total(Q(**{field: value}))
+        for index, (value, _label) in enumerate(choices)
+    }
+
+
+def collect_choices(rows, choices, prefix):
+    """Sum the choice_totals columns of grouped rows into [{'code', 'label', 'total'}]."""
+    return [
+        {
+            'code': value,
+            'label': label,
+            'total': sum(row[f'{prefix}_{index}'] for row in rows),
+        }
+        for index, (value, label) in enumerate(choices)
+    ]
+
+
+def patient_breakdown(user_id):
+    """Patients by city, gender and blood group in one grouped pass."""
+    rows = list(
+        PatientRollup.objects.filter(user_id=user_id, records__gt=0)
+        .order_by()
+        .values('city')
+        .annotate(
+            total=rollup_total(),
+            active=rollup_total(Q(is_active=True)),
+            no_blood_group=rollup_total(Q(blood_group='')),
+            **choice_totals('gender', Patient.GENDER_CHOICES, 'gender'),
+            **choice_totals('blood_group', Patient.BLOOD_GROUP_CHOICES, 'blood_group'),
+        )
+    )
+
+    by_blood_group = collect_choices(rows, Patient.BLOOD_GROUP_CHOICES, 'blood_group')
+    by_blood_group.append({
+        'code': None,
+        'label': 'Unknown',
+        'total': sum(row['no_blood_group'] for row in rows),
+    })
+    by_city = sorted(
+        ({'city': row['city'], 'total': row['total']} for row in rows),
+        key=lambda item: (-item['total'], item['city'])
+    )
+
+    return {
+        'total': sum(row['total'] for row in rows),
+        'active': sum(row['active'] for row in rows),
+        'by_gender': collect_choices(rows, Patient.GENDER_CHOICES, 'gender'),
+        'by_blood_group': by_blood_group,
+        'by_city': by_city[:settings.ANALYTICS_TOP_CITIES],
+    }
+
+
+def doctor_breakdown(user_id):
+    """Doctors by specialization, with availability, in one aggregate pass."""
+    totals = DoctorRollup.objects.filter(user_id=user_id).aggregate(
+        total=rollup_total(),
+        available=rollup_total(Q(is_active=True, is_available=True)),
+        **choice_totals('specialization', Doctor.SPECIALIZATION_CHOICES, 'specialization'),
+    )
+
+    return {
+        'total': totals['total'],
+        'available': totals['available'],
+        'by_specialization': collect_choices([totals], Doctor.SPECIALIZATION_CHOICES, 'specialization'),
+    }
+
+
+def mapping_breakdown(user_id):
+    """Mappings by status and assignments per week in one grouped pass."""
+    rows = list(
+        MappingRollup.objects.filter(user_id=user_id, records__gt=0)
+        .order_by()
+        .values('week')
+        .annotate(
+            total=rollup_total(),
+            **choice_totals('status', PatientDoctorMapping.STATUS_CHOICES, 'status'),
+        )
+        .order_by('week')
+    )
+
+    return {
+        'total': sum(row['total'] for row in rows),
+        'by_status': collect_choices(rows, PatientDoctorMapping.STATUS_CHOICES, 'status'),
+        'per_week': [
+            {'week': row['week'], 'total': row['total']}
+            for row in rows[-settings.ANALYTICS_WEEKS:]
+        ],
+    }
+
+
+def compute_user_breakdown(user_id):
+    """Compute a user's dashboard breakdowns, one query per rollup."""
+    return {
+        'patients': patient_breakdown(user_id),
+        'doctors': doctor_breakdown(user_id),
+        'mappings': mapping_breakdown(user_id),
+    }
+
+
+def get_user_breakdown(user):
+    """Return a user's dashboard breakdowns, from the cache when available."""
+    key = breakdown_cache_key(user.pk)
+    breakdown = cache.get(key)
+    record_cache_lookup('user_breakdown', breakdown is not None)
+
+    if breakdown is None:
+        breakdown = compute_user_breakdown(user.pk)
+        cache.set(key, breakdown, settings.USER_STATS_CACHE_TIMEOUT)
+
+    return breakdown
+
+
+def invalidate_user_stats(user_id):
+    """Drop a user's cached statistics so the next read recomputes them."""
+    cache.delete_many([stats_cache_key(user_id), breakdown_cache_key(user_id)])
@@ -0,0 +1,124 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import PatientRollup, DoctorRollup, MappingRollup
+from patients.models import Patient
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+from healthcare.testing import (
+    QueryCountMixin,
+    create_user,
+    create_patient,
+    create_patients,
+    assign_doctors,
+    patient_data,
+)
+
+
+class UserStatsQueryCountTests(QueryCountMixin, APITestCase):
+    """Statistics take one query for the totals and one per table for the breakdowns."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.next_index = 0
+        self.grow()
+
+    def grow(self):
+        patient = create_patient(self.user, self.next_index)
+        create_patients(self.user, 5, start=self.next_index + 1)
+        assign_doctors(self.user, patient, 5, start=self.next_index)
+        self.next_index += 100
+
+    def test_uncached(self):
+        url = reverse('analytics:user-stats')
+        self.assertConstantQueries(lambda: self.client.get(url), self.grow, expected=4)
+
+    def test_cached_until_data_changes(self):
+        url = reverse('analytics:user-stats')
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data['data']['totals']['total_patients'], 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grow()
+        response = self.client.get(url)
+        self.assertEqual(response.data['data']['totals']['total_patients'], 12)
+        self.assertEqual(response.data['data']['mappings']['total'], 10)
+
+
+class RollupTests(TestCase):
+    """The trigger-maintained rollups always match a direct count of the rows."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.patient = create_patient(self.user)
+        assign_doctors(self.user, self.patient, 3)
+        create_patients(create_user('other@example.com'), 2, start=50)
+
+    def assertRollupMatches(self, rollup, keys, rows):
+        """`rows` are the rollup keys of every source row."""
+        actual = {
+            row[:-1]: row[-1]
+            for row in rollup.objects.filter(records__gt=0).values_list(*keys, 'records')
+        }
+        self.assertEqual(actual, dict(Counter(rows)))
+
+    def assertRollupsMatch(self):
+        self.assertRollupMatches(
+            PatientRollup,
+            ['user', 'city', 'gender', 'blood_group', 'is_active'],
+            ((p.created_by_id, p.city, p.gender, p.blood_group or '', p.is_active) for p in Patient.objects.all())
+        )
+        self.assertRollupMatches(
+            DoctorRollup,
+            ['user', 'specialization', 'is_active', 'is_available'],
+            ((d.created_by_id, d.specialization, d.is_active, d.is_available) for d in Doctor.objects.all())
+        )
+        self.assertRollupMatches(
+            MappingRollup,
+            ['user', 'week', 'status'],
+            (
+                (m.created_by_id, m.assigned_date - timedelta(days=m.assigned_date.weekday()), m.status)
+                for m in PatientDoctorMapping.objects.all()
+            )
+        )
+
+    def test_single_row_writes(self):
+        self.assertRollupsMatch()
+
+        self.patient.city = 'Nagpur'
+        self.patient.blood_group = None
+        self.patient.save()
+        Doctor.objects.first().delete()
+        self.assertRollupsMatch()
+
+    def test_bulk_writes(self):
+        Patient.objects.bulk_create(
+            Patient(created_by=self.user, **patient_data(100 + index, city='Nashik' if index % 2 else 'Pune'))
+            for index in range(10)
+        )
+        self.assertRollupsMatch()
+
+        Patient.objects.filter(city='Nashik').update(is_active=False, city='Mumbai')
+        PatientDoctorMapping.objects.update(status='COMPLETED')
+        Doctor.objects.update(is_available=False)
+        self.assertRollupsMatch()
+
+        Patient.objects.filter(city='Mumbai').delete()
+        self.assertRollupsMatch()
+
+    def test_cascading_user_delete(self):
+        user_id = self.user.pk
+        self.user.delete()
+
+        self.assertRollupsMatch()
+        self.assertFalse(PatientRollup.objects.filter(user_id=user_id).exists())
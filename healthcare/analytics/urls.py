@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import UserStatsView
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('', UserStatsView.as_view(), name='user-stats'),
+]
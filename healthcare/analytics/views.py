@@ -0,0 +1,39 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+
+from .stats import get_user_stats, get_user_breakdown
+from authentication.utils import success_response, error_response
+
+
+class UserStatsView(APIView):
+    """
+    API endpoint for dashboard statistics.
+    GET: Totals and breakdowns for the authenticated user's records.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """
+        Return patient, doctor and mapping totals together with
+        patients by gender/blood group/city, doctors by specialization,
+        mappings by status and assignments per week.
+        """
+        try:
+            data = {
+                'totals': get_user_stats(request.user),
+                **get_user_breakdown(request.user),
+            }
+            
+            return success_response(
+                data=data,
+                message="Statistics retrieved successfully",
+                status_code=status.HTTP_200_OK
+            )
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred while retrieving statistics",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
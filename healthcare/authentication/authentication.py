@@ -0,0 +1,138 @@
+"""
+Stateless JWT authentication.
+
+JWTAuthentication loads the user row on every request. For endpoints that
+only need to know who is calling, StatelessJWTAuthentication trusts the
+claims signed into the access token (see authentication.tokens) and
+returns a ClaimsUser. The full User is loaded only when a view needs more
+than the claims, and is then served from a small in-process LRU cache.
+
+Trusting the claims means a deactivated user keeps access until their
+access token expires (ACCESS_TOKEN_LIFETIME), and cached users may be up
+to JWT_USER_CACHE_TIMEOUT seconds stale in other processes.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from monitoring.metrics import record_cache_lookup
+from .tokens import USER_CLAIMS
+
+User = get_user_model()
+
+
+class UserCache:
+    """Thread-safe LRU of User instances whose entries expire after `timeout` seconds."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        """
+        Return a copy of the cached user, loading it on a miss.
+        Copies keep one request's changes from leaking into another.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(user_id)
+                user = entry[1]
+            else:
+                user = None
+
+        record_cache_lookup('jwt_user', user is not None)
+        if user is None:
+            user = User.objects.get(pk=user_id)
+            self.set(user, now)
+        return copy.copy(user)
+
+    def set(self, user, now=None):
+        expires = (now or time.monotonic()) + self.timeout
+        with self.lock:
+            self.entries[user.pk] = (expires, copy.copy(user))
+            self.entries.move_to_end(user.pk)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache(settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TIMEOUT)
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    User backed by the claims of a validated access token.
+
+    id, pk, is_active, is_staff, is_authenticated and truth testing are
+    answered from the token. Anything else, including filtering by or
+    assigning the user to a foreign key, loads the full User from user_cache.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        # The claim is a string; cache keys and comparisons use the pk type
+        user_id = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        # LazyObject forwards attribute assignment to the wrapped user
+        self.__dict__.update(token=token, user_id=user_id)
+        super().__init__(lambda: user_cache.get(user_id))
+
+    @property
+    def id(self):
+        return self.user_id
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def is_active(self):
+        return self.token['is_active']
+
+    @property
+    def is_staff(self):
+        return self.token['is_staff']
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return f'<ClaimsUser: {self.id}>'
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query.
+    Tokens issued before the claims were added fall back to loading the
+    user, through the cache.
+    """
+
+    def get_user(self, validated_token):
+        if not all(name in validated_token for name in (api_settings.USER_ID_CLAIM, *USER_CLAIMS)):
+            user = super().get_user(validated_token)
+            user_cache.set(user)
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not validated_token['is_active']:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        return ClaimsUser(validated_token)
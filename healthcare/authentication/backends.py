@@ -1,5 +1,8 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from .hashers import make_password, check_password
 
 User = get_user_model()
 
@@ -20,18 +23,23 @@ class EmailBackend(ModelBackend):
         if not identifier or not password:
             return None
         
-        try:
-            # Try to find user by email first
-            user = User.objects.get(email=identifier)
-        except User.DoesNotExist:
-            try:
-                # Fall back to username if email not found
-                user = User.objects.get(username=identifier)
-            except User.DoesNotExist:
-                return None
+        # Email (any case) and username in one query, served by the unique
+        # Upper(email) index and the username index. Both may match when one
+        # user's username is another user's email; the email match wins.
+        candidates = list(User.objects.filter(Q(email__iexact=identifier) | Q(username=identifier))[:2])
+        user = next(
+            (candidate for candidate in candidates if candidate.email.upper() == identifier.upper()),
+            candidates[0] if candidates else None
+        )
+        
+        if user is None:
+            # Hash the password anyway, so an unknown identifier takes as long
+            # to reject as a wrong password (see ModelBackend.authenticate)
+            make_password(password)
+            return None
         
-        # Check password
-        if user.check_password(password) and self.user_can_authenticate(user):
+        # Check password, rehashing it if the hasher settings changed
+        if check_password(user, password) and self.user_can_authenticate(user):
             return user
         
         return None
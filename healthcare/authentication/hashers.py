@@ -0,0 +1,96 @@
+"""
+Password hashers with settings-driven cost, and a bounded pool that runs
+the hashing.
+
+PASSWORD_HASHER picks the algorithm used for new hashes (see settings);
+the other hashers stay configured so existing hashes keep verifying.
+A hash made with another algorithm or cost is replaced on the user's next
+successful login.
+
+Hashing is CPU bound and the hash functions release the GIL. Running it
+in a pool of PASSWORD_HASH_WORKERS threads caps how many cores logins and
+registrations can occupy at once; requests beyond that wait up to
+PASSWORD_HASH_TIMEOUT seconds for a worker. Only the hashing runs in the
+pool, database work stays on the request thread and its connection.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS iterations."""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """scrypt with a PASSWORD_SCRYPT_WORK_FACTOR cost (N, a power of two)."""
+
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with PASSWORD_ARGON2_TIME_COST passes over PASSWORD_ARGON2_MEMORY_COST KiB."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+
+class HashingBusy(Exception):
+    """No hashing worker became free within PASSWORD_HASH_TIMEOUT."""
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    thread_name_prefix='password-hash'
+                )
+    return _executor
+
+
+def run_hashing(func, *args):
+    """Run func(*args) in the hashing pool and return its result."""
+    future = get_executor().submit(func, *args)
+    try:
+        return future.result(timeout=settings.PASSWORD_HASH_TIMEOUT)
+    except TimeoutError:
+        # Still queued: drop it. Already running: let it finish unobserved.
+        future.cancel()
+        raise HashingBusy('Password hashing is busy, try again shortly')
+
+
+def make_password(password):
+    """Hash a password with the preferred hasher."""
+    return run_hashing(hashers.make_password, password)
+
+
+def check_password(user, password):
+    """
+    Verify a user's password, upgrading an outdated hash on success.
+    Like User.check_password, but with the hashing done in the pool.
+    """
+    is_correct, must_update = run_hashing(hashers.verify_password, password, user.password)
+    if is_correct and must_update:
+        user.password = make_password(password)
+        user.save(update_fields=['password'])
+    return is_correct
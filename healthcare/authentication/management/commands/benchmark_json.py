@@ -0,0 +1,115 @@
+import io
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from authentication.parsers import ORJSONParser
+from authentication.renderers import ORJSONRenderer, orjson
+from patients.models import Patient
+from patients.serializers import PatientListSerializer
+from doctors.models import Doctor
+from doctors.serializers import DoctorListSerializer
+from mappings.models import PatientDoctorMapping
+from mappings.serializers import PatientDoctorMappingListSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Compare JSON rendering and parsing cost of the stdlib (DRF) and orjson
+    implementations on list pages shaped like the API responses.
+    Populate data first, e.g. with seed_healthcare.
+
+    Besides the serialized pages, a page of raw values() rows is measured,
+    where Decimal, date and datetime objects reach the encoder directly.
+
+    Example:
+        python manage.py benchmark_json --email seed0.user0@example.com --rows 100
+    """
+    help = 'Benchmark stdlib vs orjson JSON rendering and parsing on paged list responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='User whose patients and mappings are rendered')
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page')
+        parser.add_argument('--iterations', type=int, default=500, help='Renders and parses per page and implementation')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist")
+
+        if orjson is None:
+            self.stdout.write('orjson is not installed: ORJSONRenderer/ORJSONParser use the stdlib fallback')
+
+        rows = options['rows']
+        pages = {
+            'patients': PatientListSerializer(
+                Patient.objects.filter(created_by=user).order_by('-created_at', '-id')[:rows], many=True
+            ).data,
+            'doctors': DoctorListSerializer(Doctor.objects.order_by('-created_at', '-id')[:rows], many=True).data,
+            'mappings': PatientDoctorMappingListSerializer(
+                PatientDoctorMapping.objects.filter(created_by=user)
+                .select_related('patient', 'doctor').order_by('-created_at', '-id')[:rows],
+                many=True
+            ).data,
+            'doctor_values': list(Doctor.objects.order_by('-created_at', '-id').values(
+                'id', 'first_name', 'last_name', 'specialization', 'city', 'date_of_birth',
+                'consultation_fee', 'is_available', 'created_at', 'updated_at'
+            )[:rows]),
+        }
+
+        for name, data in pages.items():
+            if not data:
+                self.stdout.write(f'{name:<14} no rows, skipped')
+                continue
+
+            # Same envelope as the paginated list endpoints
+            page = {
+                'count': len(data),
+                'next': 'http://localhost:8000/api/?page=2',
+                'previous': None,
+                'results': {'success': True, 'message': 'Retrieved successfully', 'data': data},
+            }
+            self.compare(name, len(data), page, options['iterations'])
+
+    def compare(self, name, count, page, iterations):
+        stdlib_body = JSONRenderer().render(page)
+        orjson_body = ORJSONRenderer().render(page)
+        identical = 'identical' if stdlib_body == orjson_body else 'DIFFERENT'
+
+        render = {
+            'stdlib': self.measure(lambda: JSONRenderer().render(page), iterations),
+            'orjson': self.measure(lambda: ORJSONRenderer().render(page), iterations),
+        }
+        parse = {
+            'stdlib': self.measure(lambda: JSONParser().parse(io.BytesIO(stdlib_body)), iterations),
+            'orjson': self.measure(lambda: ORJSONParser().parse(io.BytesIO(stdlib_body)), iterations),
+        }
+
+        self.stdout.write(f'{name} ({count} rows, {len(stdlib_body)} bytes, output {identical}):')
+        for label, timings in (('render', render), ('parse', parse)):
+            stdlib, fast = timings['stdlib'], timings['orjson']
+            self.stdout.write(
+                f"  {label:<7} stdlib mean={stdlib['mean']:.1f}us p95={stdlib['p95']:.1f}us  "
+                f"orjson mean={fast['mean']:.1f}us p95={fast['p95']:.1f}us  "
+                f"speedup={stdlib['mean'] / fast['mean']:.1f}x"
+            )
+
+    def measure(self, operation, iterations):
+        """Mean and p95 of `operation` in microseconds."""
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            operation()
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        timings.sort()
+        return {
+            'mean': statistics.mean(timings),
+            'p95': timings[int(0.95 * (len(timings) - 1))],
+        }
@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    """
+    Delete expired outstanding refresh tokens and their blacklist entries.
+    A batched flushexpiredtokens: each batch is its own short transaction,
+    found through the expires_at index, so the job can run on a schedule
+    without long locks or one huge DELETE.
+
+    Example (cron, hourly):
+        0 * * * * python manage.py prune_expired_tokens --sleep 0.1
+    """
+    help = 'Delete expired outstanding and blacklisted JWT refresh tokens in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TOKEN_PRUNE_BATCH_SIZE,
+            help='Tokens deleted per transaction'
+        )
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        cutoff = aware_utcnow()
+        expired = OutstandingToken.objects.filter(expires_at__lte=cutoff).order_by('expires_at')
+
+        total = 0
+        while True:
+            with transaction.atomic():
+                ids = list(expired.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                # Cascades to the blacklist entries of these tokens
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            total += len(ids)
+            if len(ids) < batch_size:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(f'Deleted {total} expired tokens')
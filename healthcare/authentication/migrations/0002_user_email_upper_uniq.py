@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:09
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Refuse to add the constraint while emails differ only in case.
+    Which account to keep (and who owns its patients and doctors) is a
+    manual decision, so the duplicates are listed instead of merged.
+    """
+    User = apps.get_model('authentication', 'User')
+    duplicates = (
+        User.objects.order_by()
+        .annotate(email_upper=Upper('email'))
+        .values('email_upper')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+        .values_list('email_upper', flat=True)
+    )
+    conflicts = [
+        ', '.join(
+            f"{user.email} (id {user.pk})"
+            for user in User.objects.filter(email__iexact=email).order_by('pk')
+        )
+        for email in duplicates
+    ]
+    if conflicts:
+        raise RuntimeError(
+            "Cannot add users_email_upper_uniq: these users have emails that differ "
+            "only in case. Change or merge them, then migrate again.\n  "
+            + "\n  ".join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Upper('email'), name='users_email_upper_uniq', violation_error_message='A user with this email already exists.'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the expiry of outstanding refresh tokens, so prune_expired_tokens
+    finds expired rows without scanning the table. The table belongs to
+    rest_framework_simplejwt.token_blacklist, hence raw SQL.
+    """
+
+    dependencies = [
+        ('authentication', '0002_user_email_upper_uniq'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS token_blacklist_outstandingtoken_expires_at '
+            'ON token_blacklist_outstandingtoken (expires_at)',
+            reverse_sql='DROP INDEX IF EXISTS token_blacklist_outstandingtoken_expires_at',
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import EmailValidator
+from django.db.models.functions import Upper
 
 
 class User(AbstractUser):
@@ -27,6 +28,15 @@ class User(AbstractUser):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['-date_joined']
+        constraints = [
+            # Case-insensitive uniqueness; the index also serves email__iexact
+            # lookups, which compare UPPER() on both sides on PostgreSQL
+            models.UniqueConstraint(
+                Upper('email'),
+                name='users_email_upper_uniq',
+                violation_error_message='A user with this email already exists.',
+            ),
+        ]
     
     def __str__(self):
         return self.email
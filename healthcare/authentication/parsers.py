@@ -0,0 +1,31 @@
+"""
+JSON parser backed by orjson, falling back to DRF's stdlib parser when
+orjson is not installed or the body is not UTF-8.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer, orjson
+
+UTF8_NAMES = ('utf-8', 'utf8')
+
+
+class ORJSONParser(JSONParser):
+    """
+    Drop-in replacement for JSONParser. Like STRICT_JSON, NaN and infinity
+    are rejected.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower() not in UTF8_NAMES:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
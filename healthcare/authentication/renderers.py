@@ -0,0 +1,50 @@
+"""
+JSON renderer backed by orjson.
+
+orjson is optional: without it, or for requests it cannot render
+identically (indented output, ASCII-only output), rendering falls back
+to DRF's stdlib json implementation.
+"""
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Types orjson would format differently from DRF's encoder (datetime
+# precision and 'Z' suffix, dataclasses) are handed to `default`
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+) if orjson is not None else 0
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for JSONRenderer producing the same compact output.
+
+    Values orjson has no native encoding for (Decimal, lazy translation
+    strings, dates, ...) go through DRF's JSONEncoder. Unlike STRICT_JSON,
+    NaN and infinity are rendered as null instead of raising.
+    """
+
+    def __init__(self):
+        self.encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self.encoder.default, option=ORJSON_OPTIONS)
+
+        # Escape U+2028/U+2029 like JSONRenderer, keeping the output a strict JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
 
+from .hashers import make_password
+
 User = get_user_model()
 
 
@@ -29,7 +31,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def validate_email(self, value):
         """Validate email is unique and properly formatted."""
-        if User.objects.filter(email=value.lower()).exists():
+        if User.objects.filter(email__iexact=value).exists():
             raise serializers.ValidationError(
                 "A user with this email already exists."
             )
@@ -66,13 +68,14 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         # Remove password_confirm as it's not part of the model
         validated_data.pop('password_confirm')
         
-        # Create user with hashed password
-        user = User.objects.create_user(
-            username=validated_data['email'],  # Use email as username
-            email=validated_data['email'],
+        # Create user with a password hashed in the hashing pool
+        user = User(
+            username=User.normalize_username(validated_data['email']),  # Use email as username
+            email=User.objects.normalize_email(validated_data['email']),
             name=validated_data['name'],
-            password=validated_data['password']
+            password=make_password(validated_data['password'])
         )
+        user.save()
         return user
 
 
@@ -101,4 +104,11 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'name', 'email', 'date_joined']
-        read_only_fields = ['id', 'date_joined']
\ No newline at end of file
+        read_only_fields = ['id', 'date_joined']
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """
+    Serializer for token refresh and logout.
+    Takes the refresh token issued at login or by the last refresh.
+    """
+    refresh = serializers.CharField(required=True)
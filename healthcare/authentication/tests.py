@@ -1,3 +1,490 @@
-from django.test import TestCase
+import io
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import authenticate
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone as django_timezone
+from django.utils.http import urlencode
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .hashers import HashingBusy
+from .authentication import ClaimsUser, StatelessJWTAuthentication, user_cache
+from .models import User
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+
+from .throttling import LoginIPThrottle, LoginEmailThrottle
+from .tokens import ClaimsRefreshToken
+from doctors.models import Doctor
+from healthcare.testing import QueryCountMixin, create_user, create_patients, create_doctors, doctor_data
+
+
+class AuthenticationQueryCountTests(QueryCountMixin, APITestCase):
+    """Registration and login run a fixed number of queries whatever the number of users."""
+
+    password = 'Str0ng-pass!'
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(password=self.password)
+        self.next_index = 0
+
+    def grow(self):
+        for _ in range(5):
+            self.next_index += 1
+            create_user(f'user{self.next_index}@example.com')
+
+    def register(self):
+        self.next_index += 1
+        return self.client.post(reverse('authentication:register'), {
+            'name': 'New User',
+            'email': f'new{self.next_index}@example.com',
+            'password': self.password,
+            'password_confirm': self.password,
+        }, format='json')
+
+    def test_register(self):
+        self.assertConstantQueries(self.register, self.grow)
+
+    def test_login(self):
+        url = reverse('authentication:login')
+        credentials = {'email': self.user.email, 'password': self.password}
+        self.assertConstantQueries(lambda: self.client.post(url, credentials, format='json'), self.grow)
+
+    def test_failed_login(self):
+        url = reverse('authentication:login')
+        credentials = {'email': 'missing@example.com', 'password': self.password}
+
+        before, response = self.count_queries(lambda: self.client.post(url, credentials, format='json'))
+        self.assertEqual(response.status_code, 401)
+        self.grow()
+        after, response = self.count_queries(lambda: self.client.post(url, credentials, format='json'))
+        self.assertEqual(response.status_code, 401)
+
+        self.assertEqual(len(before), len(after))
+        # Email and username are looked up together
+        self.assertEqual(len(after), 1)
+
+    def test_token_authentication(self):
+        create_patients(self.user, 2)
+        login = self.client.post(
+            reverse('authentication:login'),
+            {'email': self.user.email, 'password': self.password},
+            format='json'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['data']['tokens']['access']}")
+        url = reverse('patients:patient-list-create')
+
+        # Only the user lookup is added to the two queries of the list itself
+        self.assertConstantQueries(lambda: self.client.get(url), self.grow, expected=3)
+
+
+class EmailBackendTests(TestCase):
+    """EmailBackend matches emails case-insensitively in a single query."""
+
+    password = 'Str0ng-pass!'
+
+    def setUp(self):
+        self.user = create_user('alice@example.com', password=self.password)
+
+    def test_email_is_case_insensitive(self):
+        self.assertEqual(authenticate(email='Alice@EXAMPLE.com', password=self.password), self.user)
+
+    def test_username_still_accepted(self):
+        self.user.username = 'alice'
+        self.user.save()
+
+        self.assertEqual(authenticate(username='alice', password=self.password), self.user)
+
+    def test_email_match_wins_over_username(self):
+        self.user.username = 'alice'
+        self.user.save()
+        create_user('bob@example.com', password=self.password, username='alice@example.com')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(authenticate(email='alice@example.com', password=self.password), self.user)
+
+    def test_unknown_email_still_hashes(self):
+        with mock.patch('authentication.backends.make_password') as make_password:
+            self.assertIsNone(authenticate(email='missing@example.com', password=self.password))
+
+        make_password.assert_called_once_with(self.password)
+
+    def test_email_unique_regardless_of_case(self):
+        with self.assertRaises(IntegrityError):
+            create_user('ALICE@example.com')
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHashingTests(APITestCase):
+    """Password hashes follow the hasher settings and are upgraded on login."""
+
+    password = 'Str0ng-pass!'
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(password=self.password)
+
+    def login(self, password=None):
+        return self.client.post(
+            reverse('authentication:login'),
+            {'email': self.user.email, 'password': password or self.password},
+            format='json'
+        )
+
+    def stored_hash(self):
+        return User.objects.values_list('password', flat=True).get(pk=self.user.pk)
+
+    def test_cost_change_rehashes_on_login(self):
+        self.assertTrue(self.stored_hash().startswith('pbkdf2_sha256$1000$'))
+
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login().status_code, 200)
+
+        self.assertTrue(self.stored_hash().startswith('pbkdf2_sha256$2000$'))
+
+    def test_algorithm_change_rehashes_on_login(self):
+        hashers = [
+            'authentication.hashers.ScryptPasswordHasher',
+            'authentication.hashers.PBKDF2PasswordHasher',
+        ]
+        with override_settings(PASSWORD_HASHERS=hashers, PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10):
+            self.assertEqual(self.login().status_code, 200)
+            self.assertTrue(self.stored_hash().startswith('scrypt$1024$'))
+            self.assertEqual(self.login().status_code, 200)
+
+    def test_wrong_password_keeps_hash(self):
+        original = self.stored_hash()
+
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login('Wr0ng-pass!').status_code, 401)
+
+        self.assertEqual(self.stored_hash(), original)
+
+    def test_register_hashes_with_preferred_hasher(self):
+        response = self.client.post(reverse('authentication:register'), {
+            'name': 'New User',
+            'email': 'New@Example.com',
+            'password': self.password,
+            'password_confirm': self.password,
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(email='new@example.com')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertTrue(user.check_password(self.password))
+
+    def test_busy_pool_returns_503(self):
+        with mock.patch('authentication.backends.check_password', side_effect=HashingBusy('busy')):
+            response = self.login()
+
+        self.assertEqual(response.status_code, 503)
+
+
+class LoginThrottleTests(APITestCase):
+    """Login attempts are limited per client IP and per email."""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('authentication:login')
+
+    def attempt(self, email, ip='10.0.0.1'):
+        return self.client.post(self.url, {'email': email, 'password': 'Wr0ng-pass!'}, format='json', REMOTE_ADDR=ip)
+
+    @mock.patch.object(LoginEmailThrottle, 'THROTTLE_RATES', {'login_email': '3/min'})
+    def test_email_bucket(self):
+        for index in range(3):
+            self.assertEqual(self.attempt('victim@example.com', ip=f'10.0.0.{index}').status_code, 401)
+
+        with mock.patch('authentication.backends.EmailBackend.authenticate') as authenticate:
+            response = self.attempt('Victim@Example.com', ip='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(authenticate.called)
+        self.assertEqual(response.data['success'], False)
+        self.assertTrue(1 <= int(response['Retry-After']) <= 20)
+
+        # Other accounts are unaffected
+        self.assertEqual(self.attempt('other@example.com').status_code, 401)
+
+    @mock.patch.object(LoginIPThrottle, 'THROTTLE_RATES', {'login_ip': '3/min'})
+    def test_ip_bucket(self):
+        for index in range(3):
+            self.assertEqual(self.attempt(f'user{index}@example.com').status_code, 401)
+
+        self.assertEqual(self.attempt('user9@example.com').status_code, 429)
+        self.assertEqual(self.attempt('user9@example.com', ip='10.0.0.2').status_code, 401)
+
+    @mock.patch.object(LoginIPThrottle, 'THROTTLE_RATES', {'login_ip': '1/min'})
+    @mock.patch.object(LoginEmailThrottle, 'THROTTLE_RATES', {'login_email': '2/min'})
+    def test_ip_refusal_spares_email_bucket(self):
+        self.attempt('victim@example.com')
+        for _ in range(3):
+            self.assertEqual(self.attempt('victim@example.com').status_code, 429)
+
+        # The account still has its second attempt from another client
+        self.assertEqual(self.attempt('victim@example.com', ip='10.0.0.2').status_code, 401)
+
+    @mock.patch.object(LoginIPThrottle, 'THROTTLE_RATES', {'login_ip': '2/min'})
+    def test_bucket_refills(self):
+        with mock.patch.object(LoginIPThrottle, 'timer', return_value=1000.0):
+            self.attempt('a@example.com')
+            self.attempt('b@example.com')
+            self.assertEqual(self.attempt('c@example.com').status_code, 429)
+
+        # One token is back after half the period
+        with mock.patch.object(LoginIPThrottle, 'timer', return_value=1030.0):
+            self.assertEqual(self.attempt('c@example.com').status_code, 401)
+            self.assertEqual(self.attempt('d@example.com').status_code, 429)
+
+
+class StatelessJWTAuthenticationTests(QueryCountMixin, APITestCase):
+    """Doctor endpoints trust the access token claims instead of loading the user."""
+
+    password = 'Str0ng-pass!'
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = create_user(password=self.password)
+        login = self.client.post(
+            reverse('authentication:login'),
+            {'email': self.user.email, 'password': self.password},
+            format='json'
+        )
+        self.access = login.data['data']['tokens']['access']
+
+    def authenticate(self, access):
+        request = mock.Mock(META={'HTTP_AUTHORIZATION': f'Bearer {access}'})
+        return StatelessJWTAuthentication().authenticate(request)[0]
+
+    def test_login_embeds_claims(self):
+        user = self.authenticate(self.access)
+
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual((user.id, user.is_active, user.is_staff), (self.user.id, True, False))
+
+    def test_doctor_endpoints_skip_user_query(self):
+        # Created by someone else, so only authentication could query this user
+        doctor = create_doctors(create_user('other@example.com'), 1)[0]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        user_lookup = f'"users"."id" = {self.user.id} '
+
+        for url in (reverse('doctors:doctor-list-create'), reverse('doctors:doctor-detail', args=[doctor.id])):
+            queries, response = self.count_queries(lambda: self.client.get(url))
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse([query for query in queries if user_lookup in query['sql']], url)
+
+    def test_create_assigns_full_user(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        data = {key: str(value) for key, value in doctor_data(0).items()}
+
+        response = self.client.post(reverse('doctors:doctor-list-create'), data, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Doctor.objects.get().created_by, self.user)
+
+    def test_full_user_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(self.access).email, self.user.email)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(self.access).name, self.user.name)
+
+    def test_user_change_drops_cached_user(self):
+        self.authenticate(self.access).email
+        User.objects.get(pk=self.user.pk).save()
+
+        with self.assertNumQueries(1):
+            self.authenticate(self.access).email
+
+    def test_inactive_claim_rejected(self):
+        refresh = ClaimsRefreshToken.for_user(self.user)
+        refresh['is_active'] = False
+        access = str(refresh.access_token)
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+    def test_token_without_claims_loads_user(self):
+        access = str(RefreshToken.for_user(self.user).access_token)
+
+        with self.assertNumQueries(1):
+            user = self.authenticate(access)
+        self.assertIsInstance(user, User)
+
+
+class TokenRefreshTests(APITestCase):
+    """Refresh tokens rotate, are blacklisted after use or logout, and expired ones are pruned."""
+
+    password = 'Str0ng-pass!'
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(password=self.password)
+        login = self.client.post(
+            reverse('authentication:login'),
+            {'email': self.user.email, 'password': self.password},
+            format='json'
+        )
+        self.refresh = login.data['data']['tokens']['refresh']
+
+    def post(self, name, refresh):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse(f'authentication:{name}'), {'refresh': refresh}, format='json')
+
+    def test_refresh_rotates(self):
+        response = self.post('refresh', self.refresh)
+
+        self.assertEqual(response.status_code, 200)
+        tokens = response.data['data']['tokens']
+        self.assertNotEqual(tokens['refresh'], self.refresh)
+        self.assertEqual(self.post('refresh', tokens['refresh']).status_code, 200)
+
+    def test_used_token_rejected_from_cache(self):
+        self.post('refresh', self.refresh)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.post('refresh', self.refresh)
+        self.assertEqual(response.status_code, 401)
+        # Only the view's savepoint, no table is read
+        self.assertFalse([query for query in context.captured_queries if 'SAVEPOINT' not in query['sql']])
+
+    def test_stale_cache_cannot_reuse_token(self):
+        self.post('refresh', self.refresh)
+        cache.clear()
+
+        self.assertEqual(self.post('refresh', self.refresh).status_code, 401)
+
+    def test_refresh_updates_claims(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+
+        access = self.post('refresh', self.refresh).data['data']['tokens']['access']
+
+        self.assertTrue(AccessToken(access)['is_staff'])
+
+    def test_inactive_user_cannot_refresh(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.post('refresh', self.refresh).status_code, 401)
+
+    def test_logout_blacklists(self):
+        self.assertEqual(self.post('logout', self.refresh).status_code, 200)
+
+        self.assertEqual(self.post('refresh', self.refresh).status_code, 401)
+        self.assertEqual(self.post('logout', self.refresh).status_code, 401)
+
+    def test_invalid_token(self):
+        self.assertEqual(self.post('refresh', 'not-a-token').status_code, 401)
+        self.assertEqual(self.client.post(reverse('authentication:refresh'), {}, format='json').status_code, 400)
+
+    def test_prune_expired_tokens(self):
+        self.post('logout', self.refresh)
+        OutstandingToken.objects.update(expires_at=django_timezone.now() - timedelta(seconds=1))
+        for _ in range(4):
+            ClaimsRefreshToken.for_user(self.user)
+
+        call_command('prune_expired_tokens', batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(OutstandingToken.objects.count(), 4)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class ORJSONTests(SimpleTestCase):
+    """The orjson renderer and parser behave like DRF's JSON renderer and parser."""
+
+    data = {
+        'count': 2,
+        'results': [
+            {
+                'fee': Decimal('1500.50'),
+                'born': date(1980, 5, 17),
+                'created_at': datetime(2024, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+                'name': 'Dr. Zoë Iyer\u2028',
+                'tags': ('a', 'b'),
+                1: None,
+            },
+        ],
+    }
+
+    def test_renders_like_json_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indented_output_falls_back(self):
+        rendered = ORJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_parses_like_json_parser(self):
+        body = JSONRenderer().render(self.data)
+
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+
+    def test_parse_error(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"a": NaN}'))
+
+    def test_stdlib_fallback_without_orjson(self):
+        body = JSONRenderer().render(self.data)
+
+        with mock.patch('authentication.renderers.orjson', None), mock.patch('authentication.parsers.orjson', None):
+            self.assertEqual(ORJSONRenderer().render(self.data), body)
+            self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+
+
+
+class ContentNegotiationTests(APITestCase):
+    """JSON goes through orjson while form, multipart and browsable API clients keep working."""
+
+    password = 'Str0ng-pass!'
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user(password=self.password)
+        self.credentials = {'email': self.user.email, 'password': self.password}
+
+    def test_json_login(self):
+        response = self.client.post(reverse('authentication:login'), self.credentials, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+
+    def test_form_login(self):
+        response = self.client.generic(
+            'POST',
+            reverse('authentication:login'),
+            urlencode(self.credentials),
+            content_type='application/x-www-form-urlencoded'
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_multipart_login(self):
+        response = self.client.post(reverse('authentication:login'), self.credentials, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_browsable_api(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('doctors:doctor-list-create'), HTTP_ACCEPT='text/html')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/html; charset=utf-8')
+        self.assertIn('Accept', response['Vary'])
+
+    def test_json_is_the_default(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('doctors:doctor-list-create'), HTTP_ACCEPT='*/*')
+
+        self.assertEqual(response['Content-Type'], 'application/json')
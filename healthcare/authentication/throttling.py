@@ -0,0 +1,94 @@
+"""
+Login throttles.
+
+Token buckets kept in the Django cache: a bucket holds up to N attempts
+and refills at N per period, as given by the DRF rate of its scope
+('login_ip' and 'login_email' in DEFAULT_THROTTLE_RATES). Unlike the
+sliding window of SimpleRateThrottle, a bucket stores two numbers however
+high the rate. Throttles run before the view, so rejected attempts never
+reach password hashing.
+
+Like SimpleRateThrottle, the read-modify-write of a bucket is not atomic:
+concurrent attempts may both take the last token. Buckets live in the
+default cache, so the limits only hold across workers with a shared cache
+backend; with the per-process default each worker has its own buckets.
+"""
+import hashlib
+
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+from monitoring.metrics import throttled_requests_total
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token bucket throttle; subclasses implement get_cache_key()."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, self.now))
+        refill = (self.now - updated) * self.num_requests / self.duration
+        self.tokens = min(self.num_requests, tokens + refill)
+
+        if self.tokens < 1:
+            throttled_requests_total.inc(scope=self.scope)
+            return False
+
+        # A bucket left alone for `duration` is full again, the same as no entry
+        self.cache.set(self.key, (self.tokens - 1, self.now), self.duration)
+        return True
+
+    def wait(self):
+        """Seconds until the next token."""
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """Login attempts per client IP (honours NUM_PROXIES like DRF's throttles)."""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    """
+    Login attempts per account, whatever IPs they come from.
+    Emails are hashed, keeping them out of the cache keys.
+    """
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class LoginThrottle(BaseThrottle):
+    """
+    Per-IP then per-email login buckets. DRF asks every throttle of a view
+    even after one refuses, so as separate throttles an attempt refused by
+    the IP bucket would still drain the account's bucket, letting one
+    client lock others out. Here the email bucket is only charged for
+    attempts the IP bucket lets through.
+    """
+    throttle_classes = (LoginIPThrottle, LoginEmailThrottle)
+
+    def allow_request(self, request, view):
+        for throttle_class in self.throttle_classes:
+            self.throttle = throttle_class()
+            if not self.throttle.allow_request(request, view):
+                return False
+        return True
+
+    def wait(self):
+        return self.throttle.wait()
@@ -0,0 +1,79 @@
+"""
+Refresh tokens carrying user claims, with a cache in front of the token
+blacklist.
+
+Refresh tokens are recorded as outstanding when issued and blacklisted
+when rotated or logged out (rest_framework_simplejwt.token_blacklist).
+Blacklist lookups go through the cache: a blacklisted token is cached
+until it expires, a token found not blacklisted for
+TOKEN_BLACKLIST_CACHE_TIMEOUT seconds. A stale "not blacklisted" entry
+never lets a token be used twice, because rotation and logout rely on
+blacklist() creating the blacklist row (see RefreshTokenView).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from monitoring.metrics import record_cache_lookup
+
+# User fields copied into issued tokens, read back by StatelessJWTAuthentication
+USER_CLAIMS = ('is_active', 'is_staff')
+
+
+def blacklist_cache_key(jti):
+    return f'token-blacklist:{jti}'
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token carrying USER_CLAIMS. Access tokens derived from it copy
+    the claims, so they can be trusted without loading the user.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_user_claims(user)
+        return token
+
+    def set_user_claims(self, user):
+        for name in USER_CLAIMS:
+            self[name] = getattr(user, name)
+
+    def seconds_to_expiry(self):
+        return max(1, int(self.payload['exp'] - time.time()))
+
+    def check_blacklist(self):
+        """Raise TokenError if this token is blacklisted, asking the cache first."""
+        jti = self.payload[api_settings.JTI_CLAIM]
+        key = blacklist_cache_key(jti)
+        blacklisted = cache.get(key)
+        record_cache_lookup('token_blacklist', blacklisted is not None)
+
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            timeout = self.seconds_to_expiry()
+            if not blacklisted:
+                timeout = min(timeout, settings.TOKEN_BLACKLIST_CACHE_TIMEOUT)
+            cache.set(key, blacklisted, timeout)
+
+        if blacklisted:
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """
+        Blacklist this token and return (BlacklistedToken, created).
+        `created` is False when it was already blacklisted, e.g. by a
+        concurrent request using the same token.
+        """
+        result = super().blacklist()
+        key, timeout = blacklist_cache_key(self.payload[api_settings.JTI_CLAIM]), self.seconds_to_expiry()
+        transaction.on_commit(lambda: cache.set(key, True, timeout))
+        return result
@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import UserRegistrationView, UserLoginView
+from .views import UserRegistrationView, UserLoginView, RefreshTokenView, LogoutView
 
 app_name = 'authentication'
 
 urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='register'),
     path('login/', UserLoginView.as_view(), name='login'),
+    path('refresh/', RefreshTokenView.as_view(), name='refresh'),
+    path('logout/', LogoutView.as_view(), name='logout'),
 ]
\ No newline at end of file
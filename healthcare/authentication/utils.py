@@ -1,6 +1,40 @@
+import codecs
+import csv
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
+
+
+# Content types and file extensions accepted by the bulk import endpoints
+IMPORT_CONTENT_TYPES = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+IMPORT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+# Response content types for the export endpoints
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
 
 
 def custom_exception_handler(exc, context):
@@ -62,4 +96,404 @@ def error_response(message="An error occurred", details=None, status_code=status
     if details:
         response_data['error']['details'] = details
     
-    return Response(response_data, status=status_code)
\ No newline at end of file
+    return Response(response_data, status=status_code)
+
+
+def updated_at_etag(updated_at):
+    """
+    Strong ETag of a row version: its updated_at in microseconds.
+    """
+    micros = (updated_at - datetime(1970, 1, 1, tzinfo=timezone.utc)) // timedelta(microseconds=1)
+    return f'"{micros:x}"'
+
+
+def set_validators(response, updated_at):
+    """
+    Add ETag and Last-Modified of a row to a detail response.
+    """
+    response['ETag'] = updated_at_etag(updated_at)
+    response['Last-Modified'] = http_date(updated_at.timestamp())
+    # Authenticated data: never shared caches, and clients revalidate every time
+    response['Cache-Control'] = 'private, no-cache'
+    # The ETag is the same for the JSON and browsable API renderings
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def conditional_get(request, queryset, field='updated_at'):
+    """
+    Answer a conditional GET from the updated_at (or another timestamp
+    `field`) of the single row in queryset.
+    
+    Returns a 304 response when the client's copy is current, else None.
+    Only conditional requests run the extra updated_at query, so the full
+    row is neither loaded nor serialized for a 304.
+    """
+    if 'If-None-Match' not in request.headers and 'If-Modified-Since' not in request.headers:
+        return None
+    
+    updated_at = queryset.values_list(field, flat=True).first()
+    if updated_at is None:
+        return None
+    return not_modified(request, updated_at)
+
+
+def not_modified(request, updated_at):
+    """
+    Return a 304 response when the client's copy of a row last updated at
+    updated_at is current, else None. If-None-Match takes precedence over
+    If-Modified-Since.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if_modified_since = request.headers.get('If-Modified-Since')
+    
+    if if_none_match is not None:
+        # Weak comparison
+        etags = [etag.removeprefix('W/') for etag in parse_etags(if_none_match)]
+        current = '*' in etags or updated_at_etag(updated_at) in etags
+    elif if_modified_since is not None:
+        since = parse_http_date_safe(if_modified_since)
+        current = since is not None and int(updated_at.timestamp()) <= since
+    else:
+        current = False
+    
+    if not current:
+        return None
+    return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), updated_at)
+
+
+def has_if_match(request):
+    """
+    True when an update is conditional on the client's version of the row.
+    """
+    return 'If-Match' in request.headers
+
+
+def precondition_failed(request, updated_at):
+    """
+    Return a 412 response when If-Match does not list the row's current ETag,
+    else None. Uses strong comparison, so weak ETags never match.
+    """
+    if not has_if_match(request):
+        return None
+    
+    etags = parse_etags(request.headers['If-Match'])
+    if '*' in etags or updated_at_etag(updated_at) in etags:
+        return None
+    
+    return set_validators(
+        error_response(
+            message="Precondition failed",
+            details="The record was modified after you retrieved it",
+            status_code=status.HTTP_412_PRECONDITION_FAILED
+        ),
+        updated_at
+    )
+
+
+class FieldsetError(ValueError):
+    """Raised when fields= or exclude= names a field the response does not have."""
+
+
+class SparseFieldset:
+    """
+    Response fields chosen with the `fields` and `exclude` query parameters,
+    e.g. ?fields=id,full_name,phone or ?exclude=medical_history,allergies.
+    
+    Serializers using SparseFieldsetMixin drop the other fields when given
+    the fieldset, and only() narrows the queryset to the columns the kept
+    fields read, so unused (often TOASTed) text columns are never fetched.
+    """
+    
+    def __init__(self, fields=None, exclude=None):
+        self.fields = set(fields) if fields else None
+        self.exclude = set(exclude or ())
+    
+    def __bool__(self):
+        return self.fields is not None or bool(self.exclude)
+    
+    @classmethod
+    def from_request(cls, request, serializer_class):
+        """
+        Read the query parameters, checked against serializer_class's fields.
+        Raises FieldsetError for unknown names.
+        """
+        def names(param):
+            return [name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()]
+        
+        fieldset = cls(names('fields'), names('exclude'))
+        
+        available = serializer_class.Meta.fields
+        unknown = ((fieldset.fields or set()) | fieldset.exclude) - set(available)
+        if unknown:
+            raise FieldsetError(
+                f"Unknown field(s): {', '.join(sorted(unknown))}. Available fields: {', '.join(available)}"
+            )
+        return fieldset
+    
+    def select(self, names):
+        """The given field names that are kept, in their original order."""
+        return [
+            name for name in names
+            if (self.fields is None or name in self.fields) and name not in self.exclude
+        ]
+    
+    def normalized(self):
+        """Canonical form, for cache keys."""
+        return {
+            'fields': sorted(self.fields) if self.fields is not None else None,
+            'exclude': sorted(self.exclude),
+        }
+    
+    def only(self, queryset, serializer_class, extra=()):
+        """
+        Load only the columns read by the kept fields of serializer_class, plus
+        `extra` field paths the view itself needs. Related rows are joined only
+        when a kept field reads them. Unchanged without a selection, or when a
+        field's source cannot be mapped to columns.
+        """
+        if not self:
+            return queryset
+        
+        columns = serializer_columns(serializer_class, tuple(self.select(serializer_class.Meta.fields)))
+        if columns is None:
+            return queryset
+        
+        columns = [*columns, *extra]
+        relations = sorted({column.rsplit('__', 1)[0] for column in columns if '__' in column})
+        return queryset.select_related(None).select_related(*relations).only(*columns)
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin: pass `fieldset=SparseFieldset(...)` to keep only the
+    selected fields in the output. Works with many=True as well.
+    """
+    
+    def __init__(self, *args, fieldset=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fieldset:
+            kept = set(fieldset.select(self.fields))
+            for name in list(self.fields):
+                if name not in kept:
+                    del self.fields[name]
+
+
+@lru_cache(maxsize=None)
+def serializer_columns(serializer_class, names):
+    """
+    Model field paths, for QuerySet.only(), read by the named fields of a
+    model serializer. None when a field's source is not a model field, a
+    get_FOO_display method or a property listed in the model's
+    `property_sources`.
+    """
+    serializer = serializer_class()
+    columns = []
+    
+    for name in names:
+        field = serializer.fields[name]
+        if isinstance(field, serializers.BaseSerializer):
+            nested = serializer_columns(type(field), tuple(field.fields))
+            if nested is None:
+                return None
+            columns.extend(f'{field.source}__{column}' for column in nested)
+            continue
+        
+        source = source_columns(serializer_class.Meta.model, field.source_attrs)
+        if source is None:
+            return None
+        columns.extend(source)
+    
+    return list(dict.fromkeys(columns))
+
+
+def source_columns(model, attrs):
+    """Model field paths read by following a serializer field's source attributes."""
+    path = []
+    
+    for index, attr in enumerate(attrs):
+        last = index == len(attrs) - 1
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            field = None
+        
+        if field is not None and field.concrete:
+            if field.is_relation and not last:
+                path.append(attr)
+                model = field.related_model
+                continue
+            return ['__'.join(path + [attr])]
+        
+        if not last:
+            return None
+        if attr.startswith('get_') and attr.endswith('_display'):
+            return ['__'.join(path + [attr[len('get_'):-len('_display')]])]
+        if attr in getattr(model, 'property_sources', {}):
+            return ['__'.join(path + [column]) for column in model.property_sources[attr]]
+        return None
+    
+    return None
+
+
+class ImportFormatError(Exception):
+    """Raised when a bulk import body cannot be read as CSV or NDJSON."""
+
+
+class ImportReadError(Exception):
+    """Raised when a bulk import body stops being readable partway through."""
+    
+    def __init__(self, row, line, message):
+        super().__init__(message)
+        self.row = row
+        self.line = line
+
+
+def get_import_batch_size(request):
+    """
+    Return the bulk import batch size for a request.
+    Clients may lower or raise it with ?batch_size=, capped by settings.
+    """
+    batch_size = request.query_params.get('batch_size')
+    try:
+        batch_size = int(batch_size) if batch_size else settings.BULK_IMPORT_BATCH_SIZE
+    except ValueError:
+        batch_size = settings.BULK_IMPORT_BATCH_SIZE
+    return max(1, min(batch_size, settings.BULK_IMPORT_MAX_BATCH_SIZE))
+
+
+def get_import_source(request, file_field='file'):
+    """
+    Return (format, lines) for a bulk import request.
+    Accepts a multipart upload in `file_field` or a raw CSV/NDJSON body.
+    Lines are read lazily from the upload or the request stream,
+    so the body is never held in memory as a whole.
+    """
+    content_type = request.content_type.split(';')[0].strip().lower()
+    
+    if content_type == 'multipart/form-data':
+        upload = request.FILES.get(file_field)
+        if upload is None:
+            raise ImportFormatError(f"No file uploaded in the '{file_field}' field.")
+        extension = os.path.splitext(upload.name)[1].lower()
+        import_format = IMPORT_EXTENSIONS.get(extension) or IMPORT_CONTENT_TYPES.get(upload.content_type)
+        lines = upload
+    else:
+        import_format = IMPORT_CONTENT_TYPES.get(content_type)
+        lines = request.stream or []
+    
+    if import_format is None:
+        raise ImportFormatError(
+            "Upload a CSV or NDJSON body (text/csv or application/x-ndjson)."
+        )
+    
+    return import_format, lines
+
+
+def iter_import_rows(import_format, lines):
+    """
+    Yield (row_number, data, errors) for each record of a CSV or NDJSON body.
+    `errors` is set instead of `data` when a record cannot be parsed.
+    Empty CSV cells are dropped so model defaults apply.
+    Raises ImportReadError, with the failing row and line, if the body stops
+    decoding as UTF-8 or parsing as CSV partway through.
+    """
+    line_number = 0
+    row_number = 0
+    
+    def text_lines():
+        nonlocal line_number
+        for text in codecs.iterdecode(lines, 'utf-8-sig'):
+            line_number += 1
+            yield text
+    
+    try:
+        if import_format == 'csv':
+            for row in csv.DictReader(text_lines()):
+                row_number += 1
+                data = {key: value for key, value in row.items() if key and value not in ('', None)}
+                yield row_number, data, None
+            return
+        
+        for line in text_lines():
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                data = json.loads(line)
+            except ValueError:
+                yield row_number, None, {'non_field_errors': ['Invalid JSON.']}
+                continue
+            if not isinstance(data, dict):
+                yield row_number, None, {'non_field_errors': ['Each line must be a JSON object.']}
+                continue
+            yield row_number, data, None
+    
+    except UnicodeDecodeError as e:
+        # The undecodable line was never handed out, so it is the next one
+        raise ImportReadError(row_number + 1, line_number + 1, str(e)) from e
+    except csv.Error as e:
+        raise ImportReadError(row_number + 1, line_number, str(e)) from e
+
+
+def chunked(iterable, size):
+    """
+    Yield lists of up to `size` items from an iterable.
+    If the iterable raises, the items read before the error are yielded
+    first and the error is raised on the next iteration.
+    """
+    chunk = []
+    try:
+        for item in iterable:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    except Exception:
+        if chunk:
+            yield chunk
+        raise
+    if chunk:
+        yield chunk
+
+
+class Echo:
+    """File-like object that returns what is written, for streaming csv.writer output."""
+    
+    def write(self, value):
+        return value
+
+
+def stream_export(queryset, fields, export_format, filename):
+    """
+    Stream a queryset as a CSV or NDJSON download.
+    Rows are projected with .values() and read through .iterator(),
+    which uses a server-side cursor on PostgreSQL, so memory use stays
+    constant however many rows are exported.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    rows = queryset.values(*fields).iterator(chunk_size=chunk_size)
+    
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        header = writer.writerow(fields)
+        
+        def format_row(row):
+            return writer.writerow([row[field] for field in fields])
+    else:
+        encoder = DjangoJSONEncoder()
+        header = ''
+        
+        def format_row(row):
+            return encoder.encode(row) + '\n'
+    
+    def content():
+        # Send one chunk per cursor fetch instead of one per row
+        if header:
+            yield header
+        for chunk in chunked(rows, chunk_size):
+            yield ''.join(format_row(row) for row in chunk)
+    
+    response = StreamingHttpResponse(content(), content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
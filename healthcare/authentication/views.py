@@ -1,16 +1,24 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
-from django.db import IntegrityError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from django.contrib.auth import authenticate, get_user_model
+from django.db import IntegrityError, transaction
 
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
-    UserSerializer
+    UserSerializer,
+    RefreshTokenSerializer
 )
+from .hashers import HashingBusy
+from .throttling import LoginThrottle
+from .tokens import ClaimsRefreshToken
 from .utils import success_response, error_response
+from monitoring.metrics import login_attempts_total
+
+User = get_user_model()
 
 
 class UserRegistrationView(APIView):
@@ -39,7 +47,7 @@ class UserRegistrationView(APIView):
                 user = serializer.save()
                 
                 # Generate JWT tokens
-                refresh = RefreshToken.for_user(user)
+                refresh = ClaimsRefreshToken.for_user(user)
                 
                 response_data = {
                     'user': UserSerializer(user).data,
@@ -67,6 +75,13 @@ class UserRegistrationView(APIView):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
+        except HashingBusy as e:
+            return error_response(
+                message="Service busy",
+                details=str(e),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
         except Exception as e:
             return error_response(
                 message="An error occurred during registration",
@@ -79,8 +94,12 @@ class UserLoginView(APIView):
     """
     API endpoint for user login.
     POST: Authenticate user and return JWT tokens.
+    
+    Attempts are throttled per client IP and per email; excess attempts
+    get 429 with Retry-After before any password is checked.
     """
     permission_classes = [AllowAny]
+    throttle_classes = [LoginThrottle]
     
     def post(self, request):
         """
@@ -96,6 +115,7 @@ class UserLoginView(APIView):
             serializer = UserLoginSerializer(data=request.data)
             
             if not serializer.is_valid():
+                login_attempts_total.inc(result='invalid_request')
                 return error_response(
                     message="Validation failed",
                     details=serializer.errors,
@@ -113,6 +133,7 @@ class UserLoginView(APIView):
             )
             
             if user is None:
+                login_attempts_total.inc(result='invalid_credentials')
                 return error_response(
                     message="Invalid credentials",
                     details="The email or password you entered is incorrect",
@@ -120,6 +141,7 @@ class UserLoginView(APIView):
                 )
             
             if not user.is_active:
+                login_attempts_total.inc(result='disabled')
                 return error_response(
                     message="Account disabled",
                     details="This account has been disabled",
@@ -127,7 +149,7 @@ class UserLoginView(APIView):
                 )
             
             # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             
             response_data = {
                 'user': UserSerializer(user).data,
@@ -137,15 +159,159 @@ class UserLoginView(APIView):
                 }
             }
             
+            login_attempts_total.inc(result='success')
             return success_response(
                 data=response_data,
                 message="Login successful",
                 status_code=status.HTTP_200_OK
             )
         
+        except HashingBusy as e:
+            login_attempts_total.inc(result='busy')
+            return error_response(
+                message="Service busy",
+                details=str(e),
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        
         except Exception as e:
+            login_attempts_total.inc(result='error')
             return error_response(
                 message="An error occurred during login",
                 details=str(e),
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+class RefreshTokenView(APIView):
+    """
+    API endpoint for refreshing JWT tokens.
+    POST: Exchange a refresh token for a new access token.
+    
+    With ROTATE_REFRESH_TOKENS a new refresh token is returned too, and with
+    BLACKLIST_AFTER_ROTATION the old one is blacklisted. Claims in the new
+    tokens are taken from the user's current state.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    
+    def post(self, request):
+        """
+        Refresh the tokens.
+        
+        Request body:
+        {
+            "refresh": "eyJ0eXAiOiJKV1QiLCJhbGc..."
+        }
+        """
+        try:
+            serializer = RefreshTokenSerializer(data=request.data)
+            
+            if not serializer.is_valid():
+                return error_response(
+                    message="Validation failed",
+                    details=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            
+            with transaction.atomic():
+                refresh = ClaimsRefreshToken(serializer.validated_data['refresh'])
+                
+                user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).first()
+                if user is None or not user.is_active:
+                    return error_response(
+                        message="Account disabled",
+                        details="No active account found for the given token",
+                        status_code=status.HTTP_401_UNAUTHORIZED
+                    )
+                
+                if api_settings.ROTATE_REFRESH_TOKENS:
+                    if api_settings.BLACKLIST_AFTER_ROTATION:
+                        # Only the request that blacklists the token may rotate it,
+                        # so a token replayed concurrently is refused
+                        _, created = refresh.blacklist()
+                        if not created:
+                            raise TokenError("Token is blacklisted")
+                    
+                    refresh.set_jti()
+                    refresh.set_exp()
+                    refresh.set_iat()
+                
+                refresh.set_user_claims(user)
+                
+                tokens = {'access': str(refresh.access_token)}
+                if api_settings.ROTATE_REFRESH_TOKENS:
+                    refresh.outstand()
+                    tokens['refresh'] = str(refresh)
+            
+            return success_response(
+                data={'tokens': tokens},
+                message="Token refreshed successfully",
+                status_code=status.HTTP_200_OK
+            )
+        
+        except TokenError as e:
+            return error_response(
+                message="Invalid token",
+                details=str(e),
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred during token refresh",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class LogoutView(APIView):
+    """
+    API endpoint for logging out.
+    POST: Blacklist a refresh token so it can no longer be refreshed.
+    
+    Access tokens already issued stay valid until they expire
+    (ACCESS_TOKEN_LIFETIME).
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    
+    def post(self, request):
+        """
+        Log out by blacklisting the refresh token.
+        
+        Request body:
+        {
+            "refresh": "eyJ0eXAiOiJKV1QiLCJhbGc..."
+        }
+        """
+        try:
+            serializer = RefreshTokenSerializer(data=request.data)
+            
+            if not serializer.is_valid():
+                return error_response(
+                    message="Validation failed",
+                    details=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
+                )
+            
+            ClaimsRefreshToken(serializer.validated_data['refresh']).blacklist()
+            
+            return success_response(
+                message="Logged out successfully",
+                status_code=status.HTTP_200_OK
+            )
+        
+        except TokenError as e:
+            return error_response(
+                message="Invalid token",
+                details=str(e),
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred during logout",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DoctorsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'doctors'
+    
+    def ready(self):
+        """Connect the doctor list cache invalidation signals."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,111 @@
+"""
+Cached doctor list responses.
+
+The doctor directory is shared by every user, so a list response depends
+only on its query parameters. Responses are cached under a key built from
+the normalized parameters and a version stamp. Saving or deleting any
+doctor bumps the stamp (see doctors.signals), which orphans every cached
+page at once; orphaned pages expire after DOCTOR_LIST_CACHE_TIMEOUT.
+The same stamp and parameters make up the ETag, so If-None-Match is
+answered without reading the cached body.
+
+Doctor detail responses are cached under the same version stamp, keyed by
+doctor id and field selection. They keep the updated_at based validators
+of the detail endpoint, taken from the cached entry.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+
+LIST_VERSION_KEY = 'doctors:list-version'
+
+# Query parameters read by DoctorListCreateView.get; anything else is ignored
+BOOLEAN_PARAMETERS = ('is_active', 'is_available')
+LOWERCASE_PARAMETERS = ('specialization', 'city')
+# Compared case-sensitively by the view (pagination=cursor), so kept as sent
+RAW_PARAMETERS = ('pagination', 'page', 'page_size', 'cursor')
+
+
+def get_list_version():
+    """Return the current doctor list version, creating it if needed."""
+    version = cache.get(LIST_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost stamp never brings back an old version
+        version = time.time_ns()
+        if not cache.add(LIST_VERSION_KEY, version, None):
+            version = cache.get(LIST_VERSION_KEY, version)
+    return version
+
+
+def bump_list_version():
+    """Invalidate every cached doctor list page and detail response."""
+    try:
+        cache.incr(LIST_VERSION_KEY)
+    except ValueError:
+        cache.set(LIST_VERSION_KEY, time.time_ns(), None)
+
+
+def normalized_list_params(query_params):
+    """
+    Reduce list query parameters to what changes the response, so that
+    equivalent requests (reordered, different case, ignored values) share a key.
+    Mirrors how DoctorListCreateView.get interprets each parameter.
+    """
+    params = {}
+
+    for name in BOOLEAN_PARAMETERS:
+        value = query_params.get(name)
+        if value is not None:
+            params[name] = value.lower() == 'true'
+
+    for name in LOWERCASE_PARAMETERS:
+        value = query_params.get(name, '').strip().lower()
+        if value:
+            params[name] = value
+
+    search = ' '.join(query_params.get('search', '').lower().split())
+    if search:
+        params['search'] = search
+
+    for name, cast in (('min_experience', int), ('max_fee', float)):
+        try:
+            params[name] = cast(query_params.get(name, ''))
+        except ValueError:
+            pass
+
+    for name in RAW_PARAMETERS:
+        value = query_params.get(name)
+        if value:
+            params[name] = value
+
+    for name in ('fields', 'exclude'):
+        names = sorted({item.strip() for item in query_params.get(name, '').split(',') if item.strip()})
+        if names:
+            params[name] = names
+
+    return params
+
+
+def doctor_list_cache(request):
+    """
+    Return (cache key, ETag) of a doctor list request.
+    Next/previous links are absolute, so the base URL is part of the key.
+    """
+    document = json.dumps(
+        [request.build_absolute_uri(request.path), normalized_list_params(request.query_params)],
+        sort_keys=True
+    )
+    digest = hashlib.sha256(document.encode()).hexdigest()[:32]
+    version = get_list_version()
+
+    return f'doctors:list:{version}:{digest}', f'"{version:x}-{digest}"'
+
+
+def doctor_detail_cache_key(doctor_id, fieldset):
+    """Return the cache key of a doctor detail response with the given SparseFieldset."""
+    document = json.dumps(fieldset.normalized(), sort_keys=True)
+    digest = hashlib.sha256(document.encode()).hexdigest()[:16]
+
+    return f'doctors:detail:{get_list_version()}:{doctor_id}:{digest}'
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['created_at', 'id'], name='doctors_created_25e3ab_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+def populate_search_vector(apps, schema_editor):
+    """Backfill the search document for existing doctors."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    from doctors.search import DOCTOR_SEARCH_VECTOR
+    Doctor = apps.get_model('doctors', 'Doctor')
+    Doctor.objects.update(search_vector=DOCTOR_SEARCH_VECTOR)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0002_keyset_pagination_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='doctors_search__a76fde_gin'),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from datetime import date
 
+from .search import refresh_search_vector
+
 
 class Doctor(models.Model):
     """
@@ -136,6 +140,9 @@ class Doctor(models.Model):
         help_text="Currently accepting new patients"
     )
     
+    # Full-text search document, maintained on save (see doctors.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'doctors'
         verbose_name = 'Doctor'
@@ -146,11 +153,20 @@ class Doctor(models.Model):
             models.Index(fields=['city', 'specialization']),
             models.Index(fields=['email']),
             models.Index(fields=['license_number']),
+            models.Index(fields=['created_at', 'id']),
+            GinIndex(fields=['search_vector']),
         ]
     
     def __str__(self):
         return f"Dr. {self.first_name} {self.last_name} - {self.get_specialization_display()}"
     
+    # Columns read by each property, for sparse fieldsets (see SparseFieldset.only)
+    property_sources = {
+        'full_name': ['first_name', 'last_name'],
+        'age': ['date_of_birth'],
+        'full_address': ['clinic_address', 'city', 'state', 'postal_code', 'country'],
+    }
+    
     @property
     def full_name(self):
         """Return doctor's full name with title."""
@@ -208,4 +224,6 @@ class Doctor(models.Model):
         self.full_clean()
         # Convert license number to uppercase
         self.license_number = self.license_number.upper()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+        # Keep the full-text search document in sync with the saved fields
+        refresh_search_vector(Doctor.objects.filter(pk=self.pk))
\ No newline at end of file
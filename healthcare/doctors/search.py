@@ -0,0 +1,72 @@
+"""
+Full-text search for the doctor directory.
+
+On PostgreSQL, doctors are matched against the maintained `search_vector`
+column (GIN indexed) with prefix matching and ranked results.
+Other database backends fall back to the original icontains filters.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Q
+
+
+SEARCH_CONFIG = 'english'
+
+# Weighted document used to populate Doctor.search_vector.
+# Names and specialization rank above qualification/city, clinic name last.
+DOCTOR_SEARCH_VECTOR = (
+    SearchVector('first_name', 'last_name', weight='A', config=SEARCH_CONFIG) +
+    SearchVector('specialization', weight='A', config=SEARCH_CONFIG) +
+    SearchVector('qualification', 'city', weight='B', config=SEARCH_CONFIG) +
+    SearchVector('clinic_name', weight='C', config=SEARCH_CONFIG)
+)
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def uses_full_text_search():
+    """Return True when the database supports the tsvector search path."""
+    return connection.vendor == 'postgresql'
+
+
+def build_prefix_query(search):
+    """
+    Build a prefix-matching tsquery from free text.
+    'card mum' becomes 'card:* & mum:*' so partial words match while typing.
+    Returns None when the text has no searchable tokens.
+    """
+    tokens = TOKEN_PATTERN.findall(search.replace('_', ' '))
+    if not tokens:
+        return None
+    raw_query = ' & '.join(f'{token}:*' for token in tokens)
+    return SearchQuery(raw_query, search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_doctors(queryset, search):
+    """
+    Filter a Doctor queryset by free-text search.
+    Results are ordered by relevance on PostgreSQL.
+    """
+    query = build_prefix_query(search) if uses_full_text_search() else None
+
+    if query is None:
+        return queryset.filter(
+            Q(first_name__icontains=search) |
+            Q(last_name__icontains=search) |
+            Q(specialization__icontains=search) |
+            Q(qualification__icontains=search) |
+            Q(city__icontains=search) |
+            Q(clinic_name__icontains=search)
+        )
+
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).order_by('-search_rank', '-created_at', '-id')
+
+
+def refresh_search_vector(queryset):
+    """Recompute search_vector for every doctor in the queryset."""
+    if uses_full_text_search():
+        queryset.update(search_vector=DOCTOR_SEARCH_VECTOR)
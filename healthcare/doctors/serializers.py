@@ -1,9 +1,10 @@
 from rest_framework import serializers
 from datetime import date
 from .models import Doctor
+from authentication.utils import SparseFieldsetMixin
 
 
-class DoctorSerializer(serializers.ModelSerializer):
+class DoctorSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Doctor model with comprehensive validation.
     """
@@ -79,12 +80,15 @@ class DoctorSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Last name should only contain letters.")
         return value.strip().title()
     
-    def validate_email(self, value):
-        """Validate email uniqueness."""
+    def normalize_email(self, value):
+        """Validate email is present and normalize it to lowercase."""
         if not value.strip():
             raise serializers.ValidationError("Email is required.")
-        
-        email = value.lower().strip()
+        return value.lower().strip()
+    
+    def validate_email(self, value):
+        """Validate email uniqueness."""
+        email = self.normalize_email(value)
         
         # Check if email already exists (excluding current instance for updates)
         doctor_id = self.instance.id if self.instance else None
@@ -134,8 +138,8 @@ class DoctorSerializer(serializers.ModelSerializer):
         
         return cleaned_phone
     
-    def validate_license_number(self, value):
-        """Validate license number."""
+    def normalize_license_number(self, value):
+        """Validate license number format and normalize it to uppercase."""
         if not value.strip():
             raise serializers.ValidationError("License number is required.")
         
@@ -152,6 +156,12 @@ class DoctorSerializer(serializers.ModelSerializer):
                 "License number should only contain letters and numbers."
             )
         
+        return license_num
+    
+    def validate_license_number(self, value):
+        """Validate license number."""
+        license_num = self.normalize_license_number(value)
+        
         # Check if license number already exists (excluding current instance)
         doctor_id = self.instance.id if self.instance else None
         if Doctor.objects.filter(license_number=license_num).exclude(id=doctor_id).exists():
@@ -243,7 +253,7 @@ class DoctorSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class DoctorListSerializer(serializers.ModelSerializer):
+class DoctorListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for listing doctors.
     """
@@ -256,6 +266,7 @@ class DoctorListSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'full_name',
+            'age',
             'specialization',
             'specialization_display',
             'qualification',
@@ -305,6 +316,8 @@ class DoctorUpdateSerializer(serializers.ModelSerializer):
         ]
     
     # Reuse validation methods from DoctorSerializer
+    normalize_email = DoctorSerializer.normalize_email
+    normalize_license_number = DoctorSerializer.normalize_license_number
     validate_first_name = DoctorSerializer.validate_first_name
     validate_last_name = DoctorSerializer.validate_last_name
     validate_email = DoctorSerializer.validate_email
@@ -320,4 +333,67 @@ class DoctorUpdateSerializer(serializers.ModelSerializer):
     validate_postal_code = DoctorSerializer.validate_postal_code
     validate_available_days = DoctorSerializer.validate_available_days
     validate_available_time = DoctorSerializer.validate_available_time
-    validate = DoctorSerializer.validate
\ No newline at end of file
+    validate = DoctorSerializer.validate
+
+
+class DoctorBulkImportSerializer(DoctorSerializer):
+    """
+    Serializer for validating one row of a bulk doctor import.
+    Runs every DoctorSerializer rule except the per-row email and
+    license_number uniqueness queries; check_batch_uniqueness resolves
+    those for a whole batch at once.
+    """
+    class Meta(DoctorSerializer.Meta):
+        extra_kwargs = {
+            'email': {'validators': []},
+            'license_number': {'validators': [Doctor.license_regex]},
+        }
+    
+    # Per-row checks only normalize; uniqueness is checked per batch
+    validate_email = DoctorSerializer.normalize_email
+    validate_license_number = DoctorSerializer.normalize_license_number
+    
+    @staticmethod
+    def check_batch_uniqueness(rows):
+        """
+        Find email/license_number collisions for a batch of validated rows.
+        Uses one IN query per field against the database and in-memory sets
+        for duplicates inside the batch.
+        
+        Returns a dict mapping row index to field errors.
+        """
+        existing_emails = set(
+            Doctor.objects.filter(
+                email__in={row['email'] for row in rows}
+            ).values_list('email', flat=True)
+        )
+        existing_licenses = set(
+            Doctor.objects.filter(
+                license_number__in={row['license_number'] for row in rows}
+            ).values_list('license_number', flat=True)
+        )
+        
+        seen_emails = set()
+        seen_licenses = set()
+        errors = {}
+        
+        for index, row in enumerate(rows):
+            row_errors = {}
+            
+            if row['email'] in existing_emails:
+                row_errors['email'] = ["A doctor with this email already exists."]
+            elif row['email'] in seen_emails:
+                row_errors['email'] = ["Duplicate email in this import."]
+            
+            if row['license_number'] in existing_licenses:
+                row_errors['license_number'] = ["A doctor with this license number already exists."]
+            elif row['license_number'] in seen_licenses:
+                row_errors['license_number'] = ["Duplicate license number in this import."]
+            
+            seen_emails.add(row['email'])
+            seen_licenses.add(row['license_number'])
+            
+            if row_errors:
+                errors[index] = row_errors
+        
+        return errors
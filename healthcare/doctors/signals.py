@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Doctor
+from .cache import bump_list_version
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def invalidate_doctor_list(sender, instance, **kwargs):
+    """
+    Drop the cached doctor list and detail responses once the change is
+    committed: a response
+    cached while the transaction was open holds the old rows, and a
+    rolled-back change needs no invalidation.
+    """
+    transaction.on_commit(bump_list_version)
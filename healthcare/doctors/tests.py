@@ -1,3 +1,334 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .models import Doctor
+from healthcare.testing import (
+    QueryCountMixin,
+    create_user,
+    create_doctor,
+    create_doctors,
+    create_patients,
+    doctor_data,
+    csv_upload,
+)
+from mappings.models import PatientDoctorMapping
+
+
+class DoctorQueryCountTests(QueryCountMixin, APITestCase):
+    """Doctor endpoints run a fixed number of queries whatever the data size."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.other = create_user('other@example.com')
+        self.client.force_authenticate(self.user)
+        create_doctors(self.user, 2)
+
+    def grow(self):
+        # The directory is shared, so doctors of other users are listed too
+        count = Doctor.objects.count()
+        create_doctors(self.user, 6, start=count + 100)
+        create_doctors(self.other, 6, start=count + 200)
+
+    def test_list(self):
+        url = reverse('doctors:doctor-list-create')
+        self.assertConstantQueries(lambda: self.client.get(url), self.grow, expected=2)
+
+    def test_list_with_cursor_pagination(self):
+        url = reverse('doctors:doctor-list-create')
+        self.assertConstantQueries(lambda: self.client.get(url, {'pagination': 'cursor'}), self.grow, expected=1)
+
+    def test_invalid_cursor_or_page(self):
+        url = reverse('doctors:doctor-list-create')
+        self.assertEqual(self.client.get(url, {'pagination': 'cursor', 'cursor': 'garbage'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'page': 999}).status_code, 404)
+
+    def test_search(self):
+        url = reverse('doctors:doctor-list-create')
+        self.assertConstantQueries(lambda: self.client.get(url, {'search': 'cardio pun'}), self.grow, expected=2)
+
+    def test_create(self):
+        url = reverse('doctors:doctor-list-create')
+        payloads = iter(doctor_data(index) for index in range(1000, 1010))
+        self.assertConstantQueries(lambda: self.client.post(url, next(payloads), format='json'), self.grow)
+
+    def test_bulk_import(self):
+        url = reverse('doctors:doctor-bulk-import')
+        sizes = [2]
+
+        def request():
+            start = 1000 * len(sizes)
+            rows = [doctor_data(start + index) for index in range(sizes[-1])]
+            return self.client.post(url, {'file': csv_upload(rows)}, format='multipart')
+
+        self.assertConstantQueries(request, lambda: sizes.append(25))
+        self.assertEqual(Doctor.objects.count(), 2 + 2 + 25)
+
+    def test_export(self):
+        url = reverse('doctors:doctor-export')
+        self.assertConstantQueries(lambda: self.client.get(url), self.grow, expected=1)
+
+    def test_detail(self):
+        doctor = create_doctor(self.user, 500)
+        url = reverse('doctors:doctor-detail', args=[doctor.id])
+        self.assertConstantQueries(lambda: self.client.get(url), self.grow, expected=2)
+
+    def test_update(self):
+        doctor = create_doctor(self.user, 500)
+        url = reverse('doctors:doctor-detail', args=[doctor.id])
+        self.assertConstantQueries(lambda: self.client.patch(url, {'city': 'Mumbai'}, format='json'), self.grow)
+        self.assertConstantQueries(
+            lambda: self.client.put(url, doctor_data(500, city='Nashik'), format='json'),
+            self.grow
+        )
+
+    def test_delete_with_mappings(self):
+        few = create_doctor(self.user, 500)
+        many = create_doctor(self.user, 501)
+        for doctor, patients in ((few, create_patients(self.user, 1)), (many, create_patients(self.user, 8, start=1))):
+            for patient in patients:
+                PatientDoctorMapping.objects.create(patient=patient, doctor=doctor, created_by=self.user)
+
+        few_queries, response = self.count_queries(
+            lambda: self.client.delete(reverse('doctors:doctor-detail', args=[few.id]))
+        )
+        self.assertEqual(response.status_code, 200)
+        many_queries, response = self.count_queries(
+            lambda: self.client.delete(reverse('doctors:doctor-detail', args=[many.id]))
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(len(few_queries), len(many_queries))
+
+
+class DoctorBulkImportUniquenessTests(APITestCase):
+    """Bulk import rejects emails and licenses that exist or repeat, naming the row."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.existing = create_doctor(self.user, 1)
+
+    def import_rows(self, rows):
+        return self.client.post(
+            reverse('doctors:doctor-bulk-import'),
+            {'file': csv_upload(rows)},
+            format='multipart'
+        )
+
+    def test_existing_email_or_license(self):
+        response = self.import_rows([
+            doctor_data(10, email=self.existing.email.upper()),
+            doctor_data(11, license_number=self.existing.license_number),
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        report = response.data['error']['details']
+        self.assertEqual((report['created'], report['failed']), (0, 2))
+        self.assertEqual(report['errors'], [
+            {'row': 1, 'errors': {'email': ['A doctor with this email already exists.']}},
+            {'row': 2, 'errors': {'license_number': ['A doctor with this license number already exists.']}},
+        ])
+        self.assertEqual(Doctor.objects.count(), 1)
+
+    def test_duplicates_within_one_import(self):
+        first = doctor_data(10)
+        response = self.import_rows([
+            first,
+            doctor_data(11, email=first['email'].upper()),
+            doctor_data(12, license_number=first['license_number']),
+        ])
+
+        # The first row is still imported, so the import is a partial success
+        self.assertEqual(response.status_code, 200)
+        report = response.data['data']
+        self.assertEqual((report['created'], report['failed']), (1, 2))
+        self.assertEqual(report['errors'], [
+            {'row': 2, 'errors': {'email': ['Duplicate email in this import.']}},
+            {'row': 3, 'errors': {'license_number': ['Duplicate license number in this import.']}},
+        ])
+
+    def test_only_duplicates_of_existing_rows(self):
+        response = self.import_rows([
+            doctor_data(10, email=self.existing.email),
+            doctor_data(11, email=self.existing.email),
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [error['row'] for error in response.data['error']['details']['errors']],
+            [1, 2]
+        )
+
+
+class DoctorListCacheTests(QueryCountMixin, APITestCase):
+    """Doctor list responses are cached per normalized query until a doctor changes."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.doctors = create_doctors(self.user, 3)
+        self.url = reverse('doctors:doctor-list-create')
+
+    def test_equivalent_queries_share_the_cached_response(self):
+        first = self.client.get(self.url, {'city': 'Pune', 'is_active': 'true', 'unused': '1'})
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {'is_active': 'TRUE', 'city': ' pune '})
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_different_queries_are_cached_separately(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url, {'page_size': 1})
+
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertEqual(len(second.data['results']['data']), 1)
+
+    def test_create_update_and_delete_invalidate(self):
+        count = self.client.get(self.url).data['count']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_doctor(self.user, 100)
+        self.assertEqual(self.client.get(self.url).data['count'], count + 1)
+
+        doctor = self.doctors[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('doctors:doctor-detail', args=[doctor.id]), {'city': 'Nashik'}, format='json')
+        cities = {item['id']: item['city'] for item in self.client.get(self.url).data['results']['data']}
+        self.assertEqual(cities[doctor.id], 'Nashik')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('doctors:doctor-detail', args=[doctor.id]))
+        self.assertEqual(self.client.get(self.url).data['count'], count)
+
+    def test_rolled_back_change_keeps_cache(self):
+        etag = self.client.get(self.url)['ETag']
+
+        # Commit hooks are not run: the test transaction never commits, like a rollback
+        create_doctor(self.user, 100)
+
+        self.assertEqual(self.client.get(self.url)['ETag'], etag)
+
+    def test_bulk_import_invalidates(self):
+        count = self.client.get(self.url).data['count']
+
+        self.client.post(
+            reverse('doctors:doctor-bulk-import'),
+            {'file': csv_upload([doctor_data(200), doctor_data(201)])},
+            format='multipart'
+        )
+
+        self.assertEqual(self.client.get(self.url).data['count'], count + 2)
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_doctor(self.user, 100)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_pagination_mode_is_part_of_the_cache_key(self):
+        cursor = self.client.get(self.url, {'pagination': 'cursor'})
+        other = self.client.get(self.url, {'pagination': 'CURSOR'})
+
+        self.assertNotIn('count', cursor.data)
+        # Only the exact value selects cursor pagination
+        self.assertIn('count', other.data)
+        self.assertNotEqual(cursor['ETag'], other['ETag'])
+
+    def test_fields_are_part_of_the_cache_key(self):
+        full = self.client.get(self.url)
+        sparse = self.client.get(self.url, {'fields': 'id,full_name'})
+
+        self.assertNotEqual(full['ETag'], sparse['ETag'])
+        self.assertEqual(set(sparse.data['results']['data'][0]), {'id', 'full_name'})
+        self.assertIn('specialization', full.data['results']['data'][0])
+
+
+class DoctorDetailCacheTests(APITestCase):
+    """Doctor detail responses are cached per field selection until a doctor changes."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.doctor = create_doctor(self.user)
+        self.url = reverse('doctors:doctor-detail', args=[self.doctor.id])
+
+    def test_cached_response(self):
+        first = self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second['Last-Modified'], first['Last-Modified'])
+
+    def test_fields_are_part_of_the_cache_key(self):
+        self.client.get(self.url)
+        sparse = self.client.get(self.url, {'fields': 'id,full_name'})
+
+        self.assertEqual(set(sparse.data['data']), {'id', 'full_name'})
+
+    def test_update_and_delete_invalidate(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {'city': 'Nashik'}, format='json')
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['data']['city'], 'Nashik')
+        self.assertNotEqual(response['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.url)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class DoctorConditionalRequestTests(APITestCase):
+    """Doctor detail answers conditional requests from updated_at."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.doctor = create_doctor(self.user)
+        self.url = reverse('doctors:doctor-detail', args=[self.doctor.id])
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)['ETag']
+
+        # Answered from the cached response
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Without it, from the updated_at column alone
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_match(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.patch(self.url, {'city': 'Nashik'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(self.url, {'city': 'Nagpur'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.doctor.refresh_from_db()
+        self.assertEqual(self.doctor.city, 'Nashik')
@@ -1,9 +1,16 @@
 from django.urls import path
-from .views import DoctorListCreateView, DoctorDetailView
+from .views import (
+    DoctorListCreateView,
+    DoctorBulkImportView,
+    DoctorExportView,
+    DoctorDetailView
+)
 
 app_name = 'doctors'
 
 urlpatterns = [
     path('', DoctorListCreateView.as_view(), name='doctor-list-create'),
+    path('bulk/', DoctorBulkImportView.as_view(), name='doctor-bulk-import'),
+    path('export/', DoctorExportView.as_view(), name='doctor-export'),
     path('<int:pk>/', DoctorDetailView.as_view(), name='doctor-detail'),
 ]
\ No newline at end of file
@@ -1,17 +1,48 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from rest_framework.parsers import MultiPartParser
+from rest_framework.exceptions import ValidationError, NotFound
+from rest_framework.response import Response
 # from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction, IntegrityError
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 
 from .models import Doctor
+from .cache import doctor_list_cache, doctor_detail_cache_key, bump_list_version
+from .search import search_doctors, refresh_search_vector
 from .serializers import (
     DoctorSerializer,
     DoctorListSerializer,
-    DoctorUpdateSerializer
+    DoctorUpdateSerializer,
+    DoctorBulkImportSerializer
+)
+from analytics.stats import invalidate_user_stats
+from monitoring.metrics import record_cache_lookup
+from authentication.authentication import StatelessJWTAuthentication
+from authentication.utils import (
+    success_response,
+    error_response,
+    SparseFieldset,
+    FieldsetError,
+    conditional_get,
+    not_modified,
+    set_validators,
+    has_if_match,
+    precondition_failed,
+    ImportFormatError,
+    ImportReadError,
+    get_import_batch_size,
+    get_import_source,
+    iter_import_rows,
+    chunked,
+    EXPORT_CONTENT_TYPES,
+    stream_export
 )
-from authentication.utils import success_response, error_response
 
 
 class DoctorPagination(PageNumberPagination):
@@ -21,14 +52,38 @@ class DoctorPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class DoctorCursorPagination(CursorPagination):
+    """
+    Keyset pagination for doctor list.
+    Seeks on (created_at, id) instead of OFFSET and skips the COUNT query.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
 class DoctorListCreateView(APIView):
     """
     API endpoint for listing and creating doctors.
     GET: Retrieve all doctors (public access with authentication).
     POST: Create a new doctor (authenticated users only).
+    
+    Authenticated from the access token claims, without a user query.
     """
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
     pagination_class = DoctorPagination
+    cursor_pagination_class = DoctorCursorPagination
+    
+    def get_paginator(self, request):
+        """
+        Return the paginator for this request.
+        Cursor (keyset) pagination is opt-in via ?pagination=cursor.
+        """
+        if request.query_params.get('pagination') == 'cursor':
+            return self.cursor_pagination_class()
+        return self.pagination_class()
     
     def get(self, request):
         """
@@ -36,7 +91,8 @@ class DoctorListCreateView(APIView):
         Supports filtering, search, and pagination.
         
         Query Parameters:
-        - search: Search by name, specialization, city, or qualification
+        - search: Search by name, specialization, city, qualification, or clinic
+          (prefix matching, ordered by relevance)
         - specialization: Filter by specialization
         - city: Filter by city
         - is_available: Filter by availability (true/false)
@@ -45,8 +101,30 @@ class DoctorListCreateView(APIView):
         - max_fee: Maximum consultation fee
         - page: Page number
         - page_size: Number of items per page
+        - pagination: Set to 'cursor' for keyset pagination (no total count)
+        - cursor: Opaque cursor taken from the next/previous links
+        - fields: Comma-separated fields to return (e.g. id,full_name)
+        - exclude: Comma-separated fields to leave out
+        
+        Responses are the same for every user and cached per normalized query
+        (see doctors.cache). Send the returned ETag in If-None-Match to get
+        304 Not Modified while no doctor has changed.
         """
         try:
+            fieldset = SparseFieldset.from_request(request, DoctorListSerializer)
+            
+            cache_key, etag = doctor_list_cache(request)
+            
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response['ETag'] = etag
+                return response
+            
+            cached = cache.get(cache_key)
+            record_cache_lookup('doctor_list', cached is not None)
+            if cached is not None:
+                return self.list_response(Response(cached), etag)
+            
             # Get all doctors
             queryset = Doctor.objects.all()
             
@@ -83,31 +161,45 @@ class DoctorListCreateView(APIView):
                 except ValueError:
                     pass
             
-            # Apply search
+            # Apply search (ranked full-text search on PostgreSQL)
             search = request.query_params.get('search')
             if search:
-                queryset = queryset.filter(
-                    Q(first_name__icontains=search) |
-                    Q(last_name__icontains=search) |
-                    Q(specialization__icontains=search) |
-                    Q(qualification__icontains=search) |
-                    Q(city__icontains=search) |
-                    Q(clinic_name__icontains=search)
-                )
+                queryset = search_doctors(queryset, search)
+            
+            # Read only the columns of the requested fields
+            queryset = fieldset.only(queryset, DoctorListSerializer, extra=['created_at'])
             
             # Pagination
-            paginator = self.pagination_class()
+            paginator = self.get_paginator(request)
             paginated_queryset = paginator.paginate_queryset(queryset, request)
             
             # Serialize data
-            serializer = DoctorListSerializer(paginated_queryset, many=True)
+            serializer = DoctorListSerializer(paginated_queryset, many=True, fieldset=fieldset)
             
             # Return paginated response
-            return paginator.get_paginated_response({
+            response = paginator.get_paginated_response({
                 'success': True,
                 'message': 'Doctors retrieved successfully',
                 'data': serializer.data
             })
+            cache.set(cache_key, response.data, settings.DOCTOR_LIST_CACHE_TIMEOUT)
+            
+            return self.list_response(response, etag)
+        
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        except NotFound as e:
+            # Bad cursor or page number
+            return error_response(
+                message="Invalid page",
+                details=str(e.detail),
+                status_code=status.HTTP_404_NOT_FOUND
+            )
         
         except Exception as e:
             return error_response(
@@ -116,6 +208,15 @@ class DoctorListCreateView(APIView):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def list_response(self, response, etag):
+        """Add the validators of a doctor list response."""
+        response['ETag'] = etag
+        # Authenticated data: never shared caches, and clients revalidate every time
+        response['Cache-Control'] = 'private, no-cache'
+        # The ETag is the same for the JSON and browsable API renderings
+        patch_vary_headers(response, ('Accept',))
+        return response
+    
     def post(self, request):
         """
         Create a new doctor.
@@ -123,6 +224,8 @@ class DoctorListCreateView(APIView):
         Request body: All doctor fields as defined in DoctorSerializer
         """
         try:
+            fieldset = SparseFieldset.from_request(request, DoctorSerializer)
+            
             serializer = DoctorSerializer(
                 data=request.data,
                 context={'request': request}
@@ -132,7 +235,7 @@ class DoctorListCreateView(APIView):
                 doctor = serializer.save()
                 
                 return success_response(
-                    data=DoctorSerializer(doctor).data,
+                    data=DoctorSerializer(doctor, fieldset=fieldset).data,
                     message="Doctor created successfully",
                     status_code=status.HTTP_201_CREATED
                 )
@@ -143,6 +246,13 @@ class DoctorListCreateView(APIView):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
         except Exception as e:
             return error_response(
                 message="An error occurred while creating doctor",
@@ -151,6 +261,196 @@ class DoctorListCreateView(APIView):
             )
 
 
+class DoctorBulkImportView(APIView):
+    """
+    API endpoint for importing doctors in bulk.
+    POST: Stream a CSV or NDJSON body and create one doctor per valid row.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request):
+        """
+        Import doctors from a CSV or NDJSON upload.
+        
+        Send the file as multipart form data in the `file` field, or as the raw
+        request body with Content-Type text/csv or application/x-ndjson.
+        Columns/keys are the DoctorSerializer fields.
+        
+        Each batch is validated with DoctorBulkImportSerializer, email and
+        license_number collisions are resolved with one query per field,
+        and valid rows are inserted with bulk_create in one transaction.
+        
+        Query Parameters:
+        - batch_size: Rows validated and inserted per transaction
+        """
+        try:
+            batch_size = get_import_batch_size(request)
+            import_format, lines = get_import_source(request)
+        except ImportFormatError as e:
+            return error_response(
+                message="Unsupported import format",
+                details=str(e),
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        
+        report = {
+            'total_rows': 0,
+            'created': 0,
+            'failed': 0,
+            'errors': []
+        }
+        
+        try:
+            # One serializer instance for every row, so its fields are built once
+            serializer = DoctorBulkImportSerializer(context={'request': request})
+            
+            for chunk in chunked(iter_import_rows(import_format, lines), batch_size):
+                valid_rows = []
+                row_errors = {}
+                
+                for row_number, data, errors in chunk:
+                    if errors is None:
+                        try:
+                            valid_rows.append((row_number, serializer.run_validation(data)))
+                            continue
+                        except ValidationError as e:
+                            errors = e.detail
+                    row_errors[row_number] = errors
+                
+                collisions = DoctorBulkImportSerializer.check_batch_uniqueness(
+                    [validated_data for _, validated_data in valid_rows]
+                )
+                doctors = []
+                for index, (row_number, validated_data) in enumerate(valid_rows):
+                    if index in collisions:
+                        row_errors[row_number] = collisions[index]
+                    else:
+                        doctors.append(Doctor(created_by=request.user, **validated_data))
+                
+                try:
+                    with transaction.atomic():
+                        created = Doctor.objects.bulk_create(doctors, batch_size=batch_size)
+                        refresh_search_vector(
+                            Doctor.objects.filter(pk__in=[doctor.pk for doctor in created])
+                        )
+                    # bulk_create sends no post_save signals
+                    invalidate_user_stats(request.user.id)
+                    bump_list_version()
+                except IntegrityError as e:
+                    # Lost a race with a concurrent insert; report the whole batch
+                    for row_number, _ in valid_rows:
+                        row_errors.setdefault(row_number, {'non_field_errors': [str(e)]})
+                    doctors = []
+                
+                report['errors'].extend(
+                    {'row': row_number, 'errors': errors}
+                    for row_number, errors in sorted(row_errors.items())
+                )
+                report['total_rows'] += len(chunk)
+                report['created'] += len(doctors)
+                report['failed'] += len(chunk) - len(doctors)
+        
+        except ImportReadError as e:
+            report['errors'].append({'row': e.row, 'line': e.line, 'errors': str(e)})
+            return error_response(
+                message="Import stopped: the file could not be read",
+                details=report,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred while importing doctors",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        if report['failed'] == 0:
+            return success_response(
+                data=report,
+                message=f"{report['created']} doctor(s) imported successfully",
+                status_code=status.HTTP_201_CREATED
+            )
+        
+        if report['created'] == 0:
+            return error_response(
+                message="No doctors were imported",
+                details=report,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return success_response(
+            data=report,
+            message=f"{report['created']} doctor(s) imported, {report['failed']} row(s) failed",
+            status_code=status.HTTP_200_OK
+        )
+
+
+class DoctorExportView(APIView):
+    """
+    API endpoint for exporting doctors.
+    GET: Stream doctors as CSV or NDJSON.
+    """
+    permission_classes = [IsAuthenticated]
+    export_fields = [
+        'id',
+        'first_name',
+        'last_name',
+        'email',
+        'phone',
+        'date_of_birth',
+        'gender',
+        'specialization',
+        'qualification',
+        'license_number',
+        'experience_years',
+        'clinic_name',
+        'clinic_address',
+        'city',
+        'state',
+        'postal_code',
+        'country',
+        'consultation_fee',
+        'available_days',
+        'available_time',
+        'bio',
+        'languages_spoken',
+        'is_active',
+        'is_available',
+        'created_at',
+        'updated_at',
+    ]
+    
+    def get(self, request):
+        """
+        Export the doctor directory.
+        The response is streamed from a server-side cursor in constant memory.
+        
+        Query Parameters:
+        - export_format: csv (default) or ndjson
+        """
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        
+        if export_format not in EXPORT_CONTENT_TYPES:
+            return error_response(
+                message="Unsupported export format",
+                details="export_format must be one of: " + ", ".join(EXPORT_CONTENT_TYPES),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            queryset = Doctor.objects.all()
+            return stream_export(queryset, self.export_fields, export_format, 'doctors')
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred while exporting doctors",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class DoctorDetailView(APIView):
     """
     API endpoint for retrieving, updating, and deleting a specific doctor.
@@ -158,13 +458,31 @@ class DoctorDetailView(APIView):
     PUT: Update doctor details.
     PATCH: Partially update doctor details.
     DELETE: Delete doctor record.
+    
+    Responses carry ETag and Last-Modified from updated_at. GET answers
+    If-None-Match / If-Modified-Since with 304; updates honour If-Match
+    and fail with 412 when the record changed in the meantime.
+    
+    GET responses are cached per doctor and field selection under the
+    doctor list version stamp (see doctors.cache), so a cache hit, 304 or
+    not, runs no query.
+    
+    Authenticated from the access token claims, without a user query.
     """
+    authentication_classes = [StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
-    def get_doctor(self, doctor_id):
-        """Helper method to get doctor."""
+    def get_doctor(self, doctor_id, for_update=False, fieldset=None):
+        """
+        Helper method to get doctor.
+        With for_update the row stays locked until the transaction ends;
+        with a fieldset only the columns of the requested fields are read.
+        """
+        queryset = Doctor.objects.select_for_update() if for_update else Doctor.objects.all()
+        if fieldset is not None:
+            queryset = fieldset.only(queryset, DoctorSerializer, extra=['updated_at'])
         try:
-            return Doctor.objects.get(id=doctor_id)
+            return queryset.get(id=doctor_id)
         except Doctor.DoesNotExist:
             return None
     
@@ -173,7 +491,22 @@ class DoctorDetailView(APIView):
         Get details of a specific doctor.
         """
         try:
-            doctor = self.get_doctor(pk)
+            fieldset = SparseFieldset.from_request(request, DoctorSerializer)
+            
+            cache_key = doctor_detail_cache_key(pk, fieldset)
+            cached = cache.get(cache_key)
+            record_cache_lookup('doctor_detail', cached is not None)
+            if cached is not None:
+                return (
+                    not_modified(request, cached['updated_at'])
+                    or self.detail_response(cached['data'], cached['updated_at'])
+                )
+            
+            unchanged = conditional_get(request, Doctor.objects.filter(id=pk))
+            if unchanged is not None:
+                return unchanged
+            
+            doctor = self.get_doctor(pk, fieldset=fieldset)
             
             if not doctor:
                 return error_response(
@@ -182,12 +515,20 @@ class DoctorDetailView(APIView):
                     status_code=status.HTTP_404_NOT_FOUND
                 )
             
-            serializer = DoctorSerializer(doctor)
+            serializer = DoctorSerializer(doctor, fieldset=fieldset)
+            cache.set(
+                cache_key,
+                {'data': serializer.data, 'updated_at': doctor.updated_at},
+                settings.DOCTOR_LIST_CACHE_TIMEOUT
+            )
             
-            return success_response(
-                data=serializer.data,
-                message="Doctor details retrieved successfully",
-                status_code=status.HTTP_200_OK
+            return self.detail_response(serializer.data, doctor.updated_at)
+        
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
             )
         
         except Exception as e:
@@ -197,6 +538,17 @@ class DoctorDetailView(APIView):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    def detail_response(self, data, updated_at):
+        """
+        Doctor details with the ETag and Last-Modified of updated_at.
+        """
+        response = success_response(
+            data=data,
+            message="Doctor details retrieved successfully",
+            status_code=status.HTTP_200_OK
+        )
+        return set_validators(response, updated_at)
+    
     def put(self, request, pk):
         """
         Update doctor details (full update).
@@ -205,42 +557,57 @@ class DoctorDetailView(APIView):
         Request body: All doctor fields to update
         """
         try:
-            doctor = self.get_doctor(pk)
+            fieldset = SparseFieldset.from_request(request, DoctorSerializer)
             
-            if not doctor:
-                return error_response(
-                    message="Doctor not found",
-                    details="Doctor does not exist",
-                    status_code=status.HTTP_404_NOT_FOUND
-                )
-            
-            # Check if user is the creator
-            if doctor.created_by != request.user:
-                return error_response(
-                    message="Permission denied",
-                    details="You don't have permission to update this doctor",
-                    status_code=status.HTTP_403_FORBIDDEN
+            with transaction.atomic():
+                doctor = self.get_doctor(pk, for_update=has_if_match(request))
+                
+                if not doctor:
+                    return error_response(
+                        message="Doctor not found",
+                        details="Doctor does not exist",
+                        status_code=status.HTTP_404_NOT_FOUND
+                    )
+                
+                # Check if user is the creator
+                if doctor.created_by_id != request.user.id:
+                    return error_response(
+                        message="Permission denied",
+                        details="You don't have permission to update this doctor",
+                        status_code=status.HTTP_403_FORBIDDEN
+                    )
+                
+                failed = precondition_failed(request, doctor.updated_at)
+                if failed is not None:
+                    return failed
+                
+                serializer = DoctorUpdateSerializer(
+                    doctor,
+                    data=request.data,
+                    partial=False,  # Require all fields for PUT
+                    context={'request': request}
                 )
-            
-            serializer = DoctorUpdateSerializer(
-                doctor,
-                data=request.data,
-                partial=False,  # Require all fields for PUT
-                context={'request': request}
-            )
-            
-            if serializer.is_valid():
-                updated_doctor = serializer.save()
                 
-                return success_response(
-                    data=DoctorSerializer(updated_doctor).data,
-                    message="Doctor updated successfully",
-                    status_code=status.HTTP_200_OK
+                if serializer.is_valid():
+                    updated_doctor = serializer.save()
+                    
+                    response = success_response(
+                        data=DoctorSerializer(updated_doctor, fieldset=fieldset).data,
+                        message="Doctor updated successfully",
+                        status_code=status.HTTP_200_OK
+                    )
+                    return set_validators(response, updated_doctor.updated_at)
+                
+                return error_response(
+                    message="Validation failed",
+                    details=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
                 )
-            
+        
+        except FieldsetError as e:
             return error_response(
-                message="Validation failed",
-                details=serializer.errors,
+                message="Invalid field selection",
+                details=str(e),
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
@@ -267,7 +634,7 @@ class DoctorDetailView(APIView):
                 )
             
             # Check if user is the creator
-            if doctor.created_by != request.user:
+            if doctor.created_by_id != request.user.id:
                 return error_response(
                     message="Permission denied",
                     details="You don't have permission to delete this doctor",
@@ -304,42 +671,57 @@ class DoctorDetailView(APIView):
         Request body: Doctor fields to update (partial)
         """
         try:
-            doctor = self.get_doctor(pk)
+            fieldset = SparseFieldset.from_request(request, DoctorSerializer)
             
-            if not doctor:
-                return error_response(
-                    message="Doctor not found",
-                    details="Doctor does not exist",
-                    status_code=status.HTTP_404_NOT_FOUND
-                )
-            
-            # Check if user is the creator
-            if doctor.created_by != request.user:
-                return error_response(
-                    message="Permission denied",
-                    details="You don't have permission to update this doctor",
-                    status_code=status.HTTP_403_FORBIDDEN
+            with transaction.atomic():
+                doctor = self.get_doctor(pk, for_update=has_if_match(request))
+                
+                if not doctor:
+                    return error_response(
+                        message="Doctor not found",
+                        details="Doctor does not exist",
+                        status_code=status.HTTP_404_NOT_FOUND
+                    )
+                
+                # Check if user is the creator
+                if doctor.created_by_id != request.user.id:
+                    return error_response(
+                        message="Permission denied",
+                        details="You don't have permission to update this doctor",
+                        status_code=status.HTTP_403_FORBIDDEN
+                    )
+                
+                failed = precondition_failed(request, doctor.updated_at)
+                if failed is not None:
+                    return failed
+                
+                serializer = DoctorUpdateSerializer(
+                    doctor,
+                    data=request.data,
+                    partial=True,  # Allow partial updates for PATCH
+                    context={'request': request}
                 )
-            
-            serializer = DoctorUpdateSerializer(
-                doctor,
-                data=request.data,
-                partial=True,  # Allow partial updates for PATCH
-                context={'request': request}
-            )
-            
-            if serializer.is_valid():
-                updated_doctor = serializer.save()
                 
-                return success_response(
-                    data=DoctorSerializer(updated_doctor).data,
-                    message="Doctor updated successfully",
-                    status_code=status.HTTP_200_OK
+                if serializer.is_valid():
+                    updated_doctor = serializer.save()
+                    
+                    response = success_response(
+                        data=DoctorSerializer(updated_doctor, fieldset=fieldset).data,
+                        message="Doctor updated successfully",
+                        status_code=status.HTTP_200_OK
+                    )
+                    return set_validators(response, updated_doctor.updated_at)
+                
+                return error_response(
+                    message="Validation failed",
+                    details=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
                 )
-            
+        
+        except FieldsetError as e:
             return error_response(
-                message="Validation failed",
-                details=serializer.errors,
+                message="Invalid field selection",
+                details=str(e),
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
@@ -347,4 +729,5 @@ class DoctorDetailView(APIView):
             return error_response(
                 message="An error occurred while updating doctor",
                 details=str(e),
-                status_code=status.HTTP_500_)
\ No newline at end of file
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -0,0 +1,40 @@
+"""
+Latency helpers shared by the benchmark management commands.
+Timings are wall-clock milliseconds; percentiles use the nearest rank.
+"""
+import statistics
+import time
+
+
+def measure(run, iterations):
+    """Call `run` `iterations` times and return its sorted timings."""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return sorted(timings)
+
+
+def percentile(timings, p):
+    """Nearest-rank p-th percentile of sorted timings."""
+    return timings[int(round(p / 100 * (len(timings) - 1)))]
+
+
+def latency_summary(timings):
+    """Count, mean, p50/p95/p99 and max of sorted timings, rounded to 0.01 ms."""
+    return {
+        'requests': len(timings),
+        'mean_ms': round(statistics.mean(timings), 2),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'max_ms': round(timings[-1], 2),
+    }
+
+
+def format_latency(label, summary, width=9, extra=()):
+    """One report line for a latency_summary, with optional extra "name=value" fields."""
+    fields = [f"n={summary['requests']}", *extra, f"mean={summary['mean_ms']:.2f}ms"]
+    fields += [f"{name}={summary[f'{name}_ms']:.2f}ms" for name in ('p50', 'p95', 'p99', 'max')]
+    return f"{label:<{width}} {' '.join(fields)}"
@@ -6,8 +6,10 @@ from django.core.paginator import Paginator
 
 from authentication.models import User
 from patients.models import Patient
+from patients.search import search_patients
 from doctors.models import Doctor
 from mappings.models import PatientDoctorMapping
+from analytics.stats import get_user_stats, get_user_breakdown
 
 
 # Dashboard View
@@ -15,9 +17,8 @@ from mappings.models import PatientDoctorMapping
 def dashboard_view(request):
     """Dashboard with statistics and quick actions"""
     context = {
-        'total_patients': Patient.objects.filter(created_by=request.user).count(),
-        'total_doctors': Doctor.objects.filter(created_by=request.user).count(),
-        'total_mappings': PatientDoctorMapping.objects.filter(patient__created_by=request.user).count(),
+        **get_user_stats(request.user),
+        'breakdown': get_user_breakdown(request.user),
     }
     return render(request, 'healthcare/dashboard.html', context)
 
@@ -31,12 +32,7 @@ def patient_list_view(request):
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        patients = patients.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(phone__icontains=search_query) |
-            Q(email__icontains=search_query)
-        )
+        patients = search_patients(patients, search_query)
     
     # Gender filter
     gender = request.GET.get('gender', '')
@@ -478,9 +474,7 @@ def profile_view(request):
     """User profile"""
     context = {
         'user': request.user,
-        'total_patients': Patient.objects.filter(created_by=request.user).count(),
-        'total_doctors': Doctor.objects.filter(created_by=request.user).count(),
-        'total_mappings': PatientDoctorMapping.objects.filter(patient__created_by=request.user).count(),
+        **get_user_stats(request.user),
     }
     return render(request, 'authentication/profile.html', context)
 
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import config, Choices
 from datetime import timedelta
 
 
@@ -40,10 +40,12 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
     'rest_framework_simplejwt',
+    'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
     
     # Local apps
@@ -51,10 +53,16 @@ INSTALLED_APPS = [
     'patients',
     'doctors',
     'mappings',
+    'analytics',
+    'monitoring',
 
 ]
 
 MIDDLEWARE = [
+    # First, so its wall time covers everything below (inactive unless REQUEST_TIMING_ENABLED)
+    'monitoring.middleware.RequestTimingMiddleware',
+    # Request counters and latency histograms for /metrics (inactive unless METRICS_ENABLED)
+    'monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -97,9 +105,80 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        # Keep connections open between requests instead of reconnecting each time
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {},
     }
 }
 
+# Optional psycopg 3 connection pool, shared by the threads of a worker process.
+# Django manages pooled connections itself, so persistent connections are disabled.
+if config('DB_POOL', default=False, cast=bool):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+    }
+
+
+# Cache
+# Defaults to a per-process in-memory cache, fine for development and a single
+# worker. With several workers CACHE_BACKEND/CACHE_LOCATION must point at a shared
+# backend, or invalidations only reach the worker that made the change
+# (`manage.py check --deploy` warns about this).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='healthcare'),
+    }
+}
+
+# Seconds a user's dashboard statistics stay cached (also dropped on every change)
+USER_STATS_CACHE_TIMEOUT = config('USER_STATS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds a doctor list or detail response stays cached (all are dropped on any doctor change)
+DOCTOR_LIST_CACHE_TIMEOUT = config('DOCTOR_LIST_CACHE_TIMEOUT', default=300, cast=int)
+
+# Size of the dashboard breakdowns: most common cities and most recent weeks shown
+ANALYTICS_TOP_CITIES = config('ANALYTICS_TOP_CITIES', default=10, cast=int)
+ANALYTICS_WEEKS = config('ANALYTICS_WEEKS', default=12, cast=int)
+
+# Request timing (monitoring.middleware): query count, DB/serializer/wall time per request,
+# reported in a Server-Timing header, a JSON log line and per-route histograms
+REQUEST_TIMING_ENABLED = config('REQUEST_TIMING_ENABLED', default=False, cast=bool)
+REQUEST_TIMING_HEADER = config('REQUEST_TIMING_HEADER', default=True, cast=bool)
+
+# Prometheus metrics (monitoring.metrics) served at /metrics. With several worker
+# processes, point METRICS_MULTIPROCESS_DIR at a directory shared by the workers
+# (emptied before each start); each worker flushes its samples there at most every
+# METRICS_FLUSH_INTERVAL seconds. Scrapes need METRICS_TOKEN as a bearer token;
+# without one /metrics is refused unless DEBUG is on.
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_MULTIPROCESS_DIR = config('METRICS_MULTIPROCESS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# The monitoring logger only carries request timing lines, so it is printed only
+# when timing is switched on (tests that enable timing per case stay quiet)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'monitoring': {
+            'handlers': ['console'] if REQUEST_TIMING_ENABLED else [],
+            'level': config('MONITORING_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -120,6 +199,30 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing (see authentication.hashers). New hashes use PASSWORD_HASHER
+# (argon2 needs the argon2-cffi package); hashes made with another algorithm
+# or cost are upgraded on the next successful login.
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2', cast=Choices(['pbkdf2', 'scrypt', 'argon2']))
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=1_000_000, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)
+
+_PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'authentication.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'authentication.hashers.ScryptPasswordHasher',
+    'argon2': 'authentication.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+
+# Threads hashing passwords for logins and registrations, and seconds a
+# request waits for one before failing with 503
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=4, cast=int)
+PASSWORD_HASH_TIMEOUT = config('PASSWORD_HASH_TIMEOUT', default=10, cast=float)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -159,15 +262,33 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson-backed JSON first (optional dependency; falls back to the stdlib json
+    # module), keeping DRF's browsable API and form/multipart parsers after it
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'authentication.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'rest_framework.parsers.JSONParser',
+        'authentication.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
     'EXCEPTION_HANDLER': 'authentication.utils.custom_exception_handler',
+    # Token bucket sizes and refill rates of the login throttles (authentication.throttling);
+    # buckets live in the default cache, so limits only hold across workers with a shared one
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('LOGIN_THROTTLE_IP_RATE', default='20/min'),
+        'login_email': config('LOGIN_THROTTLE_EMAIL_RATE', default='5/min'),
+    },
 }
 
+# Bulk import (CSV/NDJSON) configuration
+BULK_IMPORT_BATCH_SIZE = config('BULK_IMPORT_BATCH_SIZE', default=1000, cast=int)
+BULK_IMPORT_MAX_BATCH_SIZE = config('BULK_IMPORT_MAX_BATCH_SIZE', default=5000, cast=int)
+
+# Rows fetched per server-side cursor round trip by the export endpoints
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -183,6 +304,17 @@ SIMPLE_JWT = {
     'USER_ID_CLAIM': 'user_id',
 }
 
+# Seconds a refresh token found not blacklisted stays cached (blacklisted
+# tokens stay cached until they expire)
+TOKEN_BLACKLIST_CACHE_TIMEOUT = config('TOKEN_BLACKLIST_CACHE_TIMEOUT', default=300, cast=int)
+
+# Expired outstanding tokens deleted per transaction by prune_expired_tokens
+TOKEN_PRUNE_BATCH_SIZE = config('TOKEN_PRUNE_BATCH_SIZE', default=5000, cast=int)
+
+# In-process cache of full users behind StatelessJWTAuthentication
+JWT_USER_CACHE_SIZE = config('JWT_USER_CACHE_SIZE', default=1024, cast=int)
+JWT_USER_CACHE_TIMEOUT = config('JWT_USER_CACHE_TIMEOUT', default=30, cast=float)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
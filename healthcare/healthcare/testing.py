@@ -0,0 +1,161 @@
+"""
+Shared helpers for the per-app test suites.
+
+Factories create valid users, patients, doctors and mappings with the
+fewest arguments, and QueryCountMixin asserts that an endpoint runs the
+same number of SQL queries however many rows it returns (no N+1).
+"""
+import csv
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from patients.models import Patient
+from doctors.models import Doctor
+from mappings.models import PatientDoctorMapping
+
+User = get_user_model()
+
+
+def create_user(email='owner@example.com', password='Str0ng-pass!', **kwargs):
+    """Create a user that can log in with `password`."""
+    return User.objects.create_user(
+        email=email,
+        username=kwargs.pop('username', email),
+        name=kwargs.pop('name', 'Test Owner'),
+        password=password,
+        **kwargs
+    )
+
+
+def letters(index):
+    """Spell a number in letters, for name fields that reject digits (12 -> 'bc')."""
+    return ''.join(chr(ord('a') + int(digit)) for digit in str(index))
+
+
+def patient_data(index=0, **kwargs):
+    """Field values of a valid patient, as accepted by PatientSerializer."""
+    data = {
+        'first_name': 'Asha',
+        'last_name': f'Rao{letters(index)}',
+        'email': f'patient{index}@example.com',
+        'phone': f'+9198765{index:05d}',
+        'date_of_birth': date(1990, 1, 1),
+        'gender': 'F',
+        'blood_group': 'O+',
+        'address': '1 Main Road',
+        'city': 'Pune',
+        'state': 'Maharashtra',
+        'postal_code': '411001',
+        'emergency_contact_name': 'Ravi Rao',
+        'emergency_contact_phone': '+919876599999',
+        'emergency_contact_relation': 'Brother',
+    }
+    data.update(kwargs)
+    return data
+
+
+def doctor_data(index=0, **kwargs):
+    """Field values of a valid doctor, as accepted by DoctorSerializer."""
+    data = {
+        'first_name': 'Doctor',
+        'last_name': f'Number{letters(index)}',
+        'email': f'doctor{index}@example.com',
+        'phone': f'+9198765{index:05d}',
+        'date_of_birth': date(1975, 1, 1),
+        'gender': 'M',
+        'specialization': 'CARDIOLOGY',
+        'qualification': 'MBBS, MD',
+        'license_number': f'LIC{index:06d}',
+        'experience_years': 10,
+        'clinic_address': '2 Clinic Road',
+        'city': 'Pune',
+        'state': 'Maharashtra',
+        'postal_code': '411001',
+        'consultation_fee': '500.00',
+        'available_days': 'Monday to Friday',
+        'available_time': '9:00 AM - 5:00 PM',
+    }
+    data.update(kwargs)
+    return data
+
+
+def create_patient(user, index=0, **kwargs):
+    return Patient.objects.create(created_by=user, **patient_data(index, **kwargs))
+
+
+def create_doctor(user, index=0, **kwargs):
+    return Doctor.objects.create(created_by=user, **doctor_data(index, **kwargs))
+
+
+def create_patients(user, count, start=0):
+    return [create_patient(user, start + index) for index in range(count)]
+
+
+def create_doctors(user, count, start=0):
+    return [create_doctor(user, start + index) for index in range(count)]
+
+
+def assign_doctors(user, patient, count, start=0):
+    """Create `count` new doctors and assign each of them to the patient."""
+    return [
+        PatientDoctorMapping.objects.create(
+            patient=patient,
+            doctor=create_doctor(user, start + index),
+            created_by=user
+        )
+        for index in range(count)
+    ]
+
+
+def csv_upload(rows, name='import.csv'):
+    """Build a CSV file upload from a list of dicts."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    upload = io.BytesIO(buffer.getvalue().encode('utf-8'))
+    upload.name = name
+    return upload
+
+
+class QueryCountMixin:
+    """Assertions on the number of SQL queries an endpoint runs."""
+
+    def count_queries(self, request):
+        """
+        Run `request` and return (queries, response).
+        Streaming responses are consumed so their queries are counted too.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = request()
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        return context.captured_queries, response
+
+    def assertConstantQueries(self, request, grow, expected=None):
+        """
+        Assert that `request` runs the same number of queries before and after
+        `grow()` adds rows it returns, optionally pinned to `expected`.
+        Commit hooks of `grow()` run, so caches see the rows as committed.
+        """
+        before, response = self.count_queries(request)
+        self.assertLess(response.status_code, 300, getattr(response, 'data', response))
+        with self.captureOnCommitCallbacks(execute=True):
+            grow()
+        after, response = self.count_queries(request)
+        self.assertLess(response.status_code, 300, getattr(response, 'data', response))
+
+        self.assertEqual(
+            len(before), len(after),
+            'Query count grows with the data:\n' + '\n'.join(query['sql'] for query in after)
+        )
+        if expected is not None:
+            self.assertEqual(
+                len(after), expected,
+                '\n'.join(query['sql'] for query in after)
+            )
+        return len(after)
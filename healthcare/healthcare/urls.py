@@ -19,6 +19,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from monitoring.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     
@@ -30,6 +32,11 @@ urlpatterns = [
     path('api/patients/', include('patients.urls')),
     path('api/doctors/', include('doctors.urls')),
     path('api/mappings/', include('mappings.urls')),
+    path('api/stats/', include('analytics.urls')),
+    path('api/monitoring/', include('monitoring.urls')),
+    
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve static files in development
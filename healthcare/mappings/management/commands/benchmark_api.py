@@ -0,0 +1,318 @@
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from healthcare.benchmarking import latency_summary, format_latency
+
+SEARCH_TERMS = [
+    'cardio', 'derma', 'neuro', 'ortho', 'pedia', 'psych', 'surg', 'onco',
+    'mumbai', 'pune', 'delhi', 'chennai', 'sharma', 'patel', 'reddy', 'iyer', 'mbbs',
+]
+DEFAULT_MIX = 'doctor_search=4,patient_list=4,mapping_create=1,mapping_update=1'
+
+
+class ApiClient:
+    """One keep-alive HTTP connection to the API, authenticated with a bearer token."""
+
+    def __init__(self, base_url, token=None, timeout=30):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+        self.token = token
+
+    def request(self, method, path, body=None):
+        """Send a request and return (status, parsed JSON body or None, elapsed ms)."""
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            # Drop the broken connection; the next request reconnects
+            self.connection.close()
+            return 0, None, (time.perf_counter() - started) * 1000
+        elapsed = (time.perf_counter() - started) * 1000
+
+        try:
+            data = json.loads(payload) if payload else None
+        except ValueError:
+            data = None
+        return response.status, data, elapsed
+
+
+class Command(BaseCommand):
+    """
+    Drive a running API server with a mixed workload and report latency per endpoint.
+    Seed data first (seed_healthcare) and start the server separately, e.g.
+    `python manage.py runserver` or gunicorn.
+
+    Example:
+        python manage.py benchmark_api --email seed0.user0@example.com --duration 60 --concurrency 16 --output run.json
+    """
+    help = 'Load-test the REST API over HTTP and report throughput and p50/p95/p99 latency per endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server to benchmark')
+        parser.add_argument('--email', default='seed0.user0@example.com', help='User to log in as')
+        parser.add_argument('--password', default='SeedPass123!', help='Password of the user')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run the workload')
+        parser.add_argument('--warmup', type=float, default=3, help='Seconds of unrecorded warm-up traffic')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help='Relative weights of the operations, e.g. "doctor_search=4,patient_list=4"')
+        parser.add_argument('--page-size', type=int, default=20, help='page_size of list requests')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--output', help='Write the results as JSON to this file ("-" for stdout)')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.operations = self.parse_mix(options['mix'])
+
+        self.token = self.login()
+        self.patient_ids, self.doctor_ids, self.mapping_ids = self.load_ids()
+        self.unmapped_pairs = self.load_unmapped_pairs()
+        self.mapping_lock = threading.Lock()
+
+        if options['warmup'] > 0:
+            self.stdout.write(f"Warming up for {options['warmup']:.0f}s...")
+            self.run_workload(options['warmup'], record=False)
+
+        self.stdout.write(
+            f"Running {', '.join(f'{name}={weight}' for name, weight in self.operations)} "
+            f"for {options['duration']:.0f}s with {options['concurrency']} clients against {options['base_url']}"
+        )
+        timings, statuses, elapsed = self.run_workload(options['duration'], record=True)
+
+        results = self.summarize(timings, statuses, elapsed)
+        self.report(results)
+
+        if options['output']:
+            document = json.dumps(results, indent=2)
+            if options['output'] == '-':
+                self.stdout.write(document)
+            else:
+                with open(options['output'], 'w') as output:
+                    output.write(document + '\n')
+                self.stdout.write(f"Results written to {options['output']}")
+
+    def parse_mix(self, mix):
+        """Parse "name=weight,..." into [(operation name, weight)]."""
+        operations = []
+        for item in mix.split(','):
+            name, _, weight = item.partition('=')
+            name = name.strip()
+            if not hasattr(self, f'op_{name}'):
+                raise CommandError(f'Unknown operation "{name}" in --mix')
+            try:
+                operations.append((name, float(weight or 1)))
+            except ValueError:
+                raise CommandError(f'Invalid weight "{weight}" in --mix')
+        return operations
+
+    def login(self):
+        """Log in through UserLoginView and return the access token."""
+        client = ApiClient(self.options['base_url'])
+        status, data, _elapsed = client.request('POST', '/api/auth/login/', {
+            'email': self.options['email'],
+            'password': self.options['password'],
+        })
+        if status != 200:
+            raise CommandError(f"Login as {self.options['email']} failed with status {status}: {data}")
+        return data['data']['tokens']['access']
+
+    def load_ids(self):
+        """
+        Collect patient, doctor and mapping ids the workload picks from.
+        Only active patients and active, available doctors are collected, so
+        that assigning one to the other is valid.
+        """
+        client = ApiClient(self.options['base_url'], self.token)
+        ids = []
+        for path, filters in (
+            ('/api/patients/', '&is_active=true'),
+            ('/api/doctors/', '&is_active=true&is_available=true'),
+            ('/api/mappings/', ''),
+        ):
+            status, data, _elapsed = client.request('GET', f'{path}?pagination=cursor&page_size=100{filters}')
+            if status != 200:
+                raise CommandError(f'GET {path} failed with status {status}')
+            ids.append([item['id'] for item in data['results']['data']])
+
+        patient_ids, doctor_ids, mapping_ids = ids
+        if not patient_ids or not doctor_ids:
+            raise CommandError('The user needs patients and doctors; run seed_healthcare first')
+        return patient_ids, doctor_ids, mapping_ids
+
+    def load_unmapped_pairs(self):
+        """
+        Return the (patient, doctor) pairs that are not assigned yet, shuffled.
+        mapping_create takes each pair once, so its requests are expected to
+        succeed and any non-2xx status is a real error.
+        """
+        if not {'mapping_create', 'mapping_update'} & set(dict(self.operations)):
+            return []
+
+        client = ApiClient(self.options['base_url'], self.token)
+        pairs = []
+        for patient_id in self.patient_ids:
+            status, data, _elapsed = client.request('GET', f'/api/mappings/{patient_id}/?fields=doctor')
+            if status != 200:
+                raise CommandError(f'GET /api/mappings/{patient_id}/ failed with status {status}')
+            assigned = {mapping['doctor'] for mapping in data['data']['mappings']}
+            pairs.extend((patient_id, doctor_id) for doctor_id in self.doctor_ids if doctor_id not in assigned)
+
+        if not pairs and not self.mapping_ids:
+            raise CommandError('Every patient is already assigned to every doctor; seed more data')
+        random.Random(self.options['seed']).shuffle(pairs)
+        return pairs
+
+    def run_workload(self, duration, record):
+        """Run the operation mix on every client until `duration` elapses."""
+        timings = defaultdict(list)
+        statuses = defaultdict(lambda: defaultdict(int))
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def client_loop(index):
+            rng = random.Random(f"{self.options['seed']}:{index}:{record}")
+            client = ApiClient(self.options['base_url'], self.token)
+            state = {'next_page': None}
+            names = [name for name, _weight in self.operations]
+            weights = [weight for _name, weight in self.operations]
+
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                status, elapsed = getattr(self, f'op_{name}')(client, rng, state)
+                if record:
+                    with lock:
+                        timings[name].append(elapsed)
+                        statuses[name][status] += 1
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client_loop, args=(index,)) for index in range(self.options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return timings, statuses, time.perf_counter() - started
+
+    def op_doctor_search(self, client, rng, state):
+        query = urlencode({'search': rng.choice(SEARCH_TERMS), 'page_size': self.options['page_size']})
+        status, _data, elapsed = client.request('GET', f'/api/doctors/?{query}')
+        return status, elapsed
+
+    def op_patient_list(self, client, rng, state):
+        """Page through the patient list with cursor pagination, one page per call."""
+        path = state['next_page'] or f"/api/patients/?pagination=cursor&page_size={self.options['page_size']}"
+        status, data, elapsed = client.request('GET', path)
+        next_url = data.get('next') if status == 200 and data else None
+        state['next_page'] = self.relative_path(next_url) if next_url else None
+        return status, elapsed
+
+    def op_mapping_create(self, client, rng, state):
+        with self.mapping_lock:
+            pair = self.unmapped_pairs.pop() if self.unmapped_pairs else None
+            can_update = bool(self.mapping_ids)
+        if pair is None:
+            # Every loaded pair is assigned; keep the write load with updates
+            return self.op_mapping_update(client, rng, state) if can_update else (0, 0.0)
+        status, data, elapsed = client.request('POST', '/api/mappings/', {
+            'patient': pair[0],
+            'doctor': pair[1],
+            'reason': 'Load test',
+        })
+        if status == 201:
+            with self.mapping_lock:
+                self.mapping_ids.append(data['data']['id'])
+        return status, elapsed
+
+    def op_mapping_update(self, client, rng, state):
+        with self.mapping_lock:
+            mapping_id = rng.choice(self.mapping_ids) if self.mapping_ids else None
+        if mapping_id is None:
+            return self.op_mapping_create(client, rng, state)
+        status, _data, elapsed = client.request('PATCH', f'/api/mappings/detail/{mapping_id}/', {
+            'notes': f'Load test update {rng.randint(1, 10**6)}',
+        })
+        return status, elapsed
+
+    def relative_path(self, url):
+        """Strip scheme, host and the base URL prefix from an absolute next link."""
+        parts = urlsplit(url)
+        path = parts.path
+        prefix = urlsplit(self.options['base_url']).path.rstrip('/')
+        if prefix and path.startswith(prefix):
+            path = path[len(prefix):]
+        return f'{path}?{parts.query}' if parts.query else path
+
+    def summarize(self, timings, statuses, elapsed):
+        endpoints = {}
+        for name, _weight in self.operations:
+            values = sorted(timings.get(name, []))
+            endpoints[name] = self.latency_summary(values, elapsed)
+            endpoints[name]['statuses'] = {str(code): count for code, count in sorted(statuses[name].items())}
+            endpoints[name]['errors'] = sum(
+                count for code, count in statuses[name].items() if not 200 <= code < 300
+            )
+
+        all_values = sorted(value for values in timings.values() for value in values)
+        total = self.latency_summary(all_values, elapsed)
+        total['errors'] = sum(endpoint['errors'] for endpoint in endpoints.values())
+
+        return {
+            'meta': {
+                'started_at': datetime.now(timezone.utc).isoformat(),
+                'commit': self.git_commit(),
+                'base_url': self.options['base_url'],
+                'duration_s': round(elapsed, 3),
+                'concurrency': self.options['concurrency'],
+                'mix': {name: weight for name, weight in self.operations},
+                'page_size': self.options['page_size'],
+                'seed': self.options['seed'],
+            },
+            'endpoints': endpoints,
+            'total': total,
+        }
+
+    def latency_summary(self, values, elapsed):
+        """Request count, throughput and latency percentiles (ms) of sorted timings."""
+        if not values:
+            return {'requests': 0, 'throughput_rps': 0.0}
+        return {**latency_summary(values), 'throughput_rps': round(len(values) / elapsed, 2)}
+
+    def git_commit(self):
+        """Commit of the working tree, so runs can be compared across commits."""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def report(self, results):
+        """Print one line per endpoint and a total."""
+        rows = list(results['endpoints'].items()) + [('total', results['total'])]
+        for name, summary in rows:
+            if not summary['requests']:
+                self.stdout.write(f'{name:<15} no requests')
+                continue
+            self.stdout.write(format_latency(name, summary, width=15, extra=(
+                f"rps={summary['throughput_rps']:.1f}",
+                f"errors={summary['errors']}",
+            )))
@@ -0,0 +1,305 @@
+import multiprocessing
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from patients.models import Patient
+from doctors.models import Doctor
+from doctors.cache import bump_list_version
+from doctors.search import refresh_search_vector
+from mappings.models import PatientDoctorMapping
+from analytics.stats import invalidate_user_stats
+
+User = get_user_model()
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kabir', 'Kavya', 'Meera', 'Neha',
+    'Nikhil', 'Pooja', 'Priya', 'Rahul', 'Riya', 'Rohan', 'Sahil', 'Sneha', 'Tara', 'Vikram',
+]
+LAST_NAMES = [
+    'Bose', 'Desai', 'Gupta', 'Iyer', 'Joshi', 'Kapoor', 'Kavade', 'Kumar', 'Menon', 'Mehta',
+    'Nair', 'Pandey', 'Patel', 'Rao', 'Reddy', 'Saxena', 'Sharma', 'Singh', 'Verma', 'Yadav',
+]
+CITIES = [
+    ('Mumbai', 'Maharashtra', '400001'), ('Pune', 'Maharashtra', '411001'),
+    ('Delhi', 'Delhi', '110001'), ('Bengaluru', 'Karnataka', '560001'),
+    ('Chennai', 'Tamil Nadu', '600001'), ('Hyderabad', 'Telangana', '500001'),
+    ('Kolkata', 'West Bengal', '700001'), ('Ahmedabad', 'Gujarat', '380001'),
+    ('Jaipur', 'Rajasthan', '302001'), ('Lucknow', 'Uttar Pradesh', '226001'),
+]
+QUALIFICATIONS = ['MBBS', 'MBBS, MD', 'MBBS, MS', 'MBBS, DNB', 'MBBS, MD, DM']
+RELATIONS = ['Spouse', 'Parent', 'Sibling', 'Child', 'Friend']
+GENDERS = [value for value, _label in Patient.GENDER_CHOICES]
+BLOOD_GROUPS = [value for value, _label in Patient.BLOOD_GROUP_CHOICES] + [None]
+SPECIALIZATIONS = [value for value, _label in Doctor.SPECIALIZATION_CHOICES]
+CLOSED_STATUSES = ['INACTIVE', 'COMPLETED']
+
+# Generator of a worker process, set by init_worker when the process starts
+worker_generator = None
+
+
+def init_worker(generator):
+    global worker_generator
+    worker_generator = generator
+
+
+def seed_user_in_worker(job):
+    return worker_generator.seed_user(*job)
+
+
+class PatientGenerator:
+    """
+    Builds and inserts one user's patients and their mappings.
+    Each user gets its own random stream derived from the seed, so the data does
+    not depend on how users are spread over worker processes.
+    """
+
+    def __init__(self, seed, today, batch_size, doctor_ids, unavailable_ids, per_user, mappings_per_patient):
+        self.seed = seed
+        self.today = today
+        self.batch_size = batch_size
+        self.doctor_ids = doctor_ids
+        self.unavailable_ids = unavailable_ids
+        self.per_user = per_user
+        self.mappings_per_patient = mappings_per_patient
+
+    def seed_user(self, user_id, user_index):
+        """Insert the user's patients and mappings batch by batch; return (patients, mappings)."""
+        self.rng = random.Random(f'{self.seed}:{user_index}')
+        patients_created = 0
+        mappings_created = 0
+
+        for start in range(0, self.per_user, self.batch_size):
+            batch = [self.build_patient(user_id) for _ in range(min(self.batch_size, self.per_user - start))]
+
+            with transaction.atomic():
+                created = Patient.objects.bulk_create(batch)
+                mappings = [mapping for patient in created for mapping in self.build_mappings(patient)]
+                PatientDoctorMapping.objects.bulk_create(mappings, batch_size=self.batch_size)
+
+            patients_created += len(created)
+            mappings_created += len(mappings)
+
+        return patients_created, mappings_created
+
+    def phone(self):
+        """A phone number accepted by the models' phone_regex."""
+        return f'+91{self.rng.randint(6000000000, 9999999999)}'
+
+    def build_patient(self, user_id):
+        rng = self.rng
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        city, state, postal_code = rng.choice(CITIES)
+        phone = self.phone()
+
+        return Patient(
+            first_name=first_name,
+            last_name=last_name,
+            email=f'{first_name.lower()}.{last_name.lower()}{rng.randint(1, 10**6)}@example.com',
+            phone=phone,
+            phone_digits=Patient.normalize_phone(phone),
+            date_of_birth=self.today - timedelta(days=rng.randint(1, 365 * 90)),
+            gender=rng.choice(GENDERS),
+            blood_group=rng.choice(BLOOD_GROUPS),
+            address=f'{rng.randint(1, 999)} Main Road',
+            city=city,
+            state=state,
+            postal_code=postal_code,
+            emergency_contact_name=f'{rng.choice(FIRST_NAMES)} {last_name}',
+            emergency_contact_phone=self.phone(),
+            emergency_contact_relation=rng.choice(RELATIONS),
+            created_by_id=user_id,
+        )
+
+    def build_mappings(self, patient):
+        """Assign distinct doctors; only available doctors get ACTIVE mappings."""
+        mappings = []
+
+        for doctor_id in self.rng.sample(self.doctor_ids, self.mappings_per_patient):
+            if doctor_id not in self.unavailable_ids and self.rng.random() < 0.7:
+                status = 'ACTIVE'
+            else:
+                status = self.rng.choice(CLOSED_STATUSES)
+
+            mappings.append(PatientDoctorMapping(
+                patient_id=patient.pk,
+                doctor_id=doctor_id,
+                status=status,
+                created_by_id=patient.created_by_id,
+            ))
+
+        return mappings
+
+
+class Command(BaseCommand):
+    """
+    Generate synthetic users, doctors, patients and mappings for load testing.
+
+    Rows satisfy the model validators and Doctor/PatientDoctorMapping.clean rules,
+    and are inserted with bulk_create. The same --seed always produces the same data;
+    identifiers include the seed, so different seeds can be loaded side by side.
+
+    Example:
+        python manage.py seed_healthcare --users 100 --patients-per-user 10000 --doctors 50000 --mappings-per-patient 3
+    """
+    help = 'Seed the database with synthetic users, doctors, patients and patient-doctor mappings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help='Users to create')
+        parser.add_argument('--patients-per-user', type=int, default=1000, help='Patients created for each user')
+        parser.add_argument('--doctors', type=int, default=500, help='Doctors to create, spread over the users')
+        parser.add_argument('--mappings-per-patient', type=int, default=2, help='Distinct doctors assigned to each patient')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create batch size')
+        parser.add_argument('--password', default='SeedPass123!', help='Password of every seeded user')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes inserting patients in parallel, each with its own connection')
+
+    def handle(self, *args, **options):
+        users_count = options['users']
+        doctors_count = options['doctors']
+        mappings_per_patient = options['mappings_per_patient']
+
+        if users_count < 1:
+            raise CommandError('--users must be at least 1')
+        if mappings_per_patient > doctors_count:
+            raise CommandError('--mappings-per-patient cannot exceed --doctors')
+
+        self.seed = options['seed']
+        self.batch_size = options['batch_size']
+        self.rng = random.Random(self.seed)
+        self.today = date.today()
+
+        if User.objects.filter(email=self.user_email(0)).exists():
+            raise CommandError(f"Seed {self.seed} is already loaded; pick another --seed")
+
+        started = time.perf_counter()
+        users = self.create_users(users_count, options['password'])
+        doctor_ids, unavailable_ids = self.create_doctors(users, doctors_count)
+        generator = PatientGenerator(
+            self.seed, self.today, self.batch_size, doctor_ids, unavailable_ids,
+            options['patients_per_user'], mappings_per_patient
+        )
+        patients, mappings = self.create_patients(users, generator, options['workers'])
+
+        for user in users:
+            invalidate_user_stats(user.pk)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for table in ('users', 'doctors', 'patients', 'patient_doctor_mappings'):
+                    cursor.execute(f'ANALYZE {table}')
+
+        elapsed = time.perf_counter() - started
+        total = len(users) + len(doctor_ids) + patients + mappings
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users, {len(doctor_ids)} doctors, {patients} patients and '
+            f'{mappings} mappings ({total} rows) in {elapsed:.1f}s ({total / elapsed:.0f} rows/s)'
+        ))
+        self.stdout.write(f"Seeded users log in as {self.user_email(0)} ... with password {options['password']}")
+
+    def user_email(self, index):
+        return f'seed{self.seed}.user{index}@example.com'
+
+    def create_users(self, count, password):
+        # Hashing is deliberately slow, so every seeded user shares one hash
+        password_hash = make_password(password)
+        users = [
+            User(
+                email=self.user_email(index),
+                username=self.user_email(index),
+                name=f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}',
+                password=password_hash,
+            )
+            for index in range(count)
+        ]
+        return User.objects.bulk_create(users, batch_size=self.batch_size)
+
+    def create_doctors(self, users, count):
+        """Create doctors round-robin over the users; return (all ids, set of unavailable ids)."""
+        doctor_ids = []
+        unavailable_ids = set()
+
+        for start in range(0, count, self.batch_size):
+            batch = [self.build_doctor(index, users[index % len(users)])
+                     for index in range(start, min(start + self.batch_size, count))]
+
+            with transaction.atomic():
+                created = Doctor.objects.bulk_create(batch)
+                ids = [doctor.pk for doctor in created]
+                # bulk_create skips Doctor.save, which maintains the search document
+                refresh_search_vector(Doctor.objects.filter(pk__in=ids))
+
+            doctor_ids.extend(ids)
+            unavailable_ids.update(doctor.pk for doctor in created if not doctor.is_available)
+            self.stdout.write(f'  doctors: {len(doctor_ids)}/{count}')
+
+        # bulk_create sends no post_save signals
+        bump_list_version()
+        return doctor_ids, unavailable_ids
+
+    def build_doctor(self, index, user):
+        rng = self.rng
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        city, state, postal_code = rng.choice(CITIES)
+        # Doctor.clean counts age in calendar years: 23 or older, experience <= age - 23
+        age = rng.randint(25, 70)
+        date_of_birth = date(self.today.year - age, rng.randint(1, 12), rng.randint(1, 28))
+
+        return Doctor(
+            first_name=first_name,
+            last_name=last_name,
+            email=f'{first_name.lower()}.{last_name.lower()}.s{self.seed}d{index}@example.com',
+            phone=f'+91{rng.randint(6000000000, 9999999999)}',
+            date_of_birth=date_of_birth,
+            gender=rng.choice(GENDERS),
+            specialization=rng.choice(SPECIALIZATIONS),
+            qualification=rng.choice(QUALIFICATIONS),
+            license_number=f'S{self.seed}D{index:09d}',
+            experience_years=rng.randint(0, min(age - 23, 60)),
+            clinic_name=f'{last_name} Clinic',
+            clinic_address=f'{rng.randint(1, 999)} Hospital Road',
+            city=city,
+            state=state,
+            postal_code=postal_code,
+            consultation_fee=Decimal(rng.randrange(200, 3000, 50)),
+            available_days='Monday to Saturday',
+            available_time='9:00 AM - 5:00 PM',
+            is_available=rng.random() < 0.9,
+            created_by=user,
+        )
+
+    def create_patients(self, users, generator, workers):
+        """Create every user's patients and mappings, in worker processes when asked; return the counts."""
+        jobs = [(user.pk, index) for index, user in enumerate(users)]
+        patients_created = 0
+        mappings_created = 0
+
+        if workers > 1:
+            # Forked workers must not share the parent's database connection
+            connections.close_all()
+            pool = multiprocessing.get_context('fork').Pool(workers, initializer=init_worker, initargs=(generator,))
+            results = pool.imap_unordered(seed_user_in_worker, jobs)
+        else:
+            pool = None
+            results = (generator.seed_user(*job) for job in jobs)
+
+        try:
+            for done, (patients, mappings) in enumerate(results, start=1):
+                patients_created += patients
+                mappings_created += mappings
+                self.stdout.write(f'  users: {done}/{len(jobs)}, patients: {patients_created}, mappings: {mappings_created}')
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return patients_created, mappings_created
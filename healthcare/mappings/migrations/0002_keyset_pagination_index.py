@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0002_keyset_pagination_index'),
+        ('mappings', '0001_initial'),
+        ('patients', '0002_keyset_pagination_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patientdoctormapping',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='patient_doc_created_8721f0_idx'),
+        ),
+    ]
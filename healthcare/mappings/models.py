@@ -71,6 +71,7 @@ class PatientDoctorMapping(models.Model):
             models.Index(fields=['patient', 'status']),
             models.Index(fields=['doctor', 'status']),
             models.Index(fields=['created_by']),
+            models.Index(fields=['created_by', 'created_at', 'id']),
             models.Index(fields=['assigned_date']),
         ]
     
@@ -1,8 +1,11 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
 from .models import PatientDoctorMapping
 from patients.models import Patient
 from doctors.models import Doctor
+from authentication.utils import SparseFieldsetMixin
 
 
 class PatientBasicSerializer(serializers.ModelSerializer):
@@ -38,7 +41,7 @@ class DoctorBasicSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
-class PatientDoctorMappingSerializer(serializers.ModelSerializer):
+class PatientDoctorMappingSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Patient-Doctor Mapping with full details.
     """
@@ -127,7 +130,7 @@ class PatientDoctorMappingSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class PatientDoctorMappingListSerializer(serializers.ModelSerializer):
+class PatientDoctorMappingListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for listing mappings.
     """
@@ -186,4 +189,161 @@ class PatientDoctorMappingUpdateSerializer(serializers.ModelSerializer):
                     f"Invalid status transition from {current_status} to {value}."
                 )
         
-        return value
\ No newline at end of file
+        return value
+
+
+class PatientDoctorMappingBulkItemSerializer(serializers.Serializer):
+    """
+    One assignment in a bulk request.
+    Patient and doctor are plain ids; they are resolved for the whole
+    batch in PatientDoctorMappingBulkSerializer.validate.
+    """
+    patient = serializers.IntegerField(min_value=1)
+    doctor = serializers.IntegerField(min_value=1)
+    status = serializers.ChoiceField(
+        choices=PatientDoctorMapping.STATUS_CHOICES,
+        default='ACTIVE'
+    )
+    reason = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class PatientDoctorMappingBulkSerializer(serializers.Serializer):
+    """
+    Serializer for assigning many doctors to patients in one request.
+    Loads every referenced patient and doctor in one query each, checks
+    existing pairs in one query and inserts with bulk_create.
+    """
+    mappings = PatientDoctorMappingBulkItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.BULK_IMPORT_MAX_BATCH_SIZE
+    )
+    ignore_conflicts = serializers.BooleanField(default=False)
+    
+    def validate(self, attrs):
+        """
+        Apply the PatientDoctorMappingSerializer rules to every item.
+        Already assigned pairs, and pairs repeated within the request, are
+        errors unless ignore_conflicts is set, in which case they are skipped
+        with the reason 'already_assigned' or 'duplicate'.
+        """
+        user = self.context['request'].user
+        items = attrs['mappings']
+        ignore_conflicts = attrs['ignore_conflicts']
+        
+        patients = Patient.objects.only(
+            'id', 'first_name', 'last_name', 'is_active', 'created_by_id'
+        ).in_bulk({item['patient'] for item in items})
+        doctors = Doctor.objects.only(
+            'id', 'first_name', 'last_name', 'specialization', 'is_active', 'is_available'
+        ).in_bulk({item['doctor'] for item in items})
+        assigned_pairs = set(
+            PatientDoctorMapping.objects.filter(
+                patient_id__in=patients.keys(),
+                doctor_id__in=doctors.keys()
+            ).values_list('patient_id', 'doctor_id')
+        )
+        
+        errors = []
+        pending = []
+        skipped = []
+        # Position of the item that first requested each pair
+        requested = {}
+        
+        for index, item in enumerate(items):
+            item_errors = {}
+            patient = patients.get(item['patient'])
+            doctor = doctors.get(item['doctor'])
+            
+            if patient is None:
+                item_errors['patient'] = [f"Invalid pk \"{item['patient']}\" - object does not exist."]
+            elif patient.created_by_id != user.id:
+                item_errors['patient'] = ["You can only assign doctors to your own patients."]
+            elif not patient.is_active:
+                item_errors['patient'] = ["Cannot assign doctor to an inactive patient."]
+            
+            if doctor is None:
+                item_errors['doctor'] = [f"Invalid pk \"{item['doctor']}\" - object does not exist."]
+            elif not doctor.is_active:
+                item_errors['doctor'] = ["Cannot assign an inactive doctor."]
+            elif not doctor.is_available:
+                item_errors['doctor'] = ["This doctor is currently not accepting new patients."]
+            
+            pair = (item['patient'], item['doctor'])
+            if not item_errors and pair in requested:
+                if ignore_conflicts:
+                    skipped.append({'patient': pair[0], 'doctor': pair[1], 'reason': 'duplicate'})
+                else:
+                    item_errors['non_field_errors'] = [
+                        f"Duplicate of item {requested[pair]} in this request."
+                    ]
+            elif not item_errors and pair in assigned_pairs:
+                if ignore_conflicts:
+                    skipped.append({'patient': pair[0], 'doctor': pair[1], 'reason': 'already_assigned'})
+                else:
+                    item_errors['non_field_errors'] = [
+                        f"Doctor {doctor.full_name} is already assigned to patient {patient.full_name}."
+                    ]
+            elif not item_errors:
+                requested[pair] = index
+                pending.append(PatientDoctorMapping(
+                    patient=patient,
+                    doctor=doctor,
+                    status=item['status'],
+                    reason=item.get('reason'),
+                    notes=item.get('notes'),
+                    created_by=user
+                ))
+            
+            errors.append(item_errors)
+        
+        if any(errors):
+            raise serializers.ValidationError({'mappings': errors})
+        
+        attrs['pending'] = pending
+        attrs['skipped'] = skipped
+        return attrs
+    
+    def create(self, validated_data):
+        """
+        Insert all pending mappings with one bulk_create.
+        
+        A concurrent request may assign one of the pairs after validation, which
+        makes the insert fail. Without ignore_conflicts that is a ValidationError
+        naming the pairs; with it, they are moved to `skipped` and the rest are
+        inserted again, so only rows inserted by this request are returned.
+        """
+        pending = validated_data['pending']
+        
+        while pending:
+            try:
+                with transaction.atomic():
+                    return PatientDoctorMapping.objects.bulk_create(pending)
+            except IntegrityError:
+                taken = set(
+                    PatientDoctorMapping.objects.filter(
+                        patient_id__in={mapping.patient_id for mapping in pending},
+                        doctor_id__in={mapping.doctor_id for mapping in pending}
+                    ).values_list('patient_id', 'doctor_id')
+                )
+                conflicts = [mapping for mapping in pending if (mapping.patient_id, mapping.doctor_id) in taken]
+                if not conflicts:
+                    raise
+            
+            if not validated_data['ignore_conflicts']:
+                raise serializers.ValidationError({
+                    'non_field_errors': [
+                        f"Doctor {mapping.doctor.full_name} was assigned to patient "
+                        f"{mapping.patient.full_name} by another request."
+                        for mapping in conflicts
+                    ]
+                })
+            
+            validated_data['skipped'].extend(
+                {'patient': mapping.patient_id, 'doctor': mapping.doctor_id, 'reason': 'already_assigned'}
+                for mapping in conflicts
+            )
+            pending = [mapping for mapping in pending if (mapping.patient_id, mapping.doctor_id) not in taken]
+        
+        return []
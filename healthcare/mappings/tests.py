@@ -1,3 +1,317 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import PatientDoctorMapping
+from .serializers import PatientDoctorMappingBulkSerializer
+from healthcare.testing import (
+    QueryCountMixin,
+    create_user,
+    create_patient,
+    create_doctor,
+    create_doctors,
+    assign_doctors,
+)
+
+
+class PatientDoctorsViewTests(QueryCountMixin, APITestCase):
+    """Doctors assigned to a patient are fetched in a fixed number of queries."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.patient = create_patient(self.user)
+        self.client.force_authenticate(self.user)
+
+    def get_doctors(self, patient_id, **params):
+        return self.client.get(reverse('mappings:patient-doctors', args=[patient_id]), params)
+
+    def test_query_count_does_not_grow_with_mappings(self):
+        assign_doctors(self.user, self.patient, 1)
+        with self.assertNumQueries(1):
+            response = self.get_doctors(self.patient.id)
+        self.assertEqual(response.data['data']['doctors_count'], 1)
+
+        assign_doctors(self.user, self.patient, 9, start=1)
+        with self.assertNumQueries(1):
+            response = self.get_doctors(self.patient.id)
+        self.assertEqual(response.data['data']['doctors_count'], 10)
+        self.assertEqual(len(response.data['data']['mappings']), 10)
+
+    def test_patient_without_mappings(self):
+        with self.assertNumQueries(2):
+            response = self.get_doctors(self.patient.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['patient']['id'], self.patient.id)
+        self.assertEqual(response.data['data']['doctors_count'], 0)
+        self.assertEqual(response.data['data']['mappings'], [])
+
+    def test_status_filter(self):
+        mappings = assign_doctors(self.user, self.patient, 3)
+        mappings[0].status = 'COMPLETED'
+        mappings[0].save()
+
+        response = self.get_doctors(self.patient.id, status='active')
+
+        self.assertEqual(response.data['data']['doctors_count'], 2)
+        self.assertEqual(response.data['message'], f'Retrieved 2 doctor(s) for patient {self.patient.full_name}')
+
+    def test_other_users_patient_is_not_found(self):
+        other = create_user('other@example.com')
+        patient = create_patient(other)
+        assign_doctors(other, patient, 2)
+
+        response = self.get_doctors(patient.id)
+
+        self.assertEqual(response.status_code, 404)
+
+
+class MappingQueryCountTests(QueryCountMixin, APITestCase):
+    """Mapping endpoints run a fixed number of queries whatever the data size."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.patient = create_patient(self.user)
+        self.mappings = assign_doctors(self.user, self.patient, 2)
+        self.next_index = 100
+
+    def grow(self):
+        patient = create_patient(self.user, self.next_index)
+        assign_doctors(self.user, patient, 6, start=self.next_index)
+        assign_doctors(self.user, self.patient, 6, start=self.next_index + 50)
+        self.next_index += 100
+
+    def test_list(self):
+        url = reverse('mappings:mapping-list-create')
+        self.assertConstantQueries(lambda: self.client.get(url), self.grow, expected=2)
+
+    def test_list_with_cursor_pagination(self):
+        url = reverse('mappings:mapping-list-create')
+        self.assertConstantQueries(lambda: self.client.get(url, {'pagination': 'cursor'}), self.grow, expected=1)
+
+    def test_invalid_cursor_or_page(self):
+        url = reverse('mappings:mapping-list-create')
+        self.assertEqual(self.client.get(url, {'pagination': 'cursor', 'cursor': 'garbage'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'page': 999}).status_code, 404)
+
+    def test_search(self):
+        url = reverse('mappings:mapping-list-create')
+        self.assertConstantQueries(lambda: self.client.get(url, {'search': 'Number'}), self.grow, expected=2)
+
+    def test_create(self):
+        url = reverse('mappings:mapping-list-create')
+        doctors = iter(create_doctors(self.user, 2, start=900))
+        self.assertConstantQueries(
+            lambda: self.client.post(url, {'patient': self.patient.id, 'doctor': next(doctors).id}, format='json'),
+            self.grow
+        )
+
+    def test_bulk_create(self):
+        url = reverse('mappings:mapping-bulk-create')
+        batches = [create_doctors(self.user, 2, start=900), create_doctors(self.user, 25, start=1000)]
+        payloads = iter(
+            {'mappings': [{'patient': self.patient.id, 'doctor': doctor.id} for doctor in doctors]}
+            for doctors in batches
+        )
+
+        self.assertConstantQueries(lambda: self.client.post(url, next(payloads), format='json'), lambda: None)
+        self.assertEqual(PatientDoctorMapping.objects.filter(patient=self.patient).count(), 2 + 2 + 25)
+
+    def test_export(self):
+        url = reverse('mappings:mapping-export')
+        self.assertConstantQueries(lambda: self.client.get(url, {'export_format': 'ndjson'}), self.grow, expected=1)
+
+    def test_detail(self):
+        url = reverse('mappings:mapping-detail', args=[self.mappings[0].id])
+        self.assertConstantQueries(lambda: self.client.get(url), self.grow, expected=1)
+
+    def test_update(self):
+        url = reverse('mappings:mapping-detail', args=[self.mappings[0].id])
+        self.assertConstantQueries(lambda: self.client.patch(url, {'notes': 'Follow up'}, format='json'), self.grow)
+
+    def test_delete(self):
+        first, response = self.count_queries(
+            lambda: self.client.delete(reverse('mappings:mapping-detail', args=[self.mappings[0].id]))
+        )
+        self.assertEqual(response.status_code, 200)
+        self.grow()
+        second, response = self.count_queries(
+            lambda: self.client.delete(reverse('mappings:mapping-detail', args=[self.mappings[1].id]))
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(len(first), len(second))
+
+
+class MappingConditionalRequestTests(APITestCase):
+    """Mapping detail answers conditional requests from updated_at."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.mapping = assign_doctors(self.user, create_patient(self.user), 1)[0]
+        self.url = reverse('mappings:mapping-detail', args=[self.mapping.id])
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_match(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.patch(self.url, {'notes': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(self.url, {'notes': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.mapping.refresh_from_db()
+        self.assertEqual(self.mapping.notes, 'First')
+
+    def test_embedded_doctor_change_updates_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        doctor = self.mapping.doctor
+        doctor.consultation_fee = '999.00'
+        doctor.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = self.client.patch(self.url, {'notes': 'Stale'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+
+
+class MappingSparseFieldsetTests(QueryCountMixin, APITestCase):
+    """fields= only joins the related rows the selected fields read."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.patient = create_patient(self.user)
+        assign_doctors(self.user, self.patient, 2)
+
+    def test_list_joins_only_what_is_read(self):
+        url = reverse('mappings:mapping-list-create')
+        queries, response = self.count_queries(lambda: self.client.get(url, {'fields': 'id,patient_name,status'}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results']['data'][0]), {'id', 'patient_name', 'status'})
+        select = queries[-1]['sql']
+        self.assertIn('JOIN "patients"', select)
+        self.assertNotIn('JOIN "doctors"', select)
+
+    def test_patient_doctors(self):
+        url = reverse('mappings:patient-doctors', args=[self.patient.id])
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'fields': 'id,doctor_details'})
+
+        self.assertEqual(response.data['data']['patient']['full_name'], self.patient.full_name)
+        self.assertEqual(set(response.data['data']['mappings'][0]), {'id', 'doctor_details'})
+
+
+
+class MappingBulkCreateTests(APITestCase):
+    """Bulk assignment validates every item and reports skipped pairs."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.patient = create_patient(self.user)
+        self.assigned = assign_doctors(self.user, self.patient, 1)[0].doctor
+        self.doctors = create_doctors(self.user, 2, start=100)
+
+    def post(self, doctors, patient=None, **data):
+        return self.client.post(
+            reverse('mappings:mapping-bulk-create'),
+            {
+                'mappings': [{'patient': (patient or self.patient).id, 'doctor': doctor.id} for doctor in doctors],
+                **data
+            },
+            format='json'
+        )
+
+    def item_errors(self, response):
+        return response.data['error']['details']['mappings']
+
+    def test_already_assigned_pair(self):
+        response = self.post([self.doctors[0], self.assigned])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.item_errors(response)[0], {})
+        self.assertIn('already assigned', self.item_errors(response)[1]['non_field_errors'][0])
+        self.assertEqual(PatientDoctorMapping.objects.count(), 1)
+
+    def test_duplicate_within_request(self):
+        response = self.post([self.doctors[0], self.doctors[0]])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.item_errors(response)[1]['non_field_errors'], ['Duplicate of item 0 in this request.'])
+
+    def test_ignore_conflicts_reports_skip_reasons(self):
+        response = self.post([self.doctors[0], self.doctors[0], self.assigned], ignore_conflicts=True)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['created'], 1)
+        self.assertEqual(response.data['data']['skipped'], [
+            {'patient': self.patient.id, 'doctor': self.doctors[0].id, 'reason': 'duplicate'},
+            {'patient': self.patient.id, 'doctor': self.assigned.id, 'reason': 'already_assigned'},
+        ])
+
+    def test_other_users_patient(self):
+        patient = create_patient(create_user('other@example.com'), 50)
+
+        response = self.post(self.doctors, patient=patient)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            self.item_errors(response)[0]['patient'],
+            ['You can only assign doctors to your own patients.']
+        )
+
+    def test_inactive_or_unavailable_doctor(self):
+        inactive = create_doctor(self.user, 200, is_active=False)
+        unavailable = create_doctor(self.user, 201, is_available=False)
+
+        response = self.post([inactive, unavailable])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.item_errors(response)[0]['doctor'], ['Cannot assign an inactive doctor.'])
+        self.assertEqual(
+            self.item_errors(response)[1]['doctor'],
+            ['This doctor is currently not accepting new patients.']
+        )
+
+    def assign_concurrently(self, doctor):
+        """Patch validation so another request assigns `doctor` right after it."""
+        validate = PatientDoctorMappingBulkSerializer.validate
+
+        def validate_then_race(serializer, attrs):
+            attrs = validate(serializer, attrs)
+            PatientDoctorMapping.objects.create(patient=self.patient, doctor=doctor, created_by=self.user)
+            return attrs
+
+        return mock.patch.object(PatientDoctorMappingBulkSerializer, 'validate', validate_then_race)
+
+    def test_concurrent_assignment_is_a_conflict(self):
+        with self.assign_concurrently(self.doctors[1]):
+            response = self.post(self.doctors)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error']['message'], 'Conflicting assignment')
+        self.assertFalse(PatientDoctorMapping.objects.filter(doctor=self.doctors[0]).exists())
+
+    def test_concurrent_assignment_is_skipped_with_ignore_conflicts(self):
+        with self.assign_concurrently(self.doctors[1]):
+            response = self.post(self.doctors, ignore_conflicts=True)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['created'], 1)
+        self.assertEqual(response.data['data']['mappings'][0]['doctor'], self.doctors[0].id)
+        self.assertEqual(response.data['data']['skipped'], [
+            {'patient': self.patient.id, 'doctor': self.doctors[1].id, 'reason': 'already_assigned'},
+        ])
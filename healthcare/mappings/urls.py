@@ -1,6 +1,8 @@
 from django.urls import path
 from .views import (
     PatientDoctorMappingListCreateView,
+    PatientDoctorMappingBulkCreateView,
+    PatientDoctorMappingExportView,
     PatientDoctorsView,
     PatientDoctorMappingDetailView
 )
@@ -11,6 +13,12 @@ urlpatterns = [
     # List all mappings and create new mapping
     path('', PatientDoctorMappingListCreateView.as_view(), name='mapping-list-create'),
     
+    # Assign many doctors to patients in one request
+    path('bulk/', PatientDoctorMappingBulkCreateView.as_view(), name='mapping-bulk-create'),
+    
+    # Stream all mappings as CSV/NDJSON
+    path('export/', PatientDoctorMappingExportView.as_view(), name='mapping-export'),
+    
     # Get all doctors for a specific patient
     path('<int:patient_id>/', PatientDoctorsView.as_view(), name='patient-doctors'),
     
@@ -1,19 +1,35 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from rest_framework.exceptions import NotFound, ValidationError
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q
+from django.db.models.functions import Greatest
 
 from .models import PatientDoctorMapping
 from .serializers import (
     PatientDoctorMappingSerializer,
     PatientDoctorMappingListSerializer,
     PatientDoctorMappingUpdateSerializer,
+    PatientDoctorMappingBulkSerializer,
     DoctorBasicSerializer
 )
 from patients.models import Patient
-from authentication.utils import success_response, error_response
+from analytics.stats import invalidate_user_stats
+from authentication.utils import (
+    success_response,
+    error_response,
+    SparseFieldset,
+    FieldsetError,
+    conditional_get,
+    set_validators,
+    has_if_match,
+    precondition_failed,
+    EXPORT_CONTENT_TYPES,
+    stream_export
+)
 
 
 class MappingPagination(PageNumberPagination):
@@ -23,6 +39,17 @@ class MappingPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class MappingCursorPagination(CursorPagination):
+    """
+    Keyset pagination for mapping list.
+    Seeks on (created_at, id) instead of OFFSET and skips the COUNT query.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
 class PatientDoctorMappingListCreateView(APIView):
     """
     API endpoint for listing and creating patient-doctor mappings.
@@ -31,6 +58,16 @@ class PatientDoctorMappingListCreateView(APIView):
     """
     permission_classes = [IsAuthenticated]
     pagination_class = MappingPagination
+    cursor_pagination_class = MappingCursorPagination
+    
+    def get_paginator(self, request):
+        """
+        Return the paginator for this request.
+        Cursor (keyset) pagination is opt-in via ?pagination=cursor.
+        """
+        if request.query_params.get('pagination') == 'cursor':
+            return self.cursor_pagination_class()
+        return self.pagination_class()
     
     def get(self, request):
         """
@@ -44,11 +81,20 @@ class PatientDoctorMappingListCreateView(APIView):
         - search: Search by patient or doctor name
         - page: Page number
         - page_size: Number of items per page
+        - pagination: Set to 'cursor' for keyset pagination (no total count)
+        - cursor: Opaque cursor taken from the next/previous links
+        - fields: Comma-separated fields to return (e.g. id,full_name)
+        - exclude: Comma-separated fields to leave out
         """
         try:
-            # Get mappings where user created the patient
+            fieldset = SparseFieldset.from_request(request, PatientDoctorMappingListSerializer)
+            
+            # Get mappings where user created the patient.
+            # created_by always matches the patient's creator (see model clean),
+            # repeating it lets the (created_by, created_at, id) index serve the scan.
             queryset = PatientDoctorMapping.objects.filter(
-                patient__created_by=request.user
+                patient__created_by=request.user,
+                created_by=request.user
             ).select_related('patient', 'doctor', 'created_by')
             
             # Apply filters
@@ -75,12 +121,15 @@ class PatientDoctorMappingListCreateView(APIView):
                     Q(doctor__specialization__icontains=search)
                 )
             
+            # Read only the columns of the requested fields
+            queryset = fieldset.only(queryset, PatientDoctorMappingListSerializer, extra=['created_at'])
+            
             # Pagination
-            paginator = self.pagination_class()
+            paginator = self.get_paginator(request)
             paginated_queryset = paginator.paginate_queryset(queryset, request)
             
             # Serialize data
-            serializer = PatientDoctorMappingListSerializer(paginated_queryset, many=True)
+            serializer = PatientDoctorMappingListSerializer(paginated_queryset, many=True, fieldset=fieldset)
             
             # Return paginated response
             return paginator.get_paginated_response({
@@ -89,6 +138,21 @@ class PatientDoctorMappingListCreateView(APIView):
                 'data': serializer.data
             })
         
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        except NotFound as e:
+            # Bad cursor or page number
+            return error_response(
+                message="Invalid page",
+                details=str(e.detail),
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        
         except Exception as e:
             return error_response(
                 message="An error occurred while retrieving mappings",
@@ -111,6 +175,8 @@ class PatientDoctorMappingListCreateView(APIView):
         }
         """
         try:
+            fieldset = SparseFieldset.from_request(request, PatientDoctorMappingSerializer)
+            
             serializer = PatientDoctorMappingSerializer(
                 data=request.data,
                 context={'request': request}
@@ -120,7 +186,7 @@ class PatientDoctorMappingListCreateView(APIView):
                 mapping = serializer.save()
                 
                 return success_response(
-                    data=PatientDoctorMappingSerializer(mapping).data,
+                    data=PatientDoctorMappingSerializer(mapping, fieldset=fieldset).data,
                     message="Doctor assigned to patient successfully",
                     status_code=status.HTTP_201_CREATED
                 )
@@ -131,6 +197,13 @@ class PatientDoctorMappingListCreateView(APIView):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
         except Exception as e:
             return error_response(
                 message="An error occurred while creating mapping",
@@ -139,6 +212,137 @@ class PatientDoctorMappingListCreateView(APIView):
             )
 
 
+class PatientDoctorMappingBulkCreateView(APIView):
+    """
+    API endpoint for assigning many doctors to patients at once.
+    POST: Create mappings in bulk.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """
+        Create many patient-doctor mappings in one request.
+        The request is all-or-nothing: if any item is invalid nothing is created.
+        
+        Request body:
+        {
+            "mappings": [
+                {"patient": patient_id, "doctor": doctor_id, "reason": "...", "status": "ACTIVE"},
+                ...
+            ],
+            "ignore_conflicts": false (optional, skip pairs that are already assigned or repeated)
+        }
+        """
+        try:
+            fieldset = SparseFieldset.from_request(request, PatientDoctorMappingListSerializer)
+            
+            serializer = PatientDoctorMappingBulkSerializer(
+                data=request.data,
+                context={'request': request}
+            )
+            
+            if serializer.is_valid():
+                with transaction.atomic():
+                    mappings = serializer.save()
+                # bulk_create sends no post_save signals
+                invalidate_user_stats(request.user.id)
+                
+                response_data = {
+                    'created': len(mappings),
+                    'skipped': serializer.validated_data['skipped'],
+                    'mappings': PatientDoctorMappingListSerializer(mappings, many=True, fieldset=fieldset).data
+                }
+                
+                return success_response(
+                    data=response_data,
+                    message=f"{len(mappings)} doctor assignment(s) created successfully",
+                    status_code=status.HTTP_201_CREATED
+                )
+            
+            return error_response(
+                message="Validation failed",
+                details=serializer.errors,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        except ValidationError as e:
+            # A concurrent request assigned one of the pairs after validation
+            return error_response(
+                message="Conflicting assignment",
+                details=e.detail,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred while creating mappings",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class PatientDoctorMappingExportView(APIView):
+    """
+    API endpoint for exporting mappings.
+    GET: Stream mappings as CSV or NDJSON.
+    """
+    permission_classes = [IsAuthenticated]
+    export_fields = [
+        'id',
+        'patient',
+        'patient__first_name',
+        'patient__last_name',
+        'doctor',
+        'doctor__first_name',
+        'doctor__last_name',
+        'doctor__specialization',
+        'assigned_date',
+        'status',
+        'reason',
+        'notes',
+        'created_at',
+        'updated_at',
+    ]
+    
+    def get(self, request):
+        """
+        Export all patient-doctor mappings of the authenticated user.
+        The response is streamed from a server-side cursor in constant memory.
+        
+        Query Parameters:
+        - export_format: csv (default) or ndjson
+        """
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        
+        if export_format not in EXPORT_CONTENT_TYPES:
+            return error_response(
+                message="Unsupported export format",
+                details="export_format must be one of: " + ", ".join(EXPORT_CONTENT_TYPES),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            queryset = PatientDoctorMapping.objects.filter(
+                patient__created_by=request.user,
+                created_by=request.user
+            )
+            return stream_export(queryset, self.export_fields, export_format, 'mappings')
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred while exporting mappings",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class PatientDoctorsView(APIView):
     """
     API endpoint to get all doctors assigned to a specific patient.
@@ -154,31 +358,46 @@ class PatientDoctorsView(APIView):
         - status: Filter by mapping status (ACTIVE/INACTIVE/COMPLETED)
         """
         try:
-            # Check if patient exists and belongs to the user
-            try:
-                patient = Patient.objects.get(
-                    id=patient_id,
-                    created_by=request.user
-                )
-            except Patient.DoesNotExist:
-                return error_response(
-                    message="Patient not found",
-                    details="Patient does not exist or you don't have permission to access it",
-                    status_code=status.HTTP_404_NOT_FOUND
-                )
+            fieldset = SparseFieldset.from_request(request, PatientDoctorMappingSerializer)
             
-            # Get all mappings for this patient
+            # Mappings with everything the serializer reads, in a single query
             queryset = PatientDoctorMapping.objects.filter(
-                patient=patient
-            ).select_related('doctor')
+                patient_id=patient_id,
+                patient__created_by=request.user
+            ).select_related('patient', 'doctor', 'created_by')
             
             # Apply status filter if provided
             status_filter = request.query_params.get('status')
             if status_filter:
                 queryset = queryset.filter(status=status_filter.upper())
             
+            # Only the columns of the requested fields, plus the patient summary below
+            queryset = fieldset.only(queryset, PatientDoctorMappingSerializer, extra=[
+                'patient__first_name', 'patient__last_name', 'patient__date_of_birth',
+                'patient__phone', 'patient__email',
+            ])
+            
+            mappings = list(queryset)
+            
+            # The patient comes with its mappings; look it up only when there are none
+            if mappings:
+                patient = mappings[0].patient
+            else:
+                try:
+                    patient = Patient.objects.get(
+                        id=patient_id,
+                        created_by=request.user
+                    )
+                except Patient.DoesNotExist:
+                    return error_response(
+                        message="Patient not found",
+                        details="Patient does not exist or you don't have permission to access it",
+                        status_code=status.HTTP_404_NOT_FOUND
+                    )
+            
             # Serialize data
-            serializer = PatientDoctorMappingSerializer(queryset, many=True)
+            serializer = PatientDoctorMappingSerializer(mappings, many=True, fieldset=fieldset)
+            doctors_count = len(mappings)
             
             response_data = {
                 'patient': {
@@ -188,16 +407,23 @@ class PatientDoctorsView(APIView):
                     'phone': patient.phone,
                     'email': patient.email
                 },
-                'doctors_count': queryset.count(),
+                'doctors_count': doctors_count,
                 'mappings': serializer.data
             }
             
             return success_response(
                 data=response_data,
-                message=f"Retrieved {queryset.count()} doctor(s) for patient {patient.full_name}",
+                message=f"Retrieved {doctors_count} doctor(s) for patient {patient.full_name}",
                 status_code=status.HTTP_200_OK
             )
         
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
         except Exception as e:
             return error_response(
                 message="An error occurred while retrieving patient doctors",
@@ -206,21 +432,41 @@ class PatientDoctorsView(APIView):
             )
 
 
+def annotate_version(queryset):
+    """
+    Annotate `version`, the latest updated_at of a mapping and of the patient
+    and doctor embedded in its detail response.
+    """
+    return queryset.annotate(version=Greatest('updated_at', 'patient__updated_at', 'doctor__updated_at'))
+
+
 class PatientDoctorMappingDetailView(APIView):
     """
     API endpoint for managing a specific patient-doctor mapping.
     GET: Retrieve mapping details.
     PATCH: Update mapping status/notes.
     DELETE: Remove doctor from patient (delete mapping).
+    
+    Responses carry ETag and Last-Modified from the latest updated_at of
+    the mapping, its patient and its doctor, as the response embeds all
+    three. GET answers If-None-Match / If-Modified-Since with 304; updates
+    honour If-Match and fail with 412 when any of them changed in the meantime.
     """
     permission_classes = [IsAuthenticated]
     
-    def get_mapping(self, mapping_id, user):
-        """Helper method to get mapping and verify ownership."""
+    def get_mapping(self, mapping_id, user, for_update=False, fieldset=None):
+        """
+        Helper method to get mapping and verify ownership.
+        With for_update the mapping row stays locked until the transaction ends;
+        with a fieldset only the columns of the requested fields are read.
+        """
+        queryset = annotate_version(PatientDoctorMapping.objects.select_related('patient', 'doctor', 'created_by'))
+        if for_update:
+            queryset = queryset.select_for_update(of=('self',))
+        if fieldset is not None:
+            queryset = fieldset.only(queryset, PatientDoctorMappingSerializer, extra=['updated_at'])
         try:
-            return PatientDoctorMapping.objects.select_related(
-                'patient', 'doctor', 'created_by'
-            ).get(
+            return queryset.get(
                 id=mapping_id,
                 patient__created_by=user
             )
@@ -232,7 +478,17 @@ class PatientDoctorMappingDetailView(APIView):
         Get details of a specific mapping.
         """
         try:
-            mapping = self.get_mapping(pk, request.user)
+            fieldset = SparseFieldset.from_request(request, PatientDoctorMappingSerializer)
+            
+            not_modified = conditional_get(
+                request,
+                annotate_version(PatientDoctorMapping.objects.filter(id=pk, patient__created_by=request.user)),
+                field='version'
+            )
+            if not_modified is not None:
+                return not_modified
+            
+            mapping = self.get_mapping(pk, request.user, fieldset=fieldset)
             
             if not mapping:
                 return error_response(
@@ -241,13 +497,21 @@ class PatientDoctorMappingDetailView(APIView):
                     status_code=status.HTTP_404_NOT_FOUND
                 )
             
-            serializer = PatientDoctorMappingSerializer(mapping)
+            serializer = PatientDoctorMappingSerializer(mapping, fieldset=fieldset)
             
-            return success_response(
+            response = success_response(
                 data=serializer.data,
                 message="Mapping details retrieved successfully",
                 status_code=status.HTTP_200_OK
             )
+            return set_validators(response, mapping.version)
+        
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
         
         except Exception as e:
             return error_response(
@@ -267,33 +531,48 @@ class PatientDoctorMappingDetailView(APIView):
         }
         """
         try:
-            mapping = self.get_mapping(pk, request.user)
+            fieldset = SparseFieldset.from_request(request, PatientDoctorMappingSerializer)
             
-            if not mapping:
-                return error_response(
-                    message="Mapping not found",
-                    details="Mapping does not exist or you don't have permission to update it",
-                    status_code=status.HTTP_404_NOT_FOUND
+            with transaction.atomic():
+                mapping = self.get_mapping(pk, request.user, for_update=has_if_match(request))
+                
+                if not mapping:
+                    return error_response(
+                        message="Mapping not found",
+                        details="Mapping does not exist or you don't have permission to update it",
+                        status_code=status.HTTP_404_NOT_FOUND
+                    )
+                
+                failed = precondition_failed(request, mapping.version)
+                if failed is not None:
+                    return failed
+                
+                serializer = PatientDoctorMappingUpdateSerializer(
+                    mapping,
+                    data=request.data,
+                    partial=True
                 )
-            
-            serializer = PatientDoctorMappingUpdateSerializer(
-                mapping,
-                data=request.data,
-                partial=True
-            )
-            
-            if serializer.is_valid():
-                updated_mapping = serializer.save()
                 
-                return success_response(
-                    data=PatientDoctorMappingSerializer(updated_mapping).data,
-                    message="Mapping updated successfully",
-                    status_code=status.HTTP_200_OK
+                if serializer.is_valid():
+                    updated_mapping = serializer.save()
+                    
+                    response = success_response(
+                        data=PatientDoctorMappingSerializer(updated_mapping, fieldset=fieldset).data,
+                        message="Mapping updated successfully",
+                        status_code=status.HTTP_200_OK
+                    )
+                    return set_validators(response, max(mapping.version, updated_mapping.updated_at))
+                
+                return error_response(
+                    message="Validation failed",
+                    details=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
                 )
-            
+        
+        except FieldsetError as e:
             return error_response(
-                message="Validation failed",
-                details=serializer.errors,
+                message="Invalid field selection",
+                details=str(e),
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
@@ -0,0 +1,91 @@
+"""
+In-process latency histograms per route.
+
+Each worker process keeps its own histograms; they are reset when the
+process restarts.
+"""
+import threading
+
+# Upper bounds (ms) of the latency buckets; slower requests fall in the overflow bucket
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class RouteHistogram:
+    """Request latency distribution and totals for one route."""
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.queries = 0
+        self.max_queries = 0
+    
+    def observe(self, total_ms, db_ms, serializer_ms, queries):
+        index = next((i for i, bound in enumerate(self.buckets) if total_ms <= bound), len(self.buckets))
+        self.bucket_counts[index] += 1
+        self.count += 1
+        self.total_ms += total_ms
+        self.max_ms = max(self.max_ms, total_ms)
+        self.db_ms += db_ms
+        self.serializer_ms += serializer_ms
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+    
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (None past the last bound)."""
+        rank = p / 100 * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return None
+    
+    def as_dict(self):
+        bucket_labels = [f'le_{bound}' for bound in self.buckets] + ['gt_' + str(self.buckets[-1])]
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 2),
+            'max_ms': round(self.max_ms, 2),
+            'p50_ms_le': self.percentile(50),
+            'p95_ms_le': self.percentile(95),
+            'p99_ms_le': self.percentile(99),
+            'mean_db_ms': round(self.db_ms / self.count, 2),
+            'mean_serializer_ms': round(self.serializer_ms / self.count, 2),
+            'mean_queries': round(self.queries / self.count, 2),
+            'max_queries': self.max_queries,
+            'buckets': dict(zip(bucket_labels, self.bucket_counts)),
+        }
+
+
+class RequestHistograms:
+    """Thread-safe RouteHistogram registry keyed by 'METHOD route-name'."""
+    
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.routes = {}
+    
+    def observe(self, route, total_ms, db_ms, serializer_ms, queries):
+        with self.lock:
+            histogram = self.routes.get(route)
+            if histogram is None:
+                histogram = self.routes[route] = RouteHistogram(self.buckets)
+            histogram.observe(total_ms, db_ms, serializer_ms, queries)
+    
+    def snapshot(self):
+        """Per-route statistics, slowest total time first."""
+        with self.lock:
+            routes = sorted(self.routes.items(), key=lambda item: item[1].total_ms, reverse=True)
+            return {route: histogram.as_dict() for route, histogram in routes}
+    
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+
+
+request_histograms = RequestHistograms()
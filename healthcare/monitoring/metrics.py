@@ -0,0 +1,347 @@
+"""
+Lightweight Prometheus metrics registry.
+
+Counters, gauges and histograms live in process memory and are rendered
+in the Prometheus text exposition format by monitoring.views.metrics_view.
+
+With several worker processes (gunicorn), set METRICS_MULTIPROCESS_DIR to
+a directory shared by the workers. Each process then writes its samples
+to its own file there, at most every METRICS_FLUSH_INTERVAL seconds and
+whenever it serves a scrape; a scrape merges every file. Counters and
+histograms are summed over all files, including those of workers that
+have exited, so totals never go backwards. Gauges are summed over live
+processes only.
+
+Files are named metrics_<pid>_<random suffix>.json, so a new worker that
+gets the pid of an exited one never overwrites the exited worker's file.
+Before its first write the new worker marks such files dead (renamed to
+metrics_<pid>_<suffix>.dead.json), since no live process can hold its pid.
+"""
+import json
+import math
+import os
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .histograms import LATENCY_BUCKETS_MS
+
+# Request latency buckets in seconds, matching the staff timings endpoint
+DURATION_BUCKETS = tuple(bound / 1000 for bound in LATENCY_BUCKETS_MS)
+
+
+class Metric:
+    """Base class: a named metric holding one value per label combination."""
+
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.registry.lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            state['buckets'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics of this process. Collectors are called before every
+    flush or render to refresh gauges that are sampled rather than updated.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.metrics = {}
+        self.collectors = []
+        self.last_flush = 0.0
+        # (pid, file name) of the process that owns this registry; set per fork
+        self.process_file = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        return self.register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def collect(self):
+        for collector in self.collectors:
+            collector()
+
+    def state(self):
+        """JSON-serializable snapshot of every value: {metric name: [[labels, value], ...]}."""
+        with self.lock:
+            return {
+                name: [[list(key), value] for key, value in metric.values.items()]
+                for name, metric in self.metrics.items()
+            }
+
+    # Multiprocess mode
+
+    def multiprocess_dir(self):
+        return settings.METRICS_MULTIPROCESS_DIR or None
+
+    def process_filename(self):
+        """File name of this process in the multiprocess directory."""
+        pid = os.getpid()
+        if self.process_file is None or self.process_file[0] != pid:
+            self.process_file = (pid, f'metrics_{pid}_{secrets.token_hex(8)}.json')
+        return self.process_file[1]
+
+    def retire_files(self, directory):
+        """Mark the files of exited processes that had this process's pid as dead."""
+        prefix = f'metrics_{os.getpid()}_'
+        for filename in os.listdir(directory):
+            if filename.startswith(prefix) and filename.endswith('.json') and not filename.endswith('.dead.json'):
+                path = os.path.join(directory, filename)
+                os.replace(path, path.removesuffix('.json') + '.dead.json')
+
+    def flush(self, force=False):
+        """Write this process's samples to its file in the multiprocess directory."""
+        directory = self.multiprocess_dir()
+        now = time.monotonic()
+        if directory is None or (not force and now - self.last_flush < settings.METRICS_FLUSH_INTERVAL):
+            return
+
+        self.last_flush = now
+        self.collect()
+        path = os.path.join(directory, self.process_filename())
+        if not os.path.exists(path):
+            self.retire_files(directory)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(self.state(), handle)
+        # Atomic replace, so readers never see a partial file
+        os.replace(temporary, path)
+
+    def process_states(self):
+        """Yield (alive, state) for every process file, this process included."""
+        directory = self.multiprocess_dir()
+        if directory is None:
+            self.collect()
+            yield True, self.state()
+            return
+
+        self.flush(force=True)
+        own = self.process_filename()
+        for filename in os.listdir(directory):
+            if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as handle:
+                    state = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            if filename == own:
+                alive = True
+            elif filename.endswith('.dead.json'):
+                alive = False
+            else:
+                alive = pid_alive(int(filename.split('_')[1]))
+            yield alive, state
+
+    def merged_values(self):
+        """Merge process states into {metric name: {label tuple: value}}."""
+        merged = {name: {} for name in self.metrics}
+
+        for alive, state in self.process_states():
+            for name, samples in state.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.type == 'gauge' and not alive):
+                    continue
+                values = merged[name]
+                for labels, value in samples:
+                    key = tuple(labels)
+                    if metric.type == 'histogram':
+                        total = values.setdefault(key, {'buckets': [0] * len(value['buckets']), 'sum': 0.0, 'count': 0})
+                        total['buckets'] = [a + b for a, b in zip(total['buckets'], value['buckets'])]
+                        total['sum'] += value['sum']
+                        total['count'] += value['count']
+                    else:
+                        values[key] = values.get(key, 0) + value
+
+        return merged
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        merged = self.merged_values()
+        lines = []
+
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for key, value in sorted(merged[name].items()):
+                labels = dict(zip(metric.labelnames, key))
+                if metric.type != 'histogram':
+                    lines.append(f'{name}{format_labels(labels)} {format_value(value)}')
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (math.inf,), value['buckets']):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else format_value(bound)
+                    lines.append(f'{name}_bucket{format_labels({**labels, "le": le})} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {format_value(value["sum"])}')
+                lines.append(f'{name}_count{format_labels(labels)} {value["count"]}')
+
+        lines.extend(derived_cache_ratios(merged))
+        return '\n'.join(lines) + '\n'
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(str(value))}"' for name, value in labels.items()) + '}'
+
+
+def format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def derived_cache_ratios(merged):
+    """cache_hit_ratio gauge per cache, computed from the merged lookup counters."""
+    lookups = {}
+    for (cache_name, result), value in merged.get('cache_lookups_total', {}).items():
+        hits, total = lookups.get(cache_name, (0, 0))
+        lookups[cache_name] = (hits + (value if result == 'hit' else 0), total + value)
+
+    lines = [
+        '# HELP cache_hit_ratio Share of cache lookups that were hits.',
+        '# TYPE cache_hit_ratio gauge',
+    ]
+    for cache_name, (hits, total) in sorted(lookups.items()):
+        lines.append(f'cache_hit_ratio{format_labels({"cache": cache_name})} {format_value(round(hits / total, 6))}')
+    return lines
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    'http_requests_total',
+    'HTTP requests handled, by view, method and status code.',
+    ['view', 'method', 'status']
+)
+http_request_duration_seconds = registry.histogram(
+    'http_request_duration_seconds',
+    'HTTP request wall time in seconds, by view and method.',
+    ['view', 'method']
+)
+cache_lookups_total = registry.counter(
+    'cache_lookups_total',
+    'Cache lookups by cache and result (hit/miss).',
+    ['cache', 'result']
+)
+login_attempts_total = registry.counter(
+    'login_attempts_total',
+    'Login attempts by result.',
+    ['result']
+)
+throttled_requests_total = registry.counter(
+    'throttled_requests_total',
+    'Requests rejected by a throttle, by throttle scope.',
+    ['scope']
+)
+db_pool_connections = registry.gauge(
+    'db_pool_connections',
+    'Connection pool state per database alias (size, available, min, max).',
+    ['alias', 'state']
+)
+db_pool_requests_waiting = registry.gauge(
+    'db_pool_requests_waiting',
+    'Requests waiting for a pooled connection, per database alias.',
+    ['alias']
+)
+db_pool_requests = registry.gauge(
+    'db_pool_requests',
+    'Connections handed out by the pool since the worker started, per database alias.',
+    ['alias']
+)
+
+
+def record_cache_lookup(cache_name, hit):
+    cache_lookups_total.inc(cache=cache_name, result='hit' if hit else 'miss')
+
+
+def collect_db_pool():
+    """Sample psycopg pool statistics of the aliases that use connection pooling."""
+    for alias in connections:
+        if not connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            continue
+        pool = connections[alias].pool
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        for state, key in (('size', 'pool_size'), ('available', 'pool_available'), ('min', 'pool_min'), ('max', 'pool_max')):
+            db_pool_connections.set(stats.get(key, 0), alias=alias, state=state)
+        db_pool_requests_waiting.set(stats.get('requests_waiting', 0), alias=alias)
+        db_pool_requests.set(stats.get('requests_num', 0), alias=alias)
+
+
+registry.collectors.append(collect_db_pool)
@@ -0,0 +1,114 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .histograms import request_histograms
+from .metrics import registry, http_requests_total, http_request_duration_seconds
+from .timing import RequestTimings, current_timings, record_query, instrument_serializers
+
+logger = logging.getLogger('monitoring.requests')
+
+
+def route_name(request):
+    """Namespaced URL name of the matched view, e.g. 'patients:patient-detail'."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return match.view_name or match.route
+
+
+def view_label(request):
+    """Class name of the matched view, e.g. 'DoctorListCreateView'."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    view_class = getattr(match.func, 'view_class', None)
+    return view_class.__name__ if view_class is not None else match.func.__name__
+
+
+class RequestTimingMiddleware:
+    """
+    Record query count, DB time, serializer time and wall time of each request.
+    
+    Results are sent as a Server-Timing header, logged as one JSON line on the
+    'monitoring.requests' logger and added to the per-route histograms.
+    Enabled with REQUEST_TIMING_ENABLED; place it first in MIDDLEWARE so the
+    wall time covers the other middleware too. Work done while a streaming
+    response is iterated happens after the middleware returns and is not counted.
+    """
+    
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrument_serializers()
+    
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        
+        total_ms = timings.total_time * 1000
+        db_ms = timings.db_time * 1000
+        serializer_ms = timings.serializer_time * 1000
+        route = f'{request.method} {route_name(request)}'
+        
+        request_histograms.observe(route, total_ms, db_ms, serializer_ms, timings.queries)
+        
+        if settings.REQUEST_TIMING_HEADER:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={db_ms:.2f};desc="{timings.queries} queries"',
+                f'serializer;dur={serializer_ms:.2f}',
+                f'total;dur={total_ms:.2f}',
+            ])
+        
+        logger.info(json.dumps({
+            'event': 'request_timing',
+            'method': request.method,
+            'path': request.path,
+            'route': route_name(request),
+            'status': response.status_code,
+            'queries': timings.queries,
+            'db_ms': round(db_ms, 2),
+            'serializer_ms': round(serializer_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }))
+        
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Count requests and observe their latency per view for the /metrics endpoint.
+    
+    Enabled with METRICS_ENABLED; in multiprocess mode the samples of this
+    worker are flushed to METRICS_MULTIPROCESS_DIR after the response.
+    """
+    
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        
+        view = view_label(request)
+        http_requests_total.inc(view=view, method=request.method, status=response.status_code)
+        http_request_duration_seconds.observe(elapsed, view=view, method=request.method)
+        registry.flush()
+        
+        return response
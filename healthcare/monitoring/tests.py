@@ -0,0 +1,220 @@
+import json
+import os
+import re
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from authentication.throttling import LoginEmailThrottle
+from .histograms import request_histograms
+from .metrics import registry
+from healthcare.testing import create_user, create_patients
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True)
+class RequestTimingMiddlewareTests(APITestCase):
+    """The timing middleware reports queries and timings per request."""
+
+    def setUp(self):
+        request_histograms.reset()
+        self.user = create_user()
+        create_patients(self.user, 3)
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        with self.assertLogs('monitoring.requests', level='INFO') as logs:
+            response = self.client.get(reverse('patients:patient-list-create'))
+
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="2 queries"', timing)
+        self.assertRegex(timing, r'serializer;dur=\d+\.\d+')
+        self.assertRegex(timing, r'total;dur=\d+\.\d+')
+        self.assertIn('"route": "patients:patient-list-create"', logs.output[0])
+        self.assertIn('"queries": 2', logs.output[0])
+
+    def test_serializer_time_is_not_counted_twice_for_nested_serializers(self):
+        response = self.client.get(reverse('patients:patient-list-create'))
+
+        durations = dict(re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing']))
+        self.assertLessEqual(float(durations['serializer']), float(durations['total']))
+
+    @override_settings(REQUEST_TIMING_HEADER=False)
+    def test_header_can_be_disabled(self):
+        response = self.client.get(reverse('patients:patient-list-create'))
+
+        self.assertNotIn('Server-Timing', response)
+
+    def test_histograms_are_staff_only(self):
+        url = reverse('monitoring:request-timings')
+        self.client.get(reverse('patients:patient-list-create'))
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(create_user('staff@example.com', is_staff=True))
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        route = response.data['data']['GET patients:patient-list-create']
+        self.assertEqual(route['count'], 1)
+        self.assertEqual(route['max_queries'], 2)
+        self.assertEqual(sum(route['buckets'].values()), 1)
+
+        self.client.delete(url)
+        self.assertNotIn('GET patients:patient-list-create', request_histograms.snapshot())
+
+
+class RequestTimingDisabledTests(APITestCase):
+
+    def test_no_header_when_disabled(self):
+        self.client.force_authenticate(create_user())
+        response = self.client.get(reverse('patients:patient-list-create'))
+
+        self.assertNotIn('Server-Timing', response)
+
+
+def sample(text, name, **labels):
+    """Value of one sample in Prometheus text output, 0 when absent."""
+    selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = rf'^{re.escape(name)}{re.escape("{" + selector + "}") if labels else ""} (\S+)$'
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+@override_settings(METRICS_TOKEN='scrape-secret')
+class MetricsEndpointTests(APITestCase):
+    """/metrics exports request, cache and login metrics in the Prometheus format."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_requests_are_counted_per_view(self):
+        labels = {'view': 'DoctorListCreateView', 'method': 'GET'}
+        before = self.scrape()
+
+        self.client.get(reverse('doctors:doctor-list-create'))
+        self.client.get(reverse('doctors:doctor-list-create'))
+        after = self.scrape()
+
+        self.assertEqual(
+            sample(after, 'http_requests_total', **labels, status=200)
+            - sample(before, 'http_requests_total', **labels, status=200),
+            2
+        )
+        self.assertEqual(
+            sample(after, 'http_request_duration_seconds_count', **labels)
+            - sample(before, 'http_request_duration_seconds_count', **labels),
+            2
+        )
+        self.assertIn('http_request_duration_seconds_bucket{view="DoctorListCreateView",method="GET",le="+Inf"}', after)
+
+    def test_login_attempts(self):
+        cache.clear()
+        create_user('login@example.com', password='Str0ng-pass!')
+        before = self.scrape()
+
+        url = reverse('authentication:login')
+        self.client.post(url, {'email': 'login@example.com', 'password': 'Str0ng-pass!'}, format='json')
+        self.client.post(url, {'email': 'login@example.com', 'password': 'wrong'}, format='json')
+        after = self.scrape()
+
+        for result in ('success', 'invalid_credentials'):
+            self.assertEqual(
+                sample(after, 'login_attempts_total', result=result)
+                - sample(before, 'login_attempts_total', result=result),
+                1
+            )
+
+    def test_throttled_requests(self):
+        cache.clear()
+        url = reverse('authentication:login')
+        before = self.scrape()
+
+        with mock.patch.object(LoginEmailThrottle, 'THROTTLE_RATES', {'login_email': '1/min'}):
+            for _ in range(2):
+                self.client.post(url, {'email': 'login@example.com', 'password': 'wrong'}, format='json')
+        after = self.scrape()
+
+        self.assertEqual(
+            sample(after, 'throttled_requests_total', scope='login_email')
+            - sample(before, 'throttled_requests_total', scope='login_email'),
+            1
+        )
+
+    def test_cache_hit_ratio(self):
+        self.client.get(reverse('analytics:user-stats'))
+        self.client.get(reverse('analytics:user-stats'))
+        text = self.scrape()
+
+        hits = sample(text, 'cache_lookups_total', cache='user_stats', result='hit')
+        misses = sample(text, 'cache_lookups_total', cache='user_stats', result='miss')
+        self.assertGreaterEqual(hits, 1)
+        self.assertAlmostEqual(sample(text, 'cache_hit_ratio', cache='user_stats'), hits / (hits + misses), places=5)
+
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.scrape()
+
+    @override_settings(METRICS_TOKEN='')
+    def test_refused_without_token_outside_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_not_found_when_disabled(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 404)
+
+    def test_multiprocess_files_are_merged(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            before = sample(self.scrape(), 'login_attempts_total', result='disabled')
+
+            # A worker that has exited: its counters still count, its gauges do not
+            with open(os.path.join(directory, 'metrics_999999999_0123abcd.json'), 'w') as handle:
+                json.dump({
+                    'login_attempts_total': [[['disabled'], 3]],
+                    'db_pool_requests_waiting': [[['default'], 7]],
+                }, handle)
+            text = self.scrape()
+
+            self.assertEqual(sample(text, 'login_attempts_total', result='disabled') - before, 3)
+            self.assertNotIn('db_pool_requests_waiting{alias="default"} 7', text)
+            self.assertTrue(os.path.exists(os.path.join(directory, registry.process_filename())))
+
+        registry.last_flush = 0.0
+
+    def test_reused_pid_keeps_the_exited_workers_counters(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            # Left by an exited worker that had this process's pid
+            stale = os.path.join(directory, f'metrics_{os.getpid()}_0123abcd.json')
+            with open(stale, 'w') as handle:
+                json.dump({
+                    'login_attempts_total': [[['disabled'], 3]],
+                    'db_pool_requests_waiting': [[['default'], 7]],
+                }, handle)
+            registry.process_file = None
+            text = self.scrape()
+
+            # The stale file is not overwritten, and only its counters still count
+            self.assertNotEqual(registry.process_filename(), os.path.basename(stale))
+            self.assertTrue(os.path.exists(stale.removesuffix('.json') + '.dead.json'))
+            own = registry.metrics['login_attempts_total'].values.get(('disabled',), 0)
+            self.assertEqual(sample(text, 'login_attempts_total', result='disabled'), own + 3)
+            self.assertNotIn('db_pool_requests_waiting{alias="default"} 7', text)
+
+        registry.last_flush = 0.0
+
@@ -0,0 +1,72 @@
+"""
+Per-request timing collection.
+
+RequestTimingMiddleware opens a RequestTimings for each request. While it
+is active, every SQL query is counted and timed through a database
+execute wrapper. The outermost serializer to_representation call is
+timed as well; nested serializers are not counted twice.
+"""
+import functools
+import time
+from contextvars import ContextVar
+
+from rest_framework import serializers
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Counters collected while one request is handled."""
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+    
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request's timings."""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_time += time.perf_counter() - started
+        timings.queries += 1
+
+
+def timed_representation(to_representation):
+    """Wrap to_representation so the outermost call adds to serializer time."""
+    @functools.wraps(to_representation)
+    def wrapper(self, instance):
+        timings = current_timings.get()
+        if timings is None:
+            return to_representation(self, instance)
+        
+        timings.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return to_representation(self, instance)
+        finally:
+            timings.serializer_depth -= 1
+            if timings.serializer_depth == 0:
+                timings.serializer_time += time.perf_counter() - started
+    
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument_serializers():
+    """Time Serializer and ListSerializer output. Safe to call more than once."""
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        if not getattr(serializer_class.to_representation, 'timed', False):
+            serializer_class.to_representation = timed_representation(serializer_class.to_representation)
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import RequestTimingStatsView
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('requests/', RequestTimingStatsView.as_view(), name='request-timings'),
+]
@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAdminUser
+
+from .histograms import request_histograms
+from .metrics import registry
+from authentication.utils import success_response, error_response
+
+
+class RequestTimingStatsView(APIView):
+    """
+    API endpoint for per-route request timing histograms (staff only).
+    GET: Latency buckets, percentiles, DB/serializer time and query counts per route.
+    DELETE: Reset the histograms.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        """
+        Return the histograms of this worker process, slowest total time first.
+        Collected only when REQUEST_TIMING_ENABLED is set.
+        """
+        try:
+            return success_response(
+                data=request_histograms.snapshot(),
+                message="Request timings retrieved successfully",
+                status_code=status.HTTP_200_OK
+            )
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred while retrieving request timings",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def delete(self, request):
+        """
+        Reset the histograms of this worker process.
+        """
+        request_histograms.reset()
+        
+        return success_response(
+            data=None,
+            message="Request timings reset successfully",
+            status_code=status.HTTP_200_OK
+        )
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint: request counters and latency histograms per view,
+    DB connection pool stats, cache hit ratios and login attempts.
+    A plain Django view so scrapes skip DRF authentication. Scrapes must send
+    "Authorization: Bearer <METRICS_TOKEN>"; without a token configured the
+    endpoint is only served with DEBUG on. 404 when METRICS_ENABLED is off.
+    """
+    if not settings.METRICS_ENABLED:
+        return HttpResponse('Not Found\n', status=404, content_type='text/plain')
+    
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse('Forbidden: METRICS_TOKEN is not set\n', status=403, content_type='text/plain')
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,125 @@
+import random
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from healthcare.benchmarking import measure, latency_summary, format_latency
+from patients.models import Patient
+from patients.views import PatientListCreateView
+
+User = get_user_model()
+
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Sneha', 'Vikram', 'Priya', 'Arjun', 'Meera']
+LAST_NAMES = ['Sharma', 'Patel', 'Kumar', 'Reddy', 'Iyer', 'Gupta', 'Nair', 'Joshi', 'Kavade', 'Singh']
+
+
+class Command(BaseCommand):
+    """
+    Measure patient search latency for a single user through the patient list
+    endpoint, as clients see it: page-number pagination runs a COUNT over every
+    match before the page query, cursor pagination only fetches the page.
+    Requests go through PatientListCreateView in-process (no HTTP), including
+    serialization and JSON rendering.
+
+    Example:
+        python manage.py benchmark_patient_search --email bench@example.com --populate 1000000
+    """
+    help = 'Benchmark patient search (name, phone, email) through the list endpoint and report latency percentiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Email of the user whose patients are searched')
+        parser.add_argument('--populate', type=int, default=0,
+                            help='Top up the user to at least this many patients before measuring')
+        parser.add_argument('--iterations', type=int, default=200, help='Searches per query type and pagination')
+        parser.add_argument('--page-size', type=int, default=10, help='page_size of each search')
+        parser.add_argument('--batch-size', type=int, default=5000, help='bulk_create batch size')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--explain', action='store_true', help='Print the query plans of one search per type')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist")
+
+        rng = random.Random(options['seed'])
+        self.populate(user, options['populate'], options['batch_size'], rng)
+
+        total = Patient.objects.filter(created_by=user).count()
+        self.stdout.write(f'Searching {total} patients of {user.email}')
+
+        view = PatientListCreateView.as_view()
+        # Requests must carry a host the site accepts (ALLOWED_HOSTS), not 'testserver'
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+
+        def search(term, pagination):
+            params = {'search': term, 'page_size': options['page_size']}
+            if pagination == 'cursor':
+                params['pagination'] = 'cursor'
+            request = factory.get('/api/patients/', params)
+            force_authenticate(request, user=user)
+            response = view(request).render()
+            if response.status_code != 200:
+                raise CommandError(f'Search for "{term}" failed with status {response.status_code}: {response.data}')
+
+        term_factories = {
+            'name': lambda: rng.choice(LAST_NAMES)[:rng.randint(3, 6)],
+            'phone': lambda: str(rng.randint(100, 99999)),
+            'email': lambda: f'{rng.choice(FIRST_NAMES).lower()}.{rng.randint(1, 999)}',
+        }
+
+        for label, make_term in term_factories.items():
+            for pagination in ('page', 'cursor'):
+                if options['explain']:
+                    with CaptureQueriesContext(connection) as context:
+                        search(make_term(), pagination)
+                    for query in context.captured_queries:
+                        with connection.cursor() as cursor:
+                            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {query['sql']}")
+                            plan = '\n'.join(row[0] for row in cursor.fetchall())
+                        self.stdout.write(f'\n[{label}/{pagination}] query plan:\n{plan}\n')
+
+                timings = measure(lambda: search(make_term(), pagination), options['iterations'])
+                self.stdout.write(format_latency(f'{label}/{pagination}', latency_summary(timings), width=12))
+
+    def populate(self, user, target, batch_size, rng):
+        """Bulk insert synthetic patients until the user owns `target` rows."""
+        missing = target - Patient.objects.filter(created_by=user).count()
+        if missing <= 0:
+            return
+
+        self.stdout.write(f'Creating {missing} synthetic patients...')
+        today = date.today()
+        while missing > 0:
+            batch = []
+            for _ in range(min(batch_size, missing)):
+                first_name = rng.choice(FIRST_NAMES)
+                phone = f'+91{rng.randint(6000000000, 9999999999)}'
+                batch.append(Patient(
+                    first_name=first_name,
+                    last_name=rng.choice(LAST_NAMES),
+                    email=f'{first_name.lower()}.{rng.randint(1, 10**7)}@example.com',
+                    phone=phone,
+                    phone_digits=Patient.normalize_phone(phone),
+                    date_of_birth=today - timedelta(days=rng.randint(365, 365 * 90)),
+                    gender=rng.choice(['M', 'F', 'O']),
+                    address='Synthetic address',
+                    city='Mumbai',
+                    state='Maharashtra',
+                    postal_code='400001',
+                    emergency_contact_name='Emergency Contact',
+                    emergency_contact_phone=f'+91{rng.randint(6000000000, 9999999999)}',
+                    emergency_contact_relation='Relative',
+                    created_by=user,
+                ))
+            Patient.objects.bulk_create(batch, batch_size=batch_size)
+            missing -= len(batch)
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE patients')
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['created_by', 'created_at', 'id'], name='patients_created_5e4cd6_idx'),
+        ),
+    ]
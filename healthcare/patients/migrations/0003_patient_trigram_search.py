@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:13
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def populate_phone_digits(apps, schema_editor):
+    """Backfill the digits-only phone column for existing patients."""
+    Patient = apps.get_model('patients', 'Patient')
+    Patient.objects.update(phone_digits=models.Func(
+        models.F('phone'),
+        models.Value(r'\D'),
+        models.Value(''),
+        models.Value('g'),
+        function='REGEXP_REPLACE'
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0002_keyset_pagination_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='patient',
+            name='phone_digits',
+            field=models.CharField(blank=True, editable=False, max_length=17),
+        ),
+        migrations.RunPython(populate_phone_digits, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='patient',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('first_name'), name='gin_trgm_ops'), name='patients_first_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('last_name'), name='gin_trgm_ops'), name='patients_last_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='patients_email_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['phone_digits'], name='patients_phone_digits_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 from django.core.validators import RegexValidator, MinValueValidator, MaxValueValidator
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from datetime import date
 
 
@@ -42,6 +44,8 @@ class Patient(models.Model):
         max_length=17,
         help_text="Phone number in format: '+999999999'"
     )
+    # Digits-only copy of phone for partial phone search, maintained on save
+    phone_digits = models.CharField(max_length=17, blank=True, editable=False)
     
     # Personal Information
     date_of_birth = models.DateField()
@@ -102,13 +106,25 @@ class Patient(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['created_by', 'is_active']),
+            models.Index(fields=['created_by', 'created_at', 'id']),
             models.Index(fields=['phone']),
             models.Index(fields=['email']),
+            # Trigram indexes serving the icontains/contains lookups in patients.search
+            GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='patients_first_name_trgm'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='patients_last_name_trgm'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='patients_email_trgm'),
+            GinIndex(fields=['phone_digits'], opclasses=['gin_trgm_ops'], name='patients_phone_digits_trgm'),
         ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.phone}"
     
+    # Columns read by each property, for sparse fieldsets (see SparseFieldset.only)
+    property_sources = {
+        'full_name': ['first_name', 'last_name'],
+        'age': ['date_of_birth'],
+    }
+    
     @property
     def full_name(self):
         """Return patient's full name."""
@@ -122,6 +138,11 @@ class Patient(models.Model):
             (today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day)
         )
     
+    @staticmethod
+    def normalize_phone(phone):
+        """Return only the digits of a phone number."""
+        return ''.join(filter(str.isdigit, phone or ''))
+    
     def clean(self):
         """Validate model data."""
         from django.core.exceptions import ValidationError
@@ -138,4 +159,8 @@ class Patient(models.Model):
     def save(self, *args, **kwargs):
         """Override save to run full_clean before saving."""
         self.full_clean()
+        self.phone_digits = self.normalize_phone(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_digits'}
         super().save(*args, **kwargs)
\ No newline at end of file
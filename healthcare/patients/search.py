@@ -0,0 +1,36 @@
+"""
+Patient lookup by name, phone and email.
+
+The lookups below match the pg_trgm GIN indexes declared on Patient,
+so leading-wildcard searches are served by the index instead of a
+sequential scan. Callers are expected to scope the queryset by created_by.
+"""
+from django.db.models import Q
+
+from .models import Patient
+
+
+# Fewer digits than this match far too many phone numbers to be useful
+MIN_PHONE_DIGITS = 3
+
+
+def search_patients(queryset, search):
+    """
+    Filter a Patient queryset by name, email or partial phone number.
+    Phone matching ignores formatting, so '98765 43' finds '+919876543210'.
+    """
+    search = search.strip()
+    if not search:
+        return queryset
+
+    condition = (
+        Q(first_name__icontains=search) |
+        Q(last_name__icontains=search) |
+        Q(email__icontains=search)
+    )
+
+    digits = Patient.normalize_phone(search)
+    if len(digits) >= MIN_PHONE_DIGITS:
+        condition |= Q(phone_digits__contains=digits)
+
+    return queryset.filter(condition)
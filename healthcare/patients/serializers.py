@@ -2,9 +2,10 @@ from rest_framework import serializers
 from django.core.exceptions import ValidationError as DjangoValidationError
 from datetime import date
 from .models import Patient
+from authentication.utils import SparseFieldsetMixin
 
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Patient model with comprehensive validation.
     """
@@ -145,7 +146,7 @@ class PatientSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class PatientListSerializer(serializers.ModelSerializer):
+class PatientListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for listing patients.
     """
@@ -1,3 +1,280 @@
-from django.test import TestCase
+import io
+import json
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from .models import Patient
+from healthcare.testing import (
+    QueryCountMixin,
+    create_user,
+    create_patient,
+    create_patients,
+    assign_doctors,
+    patient_data,
+    csv_upload,
+)
+
+
+class PatientQueryCountTests(QueryCountMixin, APITestCase):
+    """Patient endpoints run a fixed number of queries whatever the data size."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        create_patients(self.user, 2)
+
+    def grow(self):
+        create_patients(self.user, 12, start=100)
+
+    def test_list(self):
+        url = reverse('patients:patient-list-create')
+        self.assertConstantQueries(lambda: self.client.get(url), self.grow, expected=2)
+
+    def test_list_with_cursor_pagination(self):
+        url = reverse('patients:patient-list-create')
+        self.assertConstantQueries(lambda: self.client.get(url, {'pagination': 'cursor'}), self.grow, expected=1)
+
+    def test_invalid_cursor_or_page(self):
+        url = reverse('patients:patient-list-create')
+        self.assertEqual(self.client.get(url, {'pagination': 'cursor', 'cursor': 'garbage'}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'page': 999}).status_code, 404)
+
+    def test_search(self):
+        url = reverse('patients:patient-list-create')
+        self.assertConstantQueries(lambda: self.client.get(url, {'search': 'Rao'}), self.grow, expected=2)
+
+    def test_create(self):
+        url = reverse('patients:patient-list-create')
+        payloads = iter(patient_data(index) for index in range(1000, 1010))
+        self.assertConstantQueries(
+            lambda: self.client.post(url, next(payloads), format='json'),
+            self.grow
+        )
+
+    def test_bulk_import(self):
+        url = reverse('patients:patient-bulk-import')
+        sizes = [2]
+
+        def request():
+            start = 1000 * len(sizes)
+            rows = [patient_data(start + index) for index in range(sizes[-1])]
+            return self.client.post(url, {'file': csv_upload(rows)}, format='multipart')
+
+        self.assertConstantQueries(request, lambda: sizes.append(25))
+        self.assertEqual(Patient.objects.filter(created_by=self.user).count(), 2 + 2 + 25)
+
+    def test_export(self):
+        url = reverse('patients:patient-export')
+        self.assertConstantQueries(lambda: self.client.get(url, {'export_format': 'ndjson'}), self.grow, expected=1)
+
+    def test_detail(self):
+        patient = create_patient(self.user, 500)
+        url = reverse('patients:patient-detail', args=[patient.id])
+        self.assertConstantQueries(lambda: self.client.get(url), self.grow, expected=2)
+
+    def test_update(self):
+        patient = create_patient(self.user, 500)
+        url = reverse('patients:patient-detail', args=[patient.id])
+        self.assertConstantQueries(lambda: self.client.patch(url, {'city': 'Mumbai'}, format='json'), self.grow)
+        self.assertConstantQueries(
+            lambda: self.client.put(url, patient_data(500, city='Nashik'), format='json'),
+            self.grow
+        )
+
+    def test_delete_with_mappings(self):
+        few = create_patient(self.user, 500)
+        many = create_patient(self.user, 501)
+        assign_doctors(self.user, few, 1)
+        assign_doctors(self.user, many, 8, start=1)
+
+        few_queries, response = self.count_queries(
+            lambda: self.client.delete(reverse('patients:patient-detail', args=[few.id]))
+        )
+        self.assertEqual(response.status_code, 200)
+        many_queries, response = self.count_queries(
+            lambda: self.client.delete(reverse('patients:patient-detail', args=[many.id]))
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(len(few_queries), len(many_queries))
+
+
+class PatientBulkImportTests(APITestCase):
+    """Bulk import reads multipart, raw CSV and NDJSON bodies and reports failed rows."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('patients:patient-bulk-import')
+
+    def post_body(self, body, content_type):
+        return self.client.generic('POST', self.url, body, content_type=content_type)
+
+    def ndjson(self, *records):
+        return b''.join(json.dumps(record, cls=DjangoJSONEncoder).encode() + b'\n' for record in records)
+
+    def test_raw_csv_body(self):
+        body = csv_upload([patient_data(index) for index in range(3)]).getvalue()
+
+        response = self.post_body(body, 'text/csv')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['data']['created'], 3)
+        self.assertEqual(Patient.objects.filter(created_by=self.user).count(), 3)
+
+    def test_ndjson_reports_failed_rows(self):
+        body = (
+            self.ndjson(patient_data(0))
+            + b'{"first_name": \n'
+            + b'\n'
+            + b'["not", "an", "object"]\n'
+            + self.ndjson(patient_data(1, date_of_birth=date.today() + timedelta(days=1)), patient_data(2))
+        )
+
+        response = self.post_body(body, 'application/x-ndjson')
+
+        self.assertEqual(response.status_code, 200)
+        report = response.data['data']
+        # Blank lines are not rows
+        self.assertEqual((report['total_rows'], report['created'], report['failed']), (5, 2, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3, 4])
+        self.assertEqual(report['errors'][0]['errors'], {'non_field_errors': ['Invalid JSON.']})
+        self.assertEqual(report['errors'][1]['errors'], {'non_field_errors': ['Each line must be a JSON object.']})
+        self.assertIn('date_of_birth', report['errors'][2]['errors'])
+
+    def test_nothing_imported(self):
+        response = self.post_body(self.ndjson({'first_name': 'Asha'}), 'application/x-ndjson')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error']['details']['errors'][0]['row'], 1)
+
+    def test_unsupported_content_type(self):
+        response = self.post_body(b'<patients/>', 'application/xml')
+
+        self.assertEqual(response.status_code, 415)
+
+    def test_stops_at_unreadable_line(self):
+        upload = csv_upload([patient_data(index) for index in range(3)])
+        upload = io.BytesIO(upload.getvalue() + b'\xff\xfe broken\n')
+        upload.name = 'import.csv'
+
+        response = self.client.post(f'{self.url}?batch_size=2', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        report = response.data['error']['details']
+        # Rows read before the bad line, including the partial second batch, are kept
+        self.assertEqual((report['total_rows'], report['created']), (3, 3))
+        self.assertEqual((report['errors'][-1]['row'], report['errors'][-1]['line']), (4, 5))
+        self.assertEqual(Patient.objects.filter(created_by=self.user).count(), 3)
+
+
+class PatientConditionalRequestTests(APITestCase):
+    """Patient detail supports ETag/Last-Modified validators and If-Match updates."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.patient = create_patient(self.user)
+        self.url = reverse('patients:patient-detail', args=[self.patient.id])
+
+    def test_if_none_match_skips_loading_the_row(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertTrue(response['Last-Modified'])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT').status_code,
+            200
+        )
+
+    def test_changed_row_is_sent_again(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.patch(self.url, {'city': 'Nashik'}, format='json')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['data']['city'], 'Nashik')
+
+    def test_if_match(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.patch(self.url, {'city': 'Nashik'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        new_etag = response['ETag']
+        self.assertNotEqual(new_etag, etag)
+
+        # A second writer still holding the old version is rejected
+        response = self.client.put(self.url, patient_data(city='Nagpur'), format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response['ETag'], new_etag)
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.city, 'Nashik')
+
+    def test_unknown_patient_is_not_found(self):
+        url = reverse('patients:patient-detail', args=[self.patient.id + 1000])
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='"1"').status_code, 404)
+
+
+class PatientSparseFieldsetTests(QueryCountMixin, APITestCase):
+    """fields= and exclude= trim patient responses and the columns read."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.patient = create_patient(self.user)
+
+    def test_fields_on_list(self):
+        url = reverse('patients:patient-list-create')
+        queries, response = self.count_queries(lambda: self.client.get(url, {'fields': 'id,full_name'}))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results']['data'], [{'id': self.patient.id, 'full_name': self.patient.full_name}])
+        select = queries[-1]['sql']
+        self.assertIn('"first_name"', select)
+        self.assertNotIn('"phone"', select)
+
+    def test_exclude_on_detail(self):
+        url = reverse('patients:patient-detail', args=[self.patient.id])
+        queries, response = self.count_queries(
+            lambda: self.client.get(url, {'exclude': 'medical_history,allergies,current_medications,created_by_email'})
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data['data']
+        self.assertNotIn('medical_history', data)
+        self.assertNotIn('created_by_email', data)
+        self.assertEqual(data['email'], self.patient.email)
+        self.assertIn('ETag', response)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"medical_history"', queries[0]['sql'])
+
+    def test_fields_on_update_response(self):
+        url = reverse('patients:patient-detail', args=[self.patient.id])
+
+        response = self.client.patch(f'{url}?fields=id,city', {'city': 'Nashik'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data'], {'id': self.patient.id, 'city': 'Nashik'})
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('patients:patient-list-create'), {'fields': 'id,diagnosis'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('diagnosis', response.data['error']['details'])
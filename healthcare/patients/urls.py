@@ -1,9 +1,16 @@
 from django.urls import path
-from .views import PatientListCreateView, PatientDetailView
+from .views import (
+    PatientListCreateView,
+    PatientBulkImportView,
+    PatientExportView,
+    PatientDetailView
+)
 
 app_name = 'patients'
 
 urlpatterns = [
     path('', PatientListCreateView.as_view(), name='patient-list-create'),
+    path('bulk/', PatientBulkImportView.as_view(), name='patient-bulk-import'),
+    path('export/', PatientExportView.as_view(), name='patient-export'),
     path('<int:pk>/', PatientDetailView.as_view(), name='patient-detail'),
 ]
\ No newline at end of file
@@ -1,17 +1,38 @@
 from rest_framework import status, filters
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+from rest_framework.parsers import MultiPartParser
+from rest_framework.exceptions import ValidationError, NotFound
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import transaction
 
 from .models import Patient
+from .search import search_patients
 from .serializers import (
     PatientSerializer,
     PatientListSerializer,
     PatientUpdateSerializer
 )
-from authentication.utils import success_response, error_response
+from analytics.stats import invalidate_user_stats
+from authentication.utils import (
+    success_response,
+    error_response,
+    SparseFieldset,
+    FieldsetError,
+    conditional_get,
+    set_validators,
+    has_if_match,
+    precondition_failed,
+    ImportFormatError,
+    ImportReadError,
+    get_import_batch_size,
+    get_import_source,
+    iter_import_rows,
+    chunked,
+    EXPORT_CONTENT_TYPES,
+    stream_export
+)
 
 
 class PatientPagination(PageNumberPagination):
@@ -21,6 +42,17 @@ class PatientPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class PatientCursorPagination(CursorPagination):
+    """
+    Keyset pagination for patient list.
+    Seeks on (created_at, id) instead of OFFSET and skips the COUNT query.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
 class PatientListCreateView(APIView):
     """
     API endpoint for listing and creating patients.
@@ -29,6 +61,16 @@ class PatientListCreateView(APIView):
     """
     permission_classes = [IsAuthenticated]
     pagination_class = PatientPagination
+    cursor_pagination_class = PatientCursorPagination
+    
+    def get_paginator(self, request):
+        """
+        Return the paginator for this request.
+        Cursor (keyset) pagination is opt-in via ?pagination=cursor.
+        """
+        if request.query_params.get('pagination') == 'cursor':
+            return self.cursor_pagination_class()
+        return self.pagination_class()
     
     def get(self, request):
         """
@@ -42,8 +84,14 @@ class PatientListCreateView(APIView):
         - is_active: Filter by active status (true/false)
         - page: Page number
         - page_size: Number of items per page
+        - pagination: Set to 'cursor' for keyset pagination (no total count)
+        - cursor: Opaque cursor taken from the next/previous links
+        - fields: Comma-separated fields to return (e.g. id,full_name)
+        - exclude: Comma-separated fields to leave out
         """
         try:
+            fieldset = SparseFieldset.from_request(request, PatientListSerializer)
+            
             # Get patients for the authenticated user
             queryset = Patient.objects.filter(created_by=request.user)
             
@@ -61,22 +109,20 @@ class PatientListCreateView(APIView):
             if city:
                 queryset = queryset.filter(city__icontains=city)
             
-            # Apply search
+            # Apply search (trigram-indexed, see patients.search)
             search = request.query_params.get('search')
             if search:
-                queryset = queryset.filter(
-                    Q(first_name__icontains=search) |
-                    Q(last_name__icontains=search) |
-                    Q(phone__icontains=search) |
-                    Q(email__icontains=search)
-                )
+                queryset = search_patients(queryset, search)
+            
+            # Read only the columns of the requested fields
+            queryset = fieldset.only(queryset, PatientListSerializer, extra=['created_at'])
             
             # Pagination
-            paginator = self.pagination_class()
+            paginator = self.get_paginator(request)
             paginated_queryset = paginator.paginate_queryset(queryset, request)
             
             # Serialize data
-            serializer = PatientListSerializer(paginated_queryset, many=True)
+            serializer = PatientListSerializer(paginated_queryset, many=True, fieldset=fieldset)
             
             # Return paginated response
             return paginator.get_paginated_response({
@@ -85,6 +131,21 @@ class PatientListCreateView(APIView):
                 'data': serializer.data
             })
         
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        except NotFound as e:
+            # Bad cursor or page number
+            return error_response(
+                message="Invalid page",
+                details=str(e.detail),
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+        
         except Exception as e:
             return error_response(
                 message="An error occurred while retrieving patients",
@@ -99,6 +160,8 @@ class PatientListCreateView(APIView):
         Request body: All patient fields as defined in PatientSerializer
         """
         try:
+            fieldset = SparseFieldset.from_request(request, PatientSerializer)
+            
             serializer = PatientSerializer(
                 data=request.data,
                 context={'request': request}
@@ -108,7 +171,7 @@ class PatientListCreateView(APIView):
                 patient = serializer.save()
                 
                 return success_response(
-                    data=PatientSerializer(patient).data,
+                    data=PatientSerializer(patient, fieldset=fieldset).data,
                     message="Patient created successfully",
                     status_code=status.HTTP_201_CREATED
                 )
@@ -119,6 +182,13 @@ class PatientListCreateView(APIView):
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
         except Exception as e:
             return error_response(
                 message="An error occurred while creating patient",
@@ -127,19 +197,193 @@ class PatientListCreateView(APIView):
             )
 
 
+class PatientBulkImportView(APIView):
+    """
+    API endpoint for importing patients in bulk.
+    POST: Stream a CSV or NDJSON body and create one patient per valid row.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    
+    def post(self, request):
+        """
+        Import patients from a CSV or NDJSON upload.
+        
+        Send the file as multipart form data in the `file` field, or as the raw
+        request body with Content-Type text/csv or application/x-ndjson.
+        Columns/keys are the PatientSerializer fields.
+        
+        Rows are validated with PatientSerializer rules and inserted with bulk_create,
+        one transaction per batch, so valid rows are kept when others fail.
+        
+        Query Parameters:
+        - batch_size: Rows validated and inserted per transaction
+        """
+        try:
+            batch_size = get_import_batch_size(request)
+            import_format, lines = get_import_source(request)
+        except ImportFormatError as e:
+            return error_response(
+                message="Unsupported import format",
+                details=str(e),
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        
+        report = {
+            'total_rows': 0,
+            'created': 0,
+            'failed': 0,
+            'errors': []
+        }
+        
+        try:
+            # One serializer instance for every row, so its fields are built once
+            serializer = PatientSerializer(context={'request': request})
+            
+            for chunk in chunked(iter_import_rows(import_format, lines), batch_size):
+                patients = []
+                
+                for row_number, data, errors in chunk:
+                    if errors is None:
+                        try:
+                            patient = Patient(created_by=request.user, **serializer.run_validation(data))
+                            patient.phone_digits = Patient.normalize_phone(patient.phone)
+                            patients.append(patient)
+                            continue
+                        except ValidationError as e:
+                            errors = e.detail
+                    
+                    report['errors'].append({'row': row_number, 'errors': errors})
+                
+                with transaction.atomic():
+                    Patient.objects.bulk_create(patients, batch_size=batch_size)
+                # bulk_create sends no post_save signals
+                invalidate_user_stats(request.user.id)
+                
+                report['total_rows'] += len(chunk)
+                report['created'] += len(patients)
+                report['failed'] += len(chunk) - len(patients)
+        
+        except ImportReadError as e:
+            report['errors'].append({'row': e.row, 'line': e.line, 'errors': str(e)})
+            return error_response(
+                message="Import stopped: the file could not be read",
+                details=report,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred while importing patients",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        if report['failed'] == 0:
+            return success_response(
+                data=report,
+                message=f"{report['created']} patient(s) imported successfully",
+                status_code=status.HTTP_201_CREATED
+            )
+        
+        if report['created'] == 0:
+            return error_response(
+                message="No patients were imported",
+                details=report,
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return success_response(
+            data=report,
+            message=f"{report['created']} patient(s) imported, {report['failed']} row(s) failed",
+            status_code=status.HTTP_200_OK
+        )
+
+
+class PatientExportView(APIView):
+    """
+    API endpoint for exporting patients.
+    GET: Stream patients as CSV or NDJSON.
+    """
+    permission_classes = [IsAuthenticated]
+    export_fields = [
+        'id',
+        'first_name',
+        'last_name',
+        'email',
+        'phone',
+        'date_of_birth',
+        'gender',
+        'blood_group',
+        'address',
+        'city',
+        'state',
+        'postal_code',
+        'country',
+        'medical_history',
+        'allergies',
+        'current_medications',
+        'emergency_contact_name',
+        'emergency_contact_phone',
+        'emergency_contact_relation',
+        'is_active',
+        'created_at',
+        'updated_at',
+    ]
+    
+    def get(self, request):
+        """
+        Export all patients created by the authenticated user.
+        The response is streamed from a server-side cursor in constant memory.
+        
+        Query Parameters:
+        - export_format: csv (default) or ndjson
+        """
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        
+        if export_format not in EXPORT_CONTENT_TYPES:
+            return error_response(
+                message="Unsupported export format",
+                details="export_format must be one of: " + ", ".join(EXPORT_CONTENT_TYPES),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            queryset = Patient.objects.filter(created_by=request.user)
+            return stream_export(queryset, self.export_fields, export_format, 'patients')
+        
+        except Exception as e:
+            return error_response(
+                message="An error occurred while exporting patients",
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
 class PatientDetailView(APIView):
     """
     API endpoint for retrieving, updating, and deleting a specific patient.
     GET: Retrieve patient details.
     PUT: Update patient details.
     DELETE: Delete patient record.
+    
+    Responses carry ETag and Last-Modified from updated_at. GET answers
+    If-None-Match / If-Modified-Since with 304; updates honour If-Match
+    and fail with 412 when the record changed in the meantime.
     """
     permission_classes = [IsAuthenticated]
     
-    def get_patient(self, patient_id, user):
-        """Helper method to get patient and verify ownership."""
+    def get_patient(self, patient_id, user, for_update=False, fieldset=None):
+        """
+        Helper method to get patient and verify ownership.
+        With for_update the row stays locked until the transaction ends;
+        with a fieldset only the columns of the requested fields are read.
+        """
+        queryset = Patient.objects.select_for_update() if for_update else Patient.objects.all()
+        if fieldset is not None:
+            queryset = fieldset.only(queryset, PatientSerializer, extra=['updated_at'])
         try:
-            return Patient.objects.get(id=patient_id, created_by=user)
+            return queryset.get(id=patient_id, created_by=user)
         except Patient.DoesNotExist:
             return None
     
@@ -148,7 +392,13 @@ class PatientDetailView(APIView):
         Get details of a specific patient.
         """
         try:
-            patient = self.get_patient(pk, request.user)
+            fieldset = SparseFieldset.from_request(request, PatientSerializer)
+            
+            not_modified = conditional_get(request, Patient.objects.filter(id=pk, created_by=request.user))
+            if not_modified is not None:
+                return not_modified
+            
+            patient = self.get_patient(pk, request.user, fieldset=fieldset)
             
             if not patient:
                 return error_response(
@@ -157,13 +407,21 @@ class PatientDetailView(APIView):
                     status_code=status.HTTP_404_NOT_FOUND
                 )
             
-            serializer = PatientSerializer(patient)
+            serializer = PatientSerializer(patient, fieldset=fieldset)
             
-            return success_response(
+            response = success_response(
                 data=serializer.data,
                 message="Patient details retrieved successfully",
                 status_code=status.HTTP_200_OK
             )
+            return set_validators(response, patient.updated_at)
+        
+        except FieldsetError as e:
+            return error_response(
+                message="Invalid field selection",
+                details=str(e),
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
         
         except Exception as e:
             return error_response(
@@ -179,33 +437,48 @@ class PatientDetailView(APIView):
         Request body: Patient fields to update
         """
         try:
-            patient = self.get_patient(pk, request.user)
+            fieldset = SparseFieldset.from_request(request, PatientSerializer)
             
-            if not patient:
-                return error_response(
-                    message="Patient not found",
-                    details="Patient does not exist or you don't have permission to update it",
-                    status_code=status.HTTP_404_NOT_FOUND
+            with transaction.atomic():
+                patient = self.get_patient(pk, request.user, for_update=has_if_match(request))
+                
+                if not patient:
+                    return error_response(
+                        message="Patient not found",
+                        details="Patient does not exist or you don't have permission to update it",
+                        status_code=status.HTTP_404_NOT_FOUND
+                    )
+                
+                failed = precondition_failed(request, patient.updated_at)
+                if failed is not None:
+                    return failed
+                
+                serializer = PatientUpdateSerializer(
+                    patient,
+                    data=request.data,
+                    partial=False  # Require all fields for PUT
                 )
-            
-            serializer = PatientUpdateSerializer(
-                patient,
-                data=request.data,
-                partial=False  # Require all fields for PUT
-            )
-            
-            if serializer.is_valid():
-                updated_patient = serializer.save()
                 
-                return success_response(
-                    data=PatientSerializer(updated_patient).data,
-                    message="Patient updated successfully",
-                    status_code=status.HTTP_200_OK
+                if serializer.is_valid():
+                    updated_patient = serializer.save()
+                    
+                    response = success_response(
+                        data=PatientSerializer(updated_patient, fieldset=fieldset).data,
+                        message="Patient updated successfully",
+                        status_code=status.HTTP_200_OK
+                    )
+                    return set_validators(response, updated_patient.updated_at)
+                
+                return error_response(
+                    message="Validation failed",
+                    details=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
                 )
-            
+        
+        except FieldsetError as e:
             return error_response(
-                message="Validation failed",
-                details=serializer.errors,
+                message="Invalid field selection",
+                details=str(e),
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         
@@ -223,33 +496,48 @@ class PatientDetailView(APIView):
         Request body: Patient fields to update (partial)
         """
         try:
-            patient = self.get_patient(pk, request.user)
+            fieldset = SparseFieldset.from_request(request, PatientSerializer)
             
-            if not patient:
-                return error_response(
-                    message="Patient not found",
-                    details="Patient does not exist or you don't have permission to update it",
-                    status_code=status.HTTP_404_NOT_FOUND
+            with transaction.atomic():
+                patient = self.get_patient(pk, request.user, for_update=has_if_match(request))
+                
+                if not patient:
+                    return error_response(
+                        message="Patient not found",
+                        details="Patient does not exist or you don't have permission to update it",
+                        status_code=status.HTTP_404_NOT_FOUND
+                    )
+                
+                failed = precondition_failed(request, patient.updated_at)
+                if failed is not None:
+                    return failed
+                
+                serializer = PatientUpdateSerializer(
+                    patient,
+                    data=request.data,
+                    partial=True  # Allow partial updates for PATCH
                 )
-            
-            serializer = PatientUpdateSerializer(
-                patient,
-                data=request.data,
-                partial=True  # Allow partial updates for PATCH
-            )
-            
-            if serializer.is_valid():
-                updated_patient = serializer.save()
                 
-                return success_response(
-                    data=PatientSerializer(updated_patient).data,
-                    message="Patient updated successfully",
-                    status_code=status.HTTP_200_OK
+                if serializer.is_valid():
+                    updated_patient = serializer.save()
+                    
+                    response = success_response(
+                        data=PatientSerializer(updated_patient, fieldset=fieldset).data,
+                        message="Patient updated successfully",
+                        status_code=status.HTTP_200_OK
+                    )
+                    return set_validators(response, updated_patient.updated_at)
+                
+                return error_response(
+                    message="Validation failed",
+                    details=serializer.errors,
+                    status_code=status.HTTP_400_BAD_REQUEST
                 )
-            
+        
+        except FieldsetError as e:
             return error_response(
-                message="Validation failed",
-                details=serializer.errors,
+                message="Invalid field selection",
+                details=str(e),
                 status_code=status.HTTP_400_BAD_REQUEST
             )
         